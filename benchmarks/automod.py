@@ -0,0 +1,340 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Replays a message corpus through the automod listeners against stub
+# guilds, members and channels, nothing is sent to discord or the database.
+#
+#   python -m benchmarks.automod                      synthetic corpus
+#   python -m benchmarks.automod --corpus path.jsonl  recorded corpus
+#
+# A recorded corpus has one json object per line:
+#   {"kind": "message", "author": 1, "channel": 1, "content": "...", "mentions": [2, 3]}
+#   {"kind": "join", "author": 1, "age": 3}  (account age in days)
+
+import argparse
+import asyncio
+import discord
+import gc
+import json
+import random
+import string
+import sys
+import tracemalloc
+
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from types import SimpleNamespace
+
+from utils import i18n  # noqa: F401, installs _
+from utils.logsink import LogSink
+from utils.logstats import LogStats
+from utils.pipeline import MessagePipeline
+from utils.scheduler import ExpiryScheduler
+from cogs.events.automod import AutomodEvents
+
+GUILD_ID = 1
+LOG_CHANNEL_ID = 2
+CHANNELS = 10
+NOW = datetime.now(timezone.utc)
+
+
+async def nothing(*args, **kwargs):
+    return None
+
+
+class Permissions(defaultdict):
+    def __init__(self, value: bool):
+        super().__init__(lambda: value)
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+class StubRole:
+    def __init__(self, id: int, name: str, position: int):
+        self.id, self.name, self.position = id, name, position
+
+
+class StubChannel:
+    def __init__(self, guild, id: int):
+        self.guild, self.id, self.name, self.mention = guild, id, f'channel-{id}', f'<#{id}>'
+        self.sent = 0
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+    def permissions_for(self, member):
+        return self.guild.me.guild_permissions
+
+    def overwrites_for(self, member):
+        return SimpleNamespace(send_messages=None)
+
+    set_permissions = nothing
+
+
+class StubMember:
+    def __init__(self, guild, id: int, age: float = 365, bot: bool = False):
+        self.guild, self.id, self.bot = guild, id, bot
+        self.created_at = NOW - timedelta(days=age)
+        self.joined_at = NOW - timedelta(days=min(age, 3))
+        self.guild_permissions = Permissions(False)
+        self.top_role = StubRole(0, '@everyone', 0)
+        self.roles = [self.top_role]
+        self._roles = set()
+        self.avatar, self.display_avatar = None, SimpleNamespace(url='')
+        self.mention = f'<@{id}>'
+
+    def __str__(self):
+        return f'member-{self.id}'
+
+    @property
+    def __class__(self):
+        return discord.Member  # passes the isinstance checks in the listeners
+
+    async def add_roles(self, *roles, reason=None):
+        self.roles.extend(roles)
+
+    def permissions_in(self, channel):
+        return Permissions(True)
+
+    send = nothing
+
+
+class StubGuild:
+    def __init__(self):
+        self.id = GUILD_ID
+        self.name = 'benchmark'
+        self.icon = None
+        self.vanity_url_code = None
+        self.muterole = StubRole(3, 'Muted', 5)
+        self.roles = [self.muterole]
+        self.data = SimpleNamespace(muterole=None)
+        self.me = StubMember(self, 0, bot=True)
+        self.me.guild_permissions = Permissions(True)
+        self.me.top_role = StubRole(4, 'Dredd', 10)
+        self.channels = {i: StubChannel(self, i) for i in range(LOG_CHANNEL_ID, LOG_CHANNEL_ID + CHANNELS + 1)}
+        self.rest = Counter()  # REST calls automod would have made
+
+    def __str__(self):
+        return self.name
+
+    def get_channel(self, id):
+        return self.channels.get(id)
+
+    def get_role(self, id):
+        return None
+
+    async def ban(self, user, **kwargs):
+        self.rest['ban'] += 1
+
+    async def kick(self, user, **kwargs):
+        self.rest['kick'] += 1
+
+    async def invites(self):
+        return []
+
+
+class StubMessage:
+    def __init__(self, id: int, author, channel, content: str, mentions):
+        self.id, self.author, self.channel, self.guild = id, author, channel, channel.guild
+        self.content, self.mentions = content, mentions
+        self.embeds, self.attachments, self.stickers = [], [], []
+        self.created_at = datetime.now(timezone.utc)
+
+    async def delete(self, **kwargs):
+        self.guild.rest['delete'] += 1
+
+
+class StubDatabase:
+    def __init__(self):
+        self.queries = Counter()
+
+    async def execute(self, query, *args):
+        self.queries[query.split()[0]] += 1
+
+    async def fetchval(self, query, *args):
+        self.queries[query.split()[0]] += 1
+
+    async def executemany(self, query, args):
+        self.queries[query.split()[0]] += 1
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class StubBot:
+    def __init__(self, guild):
+        self.loop = asyncio.get_event_loop()
+        self.guild = guild
+        self.db = StubDatabase()
+        self.session = None
+        self.website = 'https://dreddbot.xyz'
+        self.config = SimpleNamespace(PHISHING='', PHISHING_FEED='')
+        self.settings = defaultdict(lambda: defaultdict(lambda: defaultdict(str)))
+        self.settings['colors'] = defaultdict(int)
+        self.expiry = ExpiryScheduler()
+        self.log_sink = LogSink(self)
+        self.log_stats = LogStats(self)
+        self.pipeline = MessagePipeline(self)
+        self.join_counter, self.automod_counter = Counter(), Counter()
+        self.automod_counter[GUILD_ID] = 100  # skips the one second sleep between modlog embeds
+        self.automod_policies = {}
+        self.mutes, self.temp_mutes, self.bans, self.temp_bans = {}, {}, {}, {}
+        self.channels_whitelist, self.roles_whitelist, self.users_whitelist = {}, {}, {}
+        self.prefix = {GUILD_ID: '-'}
+        self.automod = {GUILD_ID: {'channel': LOG_CHANNEL_ID, 'ignore_admins': True, 'delete_messages': True}}
+        self.spam = {GUILD_ID: {'level': 1, 'time': '12h'}}
+        self.masscaps = {GUILD_ID: {'level': 1, 'percentage': 75, 'time': '12h'}}
+        self.invites = {GUILD_ID: {'level': 1, 'time': '12h'}}
+        self.massmention = {GUILD_ID: {'level': 1, 'limit': 5, 'time': '12h'}}
+        self.links = {GUILD_ID: {'level': 1, 'time': '12h'}}
+        self.raidmode = {GUILD_ID: {'channel': LOG_CHANNEL_ID, 'dm': False, 'action': 2}}
+
+    def is_ready(self):
+        return True
+
+    async def wait_until_ready(self):
+        await asyncio.Event().wait()
+
+    def get_guild(self, id):
+        return self.guild if id == GUILD_ID else None
+
+    def get_channel(self, id):
+        return self.guild.get_channel(id)
+
+    async def fetch_invite(self, code, **kwargs):
+        return SimpleNamespace(guild=SimpleNamespace(id=hash(code)))
+
+
+def synthetic(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    words = ('hello', 'anyone', 'playing', 'tonight', 'lol', 'nice', 'what', 'is', 'the', 'best', 'build', 'for', 'this',
+             'patch', 'i', 'think', 'we', 'should', 'try', 'again', 'gg', 'thanks', 'everyone', 'see', 'you', 'later')
+    kinds = ('chat',) * 70 + ('caps',) * 6 + ('invite',) * 6 + ('link',) * 6 + ('mentions',) * 4 + ('flood',) * 4 + ('join',) * 4
+    for i in range(count):
+        kind = rng.choice(kinds)
+        author = rng.randrange(10, 2000)
+        channel = rng.randrange(LOG_CHANNEL_ID + 1, LOG_CHANNEL_ID + CHANNELS + 1)
+        sentence = ' '.join(rng.choice(words) for _ in range(rng.randrange(3, 20)))
+        if kind == 'join':
+            yield {'kind': 'join', 'author': 100000 + i, 'age': rng.choice((0.5, 2, 10, 400))}
+            continue
+        mentions = []
+        if kind == 'caps':
+            sentence = sentence.upper()
+        elif kind == 'invite':
+            sentence += f" discord.gg/{''.join(rng.choices(string.ascii_letters, k=8))}"
+        elif kind == 'link':
+            sentence += f" https://{rng.choice(words)}.example.com/{rng.choice(words)}"
+        elif kind == 'mentions':
+            mentions = rng.sample(range(10, 2000), 8)
+        elif kind == 'flood':
+            sentence = 'free nitro for everyone who joins, claim it quick ' + rng.choice(string.ascii_letters)
+        yield {'kind': 'message', 'author': author, 'channel': channel, 'content': sentence, 'mentions': mentions}
+
+
+def recorded(path: str):
+    with open(path, 'r', encoding='utf8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def percentile(values, p: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def replay(entries, allocations: bool):
+    guild = StubGuild()
+    bot = StubBot(guild)
+    cog = AutomodEvents(bot)
+    cog.refresh_phishing.cancel()
+    members = {}
+
+    def member(id, age=365):
+        if id not in members:
+            members[id] = StubMember(guild, id, age)
+        return members[id]
+
+    timings, allocated, kinds = [], [], Counter()
+    for i, entry in enumerate(entries):
+        if entry['kind'] == 'join':
+            args = (cog.on_anti_raid, member(entry['author'], entry.get('age', 365)))
+        else:
+            mentions = [member(x) for x in entry.get('mentions', ())]
+            channel = guild.get_channel(entry.get('channel', LOG_CHANNEL_ID + 1)) or guild.get_channel(LOG_CHANNEL_ID + 1)
+            args = (cog.on_automod, StubMessage(i, member(entry['author']), channel, entry['content'], mentions))
+        kinds[entry['kind']] += 1
+
+        if allocations:
+            before = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            await args[0](args[1])
+            allocated.append(tracemalloc.get_traced_memory()[1] - before)
+        else:
+            start = perf_counter()
+            await args[0](args[1])
+            timings.append(perf_counter() - start)
+
+    for wave in list(cog.raids.waves.values()):
+        wave.task.cancel()
+    await bot.log_sink.close()
+    await bot.log_stats.close()
+    return timings, allocated, kinds, guild, bot
+
+
+async def main(args):
+    entries = list(recorded(args.corpus) if args.corpus else synthetic(args.messages, args.seed))
+
+    gc.collect()
+    started = perf_counter()
+    timings, _, kinds, guild, bot = await replay(entries, allocations=False)
+    total = perf_counter() - started
+
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    _, allocated, _, _, _ = await replay(entries, allocations=True)
+    retained = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+
+    timings.sort()
+    print(f"entries:      {len(entries)} ({', '.join(f'{count} {kind}' for kind, count in kinds.items())})")
+    print(f"throughput:   {len(entries) / total:,.0f} msgs/s")
+    print(f"latency p50:  {percentile(timings, 0.50) * 1e6:,.1f} us")
+    print(f"latency p99:  {percentile(timings, 0.99) * 1e6:,.1f} us")
+    print(f"latency max:  {timings[-1] * 1e6:,.1f} us")
+    print(f"allocated:    {sum(allocated) / len(allocated) / 1024:,.2f} KiB peak per message")
+    print(f"retained:     {retained / len(entries):,.2f} blocks per message")
+    print(f"rest calls:   {dict(guild.rest)}")
+    print(f"db queries:   {dict(bot.db.queries)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Automod throughput benchmark")
+    parser.add_argument('--corpus', help="recorded corpus, one json object per line")
+    parser.add_argument('--messages', type=int, default=20000, help="size of the synthetic corpus")
+    parser.add_argument('--seed', type=int, default=0)
+    asyncio.get_event_loop().run_until_complete(main(parser.parse_args()))
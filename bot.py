@@ -36,6 +36,19 @@ from typing import Optional, Union, Any
 from utils.checks import is_disabled
 from colorama import Fore as print_color
 from utils.context import EditingContext
+from utils.scheduler import ExpiryScheduler
+from utils.reminders import ReminderEngine
+from utils.logsink import LogSink
+from utils.pipeline import MessagePipeline, COMMANDS, MESSAGES
+from utils.prefixes import PrefixMatcher
+from utils.policy import invalidate_policy, POLICY_FIELDS
+from utils.settings import GuildSettingsStore
+from utils.snapshot import WarmStart
+from utils.chunker import ChunkScheduler
+from utils.messagestore import MessageStore
+from utils.logstats import LogStats
+from utils.commandusage import CommandUsage
+from utils.modhistory import ModHistory
 
 dredd_logger = logging.getLogger("dredd")
 
@@ -67,8 +80,16 @@ async def run():
     bot.keep_alive = bot.loop.create_task(start_websocket())
 
     try:
-        dredd_logger.info("[CACHE] Loading cache.")
-        await LoadCache.start(bot)  # type: ignore
+        if bot.warm_start.restore():
+            dredd_logger.info("[CACHE] Restored cache from the snapshot, reconciling in the background.")
+            bot.loop.create_task(bot.warm_start.reconcile(LoadCache.start))  # type: ignore
+        else:
+            dredd_logger.info("[CACHE] Loading cache.")
+            await LoadCache.start(bot)  # type: ignore
+            bot.warm_start.mark_loaded()
+        bot.warm_start.start()
+        await bot.command_usage.setup()
+        await bot.mod_history.setup()
         bot.session = aiohttp.ClientSession(loop=bot.loop)
         dredd_logger.info("[BOT] Starting bot.")
         # await bot.start(config.DISCORD_TOKEN)
@@ -79,19 +100,8 @@ async def run():
         await bot.close()
 
 
-async def get_prefix(bot, message):
-    if bot.user.id == 663122720044875796:  # for beta, so I don't accidentally kill both bots
-        custom_prefix = ['rw ', 'db ']
-        return commands.when_mentioned_or(*custom_prefix)(bot, message)
-    prefix = message.guild.data.prefix if message.guild else '!'
-    custom_prefix = [prefix]
-    if await bot.is_booster(message.author):
-        boosters_prefix = message.author.data.prefix if message.author.data.prefix is not None else 'dredd '
-        custom_prefix.append(boosters_prefix)
-    if await bot.is_admin(message.author):
-        custom_prefix.append('d ')
-
-    return commands.when_mentioned_or(*custom_prefix)(bot, message)
+def get_prefix(bot, message):
+    return list(bot.prefixes.get(message))
 
 
 # noinspection PyArgumentEqualDefault
@@ -107,8 +117,8 @@ class Bot(commands.AutoShardedBot):
             reconnect=True,
             allowed_mentions=discord.AllowedMentions(users=False, roles=False, everyone=False, replied_user=True),
             slash_commands=False,  # Fuck slash commands
-            max_messages=10000,
-            chunk_guilds_at_startup=True,  # this is here for easy access. In case I need to switch it fast to False I won't need to look at docs.
+            max_messages=1000,  # edit/delete logs and snipes use self.message_store, see utils/messagestore.py
+            chunk_guilds_at_startup=False,  # guilds are chunked in the background by self.chunker, see utils/chunker.py
             intents=discord.Intents(
                 guilds=True,  # guild/channel join/remove/update
                 members=True,  # member join/remove/update
@@ -130,6 +140,18 @@ class Bot(commands.AutoShardedBot):
 
         self.config = config
 
+        # created before the extensions, cogs register their stages and logs in __init__
+        self.log_sink = LogSink(self)  # queued log messages, sent in batches per channel
+        self.log_stats = LogStats(self)  # logging table counters, written in batches
+        self.command_usage = CommandUsage(self)  # command_logs rows, written in batches
+        self.mod_history = ModHistory(self)  # modlog cases for the moderation commands, recently viewed ones cached
+        self.prefixes = PrefixMatcher(self)  # compiled prefixes, invalidated wherever a prefix or rank changes
+        self.pipeline = MessagePipeline(self)  # every message goes through its stages, cogs add their own
+        self.pipeline.add_stage('commands', self.command_stage, COMMANDS)
+        self.chunker = ChunkScheduler(self)  # chunks guilds by priority after ready, one request at a time per shard
+        self.message_store = MessageStore(self, getattr(config, 'MESSAGE_STORE_BUDGET', 32 * 1024 * 1024))  # compact recent messages for logs and snipes
+        self.pipeline.add_stage('messages', self.message_stage, MESSAGES)
+
         for extension in config.EXTENSIONS:
             try:
                 self.load_extension(extension)
@@ -138,9 +160,6 @@ class Bot(commands.AutoShardedBot):
                 print(print_color.RED, f'[WARNING] Could not load extension {extension}: {e}')
 
         self.db: asyncpg.pool.Pool = kwargs.pop("db")
-        self.cmdUsage = {}
-        self.cmdUsers = {}
-        self.guildUsage = {}
         self.process = psutil.Process()
         self.ctx = EditingContext
 
@@ -197,39 +216,44 @@ class Bot(commands.AutoShardedBot):
         self.check_duration = {}
 
         # guilds / moderation
-        self.prefix = {}
-        self.moderation = {}
-        self.memberlog = {}
-        self.joinlog = {}
-        self.leavelog = {}
-        self.guildlog = {}
-        self.joinrole = {}
-        self.joinmessage = {}
-        self.leavemessage = {}
-        self.messageedits = {}
-        self.messagedeletes = {}
-        self.antihoist = {}
-        self.automod = {}
-        self.massmention = {}
-        self.masscaps = {}
-        self.invites = {}
-        self.links = {}
-        self.spam = {}
-        self.modlog = {}
-        self.raidmode = {}
+        self.guild_settings = GuildSettingsStore()  # one slotted record per guild, the attributes below are views over it
+        self.guild_settings.subscribe(self.on_settings_change)
+        self.warm_start = WarmStart(self, getattr(config, 'CACHE_SNAPSHOT', 'db/cache.snapshot'))  # caches written to disk for fast restarts
+        self.prefix = self.guild_settings.view('prefix')
+        self.moderation = self.guild_settings.view('moderation')
+        self.memberlog = self.guild_settings.view('memberlog')
+        self.joinlog = self.guild_settings.view('joinlog')
+        self.leavelog = self.guild_settings.view('leavelog')
+        self.guildlog = self.guild_settings.view('guildlog')
+        self.joinrole = self.guild_settings.view('joinrole')
+        self.joinmessage = self.guild_settings.view('joinmessage')
+        self.leavemessage = self.guild_settings.view('leavemessage')
+        self.messageedits = self.guild_settings.view('messageedits')
+        self.messagedeletes = self.guild_settings.view('messagedeletes')
+        self.antihoist = self.guild_settings.view('antihoist')
+        self.automod = self.guild_settings.view('automod')
+        self.massmention = self.guild_settings.view('massmention')
+        self.masscaps = self.guild_settings.view('masscaps')
+        self.invites = self.guild_settings.view('invites')
+        self.links = self.guild_settings.view('links')
+        self.spam = self.guild_settings.view('spam')
+        self.modlog = self.guild_settings.view('modlog')
+        self.raidmode = self.guild_settings.view('raidmode')
         self.temp_bans = {}
         self.temp_mutes = {}
+        self.expiry = ExpiryScheduler()  # temp bans/mutes ordered by expiry time, keys are (action, user_id, guild_id)
         self.mutes = {}
         self.bans = {}
-        self.mute_role = {}
-        self.mod_role = {}
-        self.admin_role = {}
-        self.channels_whitelist = {}
-        self.roles_whitelist = {}
-        self.users_whitelist = {}
+        self.mute_role = self.guild_settings.view('mute_role')
+        self.mod_role = self.guild_settings.view('mod_role')
+        self.admin_role = self.guild_settings.view('admin_role')
+        self.channels_whitelist = self.guild_settings.view('channels_whitelist')
+        self.roles_whitelist = self.guild_settings.view('roles_whitelist')
+        self.users_whitelist = self.guild_settings.view('users_whitelist')
+        self.automod_policies = {}  # guild_id: compiled AutomodPolicy, see utils/policy.py
         self.guild_disabled = {}
         self.cog_disabled = {}
-        self.case_num = {}
+        self.case_num = self.guild_settings.view('case_num')
         self.rr = {}
 
         # other
@@ -239,8 +263,9 @@ class Bot(commands.AutoShardedBot):
         self.nicks_op = {}
         self.badges = {}
         self.disabled_commands = {}
-        self.translations = {}
+        self.translations = self.guild_settings.view('translations')
         self.reminders = {}
+        self.reminder_engine = ReminderEngine(self)
         self.mode247 = {}
         self.catched_errors = Counter()
         self.rr_setup = {}
@@ -261,6 +286,12 @@ class Bot(commands.AutoShardedBot):
     def guild_cache(self, g) -> DreddGuild:
         return self.cache.get_guild(self, g.id)  # type: ignore
 
+    def on_settings_change(self, guild_id: int, field: str, old, new) -> None:
+        if field == 'prefix':
+            self.prefixes.invalidate_guild(guild_id)
+        elif field in POLICY_FIELDS:
+            invalidate_policy(self, guild_id)
+
     def user_cache(self, u) -> DreddUser:
         return self.cache.get_user(self, u)  # type: ignore
 
@@ -293,6 +324,11 @@ class Bot(commands.AutoShardedBot):
 
     async def close(self) -> None:
         dredd_logger.info("[BOT] Shutting down.")
+        await self.log_sink.close()
+        await self.log_stats.close()
+        await self.command_usage.close()
+        await self.warm_start.close()
+        self.chunker.close()
         await self.session.close()  # type: ignore
         await super().close()
 
@@ -332,17 +368,46 @@ class Bot(commands.AutoShardedBot):
         await self.process_slash_commands(interaction)
 
     async def on_message(self, message):
-        if message.author.bot or not self.is_ready():
+        if message.author.bot:
+            if message.guild and self.message_store.wants(message):
+                self.message_store.add(message)  # bots and webhooks can still be sniped
             return
+        if not self.is_ready():
+            return
+        if message.guild:
+            i18n.current_locale.set(self.translations.get(message.guild.id, 'en_US'))
+        await self.pipeline.process(message, EditingContext)
+
+    async def command_stage(self, ctx):
+        if ctx.valid:
+            self.loop.create_task(self.run_command(ctx))  # paginators and prompts would hold back automod otherwise
+
+    async def run_command(self, ctx):
         try:
-            ctx = await self.get_context(message, cls=EditingContext)
-            if message.guild:
-                i18n.current_locale.set(self.translations.get(message.guild.id, 'en_US'))
-            if ctx.valid:
-                await self.invoke(ctx)
+            await self.invoke(ctx)
         except Exception:
             return
 
+    async def message_stage(self, ctx):
+        message = ctx.message
+        if message.guild and not ctx.valid and self.message_store.wants(message):
+            self.message_store.add(message)
+
+    async def on_raw_message_edit(self, payload):
+        content = payload.data.get('content')
+        if payload.guild_id is None or content is None:  # embed only updates don't carry the content
+            return
+        before = self.message_store.edit(payload.guild_id, payload.message_id, content)
+        if before is not None and before.content != content:
+            self.dispatch('stored_message_edit', before, before._replace(content=content))
+
+    async def on_raw_message_delete(self, payload):
+        if payload.guild_id is None:
+            return
+        message = self.message_store.delete(payload.guild_id, payload.message_id)
+        if message is not None:
+            self.dispatch('stored_message_delete', message)
+
     async def on_message_edit(self, before, after):
         if before.author.bot or not self.is_ready():
             return
@@ -22,6 +22,7 @@ from utils.default import automod_values
 from utils.paginator import Pages
 from utils.i18n import locale_doc
 from utils.components import AutomodTime
+from utils.policy import invalidate_policy
 
 
 # noinspection PyUnresolvedReferences
@@ -31,6 +32,11 @@ class Automod(commands.Cog, name='Automoderation'):
         self.help_icon = '<:channeldelete:687008899517513766>'
         self.big_icon = 'https://media.discordapp.net/attachments/679643465407266817/701055848788787300/channeldeletee.png?width=115&height=115'
 
+    async def cog_after_invoke(self, ctx):
+        # every settings command can change the policy, recompile it on the next message
+        if ctx.guild:
+            invalidate_policy(self.bot, ctx.guild.id)
+
     def automod_settings(self, guild):  # sourcery no-metrics skip: inline-immediately-returned-variable, or-if-exp-identity
         automod = cm.get(self.bot, 'automod', guild.id)
 
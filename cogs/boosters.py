@@ -39,6 +39,7 @@ class Boosters(commands.Cog):
 
         await self.bot.db.execute("UPDATE boosters SET prefix = $1 WHERE user_id = $2", prefix, ctx.author.id)
         self.bot.boosters[ctx.author.id] = prefix
+        self.bot.prefixes.invalidate_user(ctx.author.id)
         await ctx.send(_("{0} Set your custom prefix to `{1}`.").format(
             self.bot.settings['emojis']['misc']['white-mark'], prefix
         ))
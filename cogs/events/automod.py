@@ -14,70 +14,72 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 import discord
-import re
 import asyncio
+import io
+import logging as log
 
 from discord.ext import commands, tasks
 from datetime import datetime, timezone, timedelta
 from db.cache import CacheManager as cm
 from contextlib import suppress
-from collections import defaultdict
 
 from time import time as unix_time
-from utils.checks import CooldownByContent
-from utils import default, btime, logger as logging
+from utils.ratelimit import RateLimiter, content_key, user_key, member_key, channel_key
+from utils import default, btime, logger as logging, pipeline
+from utils.scanner import scan, diff
+from utils.fingerprint import NearDuplicateDetector
+from utils.raids import RaidDetector, RaidWave, AGE_LABELS, age_bucket
+from utils.phishing import PhishingIndex
+from utils.invites import InviteResolver
+from utils.lru import TTLCache
+from utils.policy import get_policy
 
-INVITE = re.compile(r'discord(?:\.com/invite|app\.com/invite|\.gg)/?([a-zA-Z0-9\-]{2,32})')
-CAPS = re.compile(r"[ABCDEFGHIJKLMNOPQRSTUVWXYZ]")
-LINKS = re.compile(r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*(),]|%[0-9a-fA-F][0-9a-fA-F])+")
-PHISHING = re.compile(r"(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z0-9][a-z0-9-]{0,61}[a-z0-9]")
+dredd_logger = log.getLogger("dredd")
 
 
 # noinspection PyUnboundLocalVariable
 class AutomodEvents(commands.Cog, name='AutomodEvents'):
     def __init__(self, bot):
         self.bot = bot
-        # cooldown goes the same as commands.cooldown
-        # (messages, seconds, user/member/channel whatever)
-        self.messages_cooldown = CooldownByContent.from_cooldown(15, 17.0, commands.BucketType.member)  # checks for same content
-        self.user_cooldowns = commands.CooldownMapping.from_cooldown(10, 12.0, commands.BucketType.user)  # checks for member spam
-        self.invite_cooldown = commands.CooldownMapping.from_cooldown(5, 60.0, commands.BucketType.member)  # checks for invites
-        self.link_cooldown = commands.CooldownMapping.from_cooldown(5, 60.0, commands.BucketType.member)
-        self.caps_content = commands.CooldownMapping.from_cooldown(6, 10.0, commands.BucketType.member)  # checks for caps
+        # (hits, seconds, bucket key), buckets are hashed so they don't keep the message content around
+        self.messages_cooldown = RateLimiter(15, 17.0, content_key)  # checks for same content
+        self.user_cooldowns = RateLimiter(10, 12.0, user_key)  # checks for member spam
+        self.invite_cooldown = RateLimiter(5, 60.0, member_key)  # checks for invites
+        self.link_cooldown = RateLimiter(5, 60.0, member_key)
+        self.caps_content = RateLimiter(6, 10.0, member_key)  # checks for caps
 
-        self.new_users = commands.CooldownMapping.from_cooldown(30, 35.0, commands.BucketType.channel)
+        self.new_users = RateLimiter(30, 35.0, channel_key)
+        self.near_duplicates = NearDuplicateDetector(per=20.0)  # same message with small changes, per channel and per guild
+        self.raids = RaidDetector()
 
-        self.batch_messages = defaultdict(list)
+        self.phishing = PhishingIndex(feed=getattr(bot.config, 'PHISHING_FEED', None), remote=bot.config.PHISHING or None)
+        self.phishing.load()
+        self.invites = InviteResolver(bot)
+        self.scans = TTLCache(maxsize=20000, ttl=3600.0)  # message_id: ScanResult, so edits are only checked for what changed
 
-        self.send_messages.add_exception_type(RuntimeError)
-        self.send_messages.start()
+        self.refresh_phishing.start()
+        bot.pipeline.add_stage('automod', self.automod_stage, pipeline.AUTOMOD)
 
     def cog_unload(self):
-        self.send_messages.cancel()
+        self.refresh_phishing.cancel()
+        self.bot.pipeline.remove_stage('automod')
+        for wave in self.raids.waves.values():
+            wave.task.cancel()  # logs what was punished so far
 
-    @tasks.loop(seconds=10)
-    async def send_messages(self):
-        if not self.bot.is_ready():
-            return
-
-        for ((guild_id, channel_id), messages) in self.batch_messages.items():
-            print(self.batch_messages.items())
-            guild = self.bot.get_guild(guild_id)
-            channel = guild and guild.get_channel(channel_id) or self.bot.get_channel(channel_id)
-            if not channel:
-                continue
-
-            paginator = commands.Paginator(suffix='', prefix='')
-            for message in messages:
-                paginator.add_line(message)
+    @tasks.loop(hours=1)
+    async def refresh_phishing(self):
+        try:
+            await self.phishing.refresh(self.bot.session)
+        except Exception as e:
+            dredd_logger.error(f"[PHISHING] Failed to refresh the phishing domains - {e}")
 
-            for page in paginator.pages:
-                try:
-                    await channel.send(page)
-                except discord.HTTPException:
-                    pass
+    @refresh_phishing.before_loop
+    async def before_refresh_phishing(self):
+        await self.bot.wait_until_ready()
 
-            self.batch_messages.clear()
+    def rate_limit_stats(self):
+        limiters = ('messages_cooldown', 'user_cooldowns', 'invite_cooldown', 'link_cooldown', 'caps_content', 'new_users')
+        return {name: getattr(self, name).stats() for name in limiters}
 
     @staticmethod
     def new_member(member):
@@ -86,199 +88,168 @@ class AutomodEvents(commands.Cog, name='AutomodEvents'):
         month = now - timedelta(days=30)
         return member.created_at > month.astimezone(timezone.utc) and member.joined_at > seven_days.astimezone(timezone.utc)
 
-    # if they send a message
-    @commands.Cog.listener('on_message')
-    async def on_automod(self, message):
-        if not message.guild or not self.bot.is_ready():
-            return
+    def message_policy(self, message):
+        if not message.guild or message.author.bot or not isinstance(message.author, discord.Member):
+            return None
 
-        automod = cm.get(self.bot, 'automod', message.guild.id)
-        if not automod:
-            return
+        policy = get_policy(self.bot, message.guild.id)  # compiled once, rebuilt when automod settings change
+        if not policy:
+            return None
 
-        if message.author.bot:  # author is a bot
-            return
+        permissions = message.author.guild_permissions
+        if permissions.administrator or permissions.manage_messages and policy.ignore_admins:  # bot can be configured to ignore admins/mods
+            return None
 
-        if not isinstance(message.author, discord.Member):
-            return
-
-        if message.author.guild_permissions.manage_messages and automod['ignore_admins']:  # Member has MANAGE_MESSAGES permissions and bot is configured to ignore admins/mods
-            return
+        me = message.guild.me.guild_permissions
+        if not me.manage_roles or not me.kick_members or not me.ban_members:
+            return None
 
-        if message.author.guild_permissions.administrator:
-            return
+        if policy.is_whitelisted(message.author, message.channel):
+            return None
 
-        if not message.guild.me.guild_permissions.manage_roles or not message.guild.me.guild_permissions.kick_members or not message.guild.me.guild_permissions.ban_members:
-            return
+        return policy
 
-        channel_whitelist = cm.get(self.bot, 'channels_whitelist', message.guild.id)
-        if channel_whitelist and message.channel.id in channel_whitelist:
-            return
+    async def run_actions(self, message, policy, result, actions=None):
+        for name in policy.actions if actions is None else actions:  # every action reads from the same scan
+            if await getattr(self, name)(message, result, policy):
+                break
 
-        role_whitelist = cm.get(self.bot, 'roles_whitelist', message.guild.id)
-        if role_whitelist:
-            for role in message.author.roles:
-                if role.id in role_whitelist:
-                    return
+    async def automod_stage(self, ctx):
+        await self.on_automod(ctx.message)
 
-        users_whitelist = cm.get(self.bot, 'users_whitelist', message.guild.id)
-        if users_whitelist and message.author.id in users_whitelist:
+    # if they send a message, runs as a stage of the message pipeline
+    async def on_automod(self, message):
+        if not self.bot.is_ready():
             return
 
-        for coro in self.automodactions.copy():
-            if await coro(self, message):  # type: ignore
-                break
+        policy = self.message_policy(message)
+        if policy:
+            result = scan(message)
+            self.scans.set(message.id, result)
+            await self.run_actions(message, policy, result)
 
     # if they edit existing message
     @commands.Cog.listener('on_message_edit')
     async def on_automod_edit(self, before, after):
-        message = after
-        if not message.guild or not self.bot.is_ready():
-            return
-
-        automod = cm.get(self.bot, 'automod', message.guild.id)
-        if not automod:
-            return
-
-        if message.author.bot:  # author is a bot
-            return
-
-        if not isinstance(message.author, discord.Member):
-            return
-
-        if message.author.guild_permissions.manage_messages and automod['ignore_admins']:  # Member has MANAGE_MESSAGES permissions and bot is configured to ignore admins/mods
-            return
-
-        if message.author.guild_permissions.administrator:  # Will still ignore admins
-            return
-
-        if not message.guild.me.guild_permissions.manage_roles or not message.guild.me.guild_permissions.kick_members or not message.guild.me.guild_permissions.ban_members:
-            return
-
-        if not before.embeds and after.embeds:
+        if not self.bot.is_ready():
             return
 
-        channel_whitelist = cm.get(self.bot, 'channels_whitelist', message.guild.id)
-        if channel_whitelist and message.channel.id in channel_whitelist:
+        if not before.embeds and after.embeds or before.content == after.content:
             return
 
-        role_whitelist = cm.get(self.bot, 'roles_whitelist', message.guild.id)
-        if role_whitelist:
-            for role in message.author.roles:
-                if role.id in role_whitelist:
-                    return
-
-        users_whitelist = cm.get(self.bot, 'users_whitelist', message.guild.id)
-        if users_whitelist and message.author.id in users_whitelist:
+        policy = self.message_policy(after)
+        if not policy:
             return
 
-        for coro in self.automodactions.copy():
-            if await coro(self, message):  # type: ignore
-                break
+        # only check what the edit added, the rest was already checked when the message was sent
+        previous = self.scans.get(after.id) or scan(before)
+        current = scan(after)
+        self.scans.set(after.id, current)
+        result = diff(previous, current)
+        if result:
+            await self.run_actions(after, policy, result, [name for name in policy.actions if name != 'anti_spam'])
 
     @commands.Cog.listener('on_member_join')
     async def on_anti_raid(self, member):
         if not member.guild:
             return
 
-        automod = cm.get(self.bot, 'automod', member.guild.id)
-        raidmode = cm.get(self.bot, 'raidmode', member.guild.id)
-        if not automod:
-            return
-        if not raidmode:
+        policy = get_policy(self.bot, member.guild.id)
+        if not policy or not policy.raidmode:
             return
 
         if not member.guild.me.guild_permissions.ban_members or not member.guild.me.guild_permissions.kick_members:
             return
 
-        if not self.new_member(member) and raidmode['action'] in [1, 2]:
+        wave = self.raids.record(member, unix_time())  # every join counts towards the join rate, not only the offenders
+
+        if not self.new_member(member) and policy.raidmode['action'] in [1, 2]:
             return
 
-        users_whitelist = cm.get(self.bot, 'users_whitelist', member.guild.id)
-        if users_whitelist and member.id in users_whitelist:
+        if member.id in policy.users_whitelist:
             return
 
+        if wave:
+            return self.add_to_wave(member, policy)
+
         for coro in self.raidmode.copy():
             if await coro(self, member):  # type: ignore
                 break
 
-    async def anti_spam(self, message):
+    async def anti_spam(self, message, result, policy):
         current = message.created_at.timestamp()
         reason = _("Spam (sending multiple messages in a short time span)")
-        antispam = cm.get(self.bot, 'spam', message.guild.id)
+        antispam = policy.spam
 
         if not antispam:
             return
 
         if self.new_member(message.author):
-            content_bucket = self.new_users.get_bucket(message)
-            if content_bucket.update_rate_limit(current):
-                content_bucket.reset()
+            if self.new_users.hit(message, current):
+                self.new_users.reset(message)
                 return await self.execute_punishment(antispam['level'], message, reason, btime.FutureTime(antispam['time']))
 
-        content_bucket = self.messages_cooldown.get_bucket(message)
-        if content_bucket.update_rate_limit(current):
-            content_bucket.reset()
+        if self.messages_cooldown.hit(message, current):
+            self.messages_cooldown.reset(message)
+            return await self.execute_punishment(antispam['level'], message, reason, btime.FutureTime(antispam['time']))
+
+        flood = self.near_duplicates.check(message, current, self.new_member(message.author))
+        if flood:
+            if flood == 'guild':
+                reason = _("Spam (multiple accounts sending the same message)")
             return await self.execute_punishment(antispam['level'], message, reason, btime.FutureTime(antispam['time']))
 
-        user_bucket = self.user_cooldowns.get_bucket(message)
-        if user_bucket.update_rate_limit(current):
-            user_bucket.reset()
+        if self.user_cooldowns.hit(message, current):
+            self.user_cooldowns.reset(message)
             return await self.execute_punishment(antispam['level'], message, reason, btime.FutureTime(antispam['time']))
 
-    async def anti_invite(self, message):
-        invites = INVITE.findall(message.content)
+    async def anti_invite(self, message, result, policy):
+        invites = result.invites
         current = message.created_at.timestamp()
         reason = _('Advertising')
-        automod = cm.get(self.bot, 'automod', message.guild.id)
-        antiinvite = cm.get(self.bot, 'invites', message.guild.id)
+        antiinvite = policy.invites
 
         if invites and antiinvite:
-            content_bucket = self.invite_cooldown.get_bucket(message)
             the_invite = invites[0]
             try:
-                invite = await self.bot.fetch_invite(the_invite)
-                if invite.guild.id == message.guild.id and len(invites) == 1:
+                await self.invites.seed(message.guild)
+                guild_id = await self.invites.resolve(the_invite)  # cached, so invite spam doesn't turn into a REST flood
+                if guild_id is None or guild_id == message.guild.id and len(invites) == 1:
                     return
-                if automod['delete_messages'] and message.channel.permissions_for(message.guild.me).manage_messages:
+                if policy.delete_messages and message.channel.permissions_for(message.guild.me).manage_messages:
                     await message.delete()
             except Exception:
                 return
 
-            retry = content_bucket.update_rate_limit(current)
-            if retry:
-                content_bucket.reset()
+            if self.invite_cooldown.hit(message, current):
+                self.invite_cooldown.reset(message)
                 await self.execute_punishment(antiinvite['level'], message, reason, btime.FutureTime(antiinvite['time']))
 
-    async def anti_caps(self, message):
-        cap = CAPS.findall(message.content)
+    async def anti_caps(self, message, result, policy):
         current = message.created_at.timestamp()
         reason = _('Spamming caps')
-        automod = cm.get(self.bot, 'automod', message.guild.id)
-        masscaps = cm.get(self.bot, 'masscaps', message.guild.id)
+        masscaps = policy.masscaps
 
         if not masscaps:
             return
 
         perc = masscaps['percentage'] / 100
 
-        if len(cap) >= len(message.content) * perc and len(message.content) > 10:
-            content_bucket = self.caps_content.get_bucket(message)
-            retry = content_bucket.update_rate_limit(current)
-            if automod['delete_messages'] and message.channel.permissions_for(message.guild.me).manage_messages:
+        if result.caps >= result.length * perc and result.length > 10:
+            retry = self.caps_content.hit(message, current)
+            if policy.delete_messages and message.channel.permissions_for(message.guild.me).manage_messages:
                 await message.delete()
 
             if retry:
-                content_bucket.reset()
+                self.caps_content.reset(message)
                 await self.execute_punishment(masscaps['level'], message, reason, btime.FutureTime(masscaps['time']))
 
-    async def anti_links(self, message):
-        link = LINKS.findall(message.content)
-        invites = INVITE.search(message.content)
+    async def anti_links(self, message, result, policy):
+        link = result.links
+        invites = result.invites
         current = message.created_at.timestamp()
         reason = _('Spamming links')
-        automod = cm.get(self.bot, 'automod', message.guild.id)
-        antilinks = cm.get(self.bot, 'links', message.guild.id)
+        antilinks = policy.links
 
         if not antilinks:
             return
@@ -287,33 +258,30 @@ class AutomodEvents(commands.Cog, name='AutomodEvents'):
             return
 
         if link:
-            content_bucket = self.link_cooldown.get_bucket(message)
-            retry = content_bucket.update_rate_limit(current)
-            if automod['delete_messages'] and message.channel.permissions_for(message.guild.me).manage_messages:
+            retry = self.link_cooldown.hit(message, current)
+            if policy.delete_messages and message.channel.permissions_for(message.guild.me).manage_messages:
                 await message.delete(silent=True)
 
             if retry:
-                content_bucket.reset()
+                self.link_cooldown.reset(message)
                 await self.execute_punishment(antilinks['level'], message, reason, btime.FutureTime(antilinks['time']))
 
-    async def anti_mentions(self, message):
+    async def anti_mentions(self, message, result, policy):
         reason = _('Spamming mentions')
-        automod = cm.get(self.bot, 'automod', message.guild.id)
-        massmention = cm.get(self.bot, 'massmention', message.guild.id)
+        massmention = policy.massmention
 
         if not massmention:
             return
 
         limit = massmention['limit']
-        mentions = sum(not x.bot and x.id != message.author.id for x in message.mentions)
-        if mentions >= limit:
-            if automod['delete_messages'] and message.channel.permissions_for(message.guild.me).manage_messages:
+        if result.mentions >= limit:
+            if policy.delete_messages and message.channel.permissions_for(message.guild.me).manage_messages:
                 await message.delete()
 
             await self.execute_punishment(massmention['level'], message, reason, btime.FutureTime(massmention['time']))
 
     async def anti_raid(self, member):
-        raidmode = cm.get(self.bot, 'raidmode', member.guild.id)
+        raidmode = get_policy(self.bot, member.guild.id).raidmode
 
         if not raidmode:
             return
@@ -329,21 +297,85 @@ class AutomodEvents(commands.Cog, name='AutomodEvents'):
             action = 9
         await self.execute_punishment(action, member, reason)
 
-    async def anti_phishing(self, message):  # this cannot be toggled off if automod is enabled in the server (it is not grouped under anti link or anti invites)
-        current = message.created_at.timestamp()
+    def add_to_wave(self, member, policy):
+        wave = self.raids.waves.get(member.guild.id)
+        if wave is None:
+            wave = self.raids.waves[member.guild.id] = RaidWave(member.guild.id, policy.raidmode['action'], policy.raidmode['channel'], unix_time())
+            wave.task = self.bot.loop.create_task(self.punish_wave(member.guild, wave))
+        wave.histogram[age_bucket(member, unix_time())] += 1
+        wave.queue.put_nowait(member)
+
+    async def punish_wave(self, guild, wave):
+        # one raider at a time, slowing down when discord starts rate limiting us
+        reason = _("Automod Action | {0}").format(_("anti raid: raid wave detected"))
+        delay = 0.5
+        try:
+            while True:
+                try:
+                    member = await asyncio.wait_for(wave.queue.get(), timeout=self.raids.quiet)
+                except asyncio.TimeoutError:
+                    break  # no one joined in a while, wave is over
+
+                ban = wave.action in [2, 4]
+                if not ban:
+                    self.bot.join_counter.update({member.id})
+                    if self.bot.join_counter[member.id] >= 5:  # keeps rejoining
+                        del self.bot.join_counter[member.id]
+                        ban = True
+                try:
+                    if ban:
+                        await guild.ban(member, reason=reason)
+                    else:
+                        await guild.kick(member, reason=reason)
+                except discord.HTTPException as e:
+                    if e.status == 429:
+                        delay = min(delay * 2, 10.0)
+                        wave.queue.put_nowait(member)
+                    else:
+                        wave.failed += 1
+                else:
+                    (wave.banned if ban else wave.kicked).append(member.id)
+                    delay = max(delay * 0.9, 0.5)
+                await asyncio.sleep(delay)
+        finally:
+            self.raids.waves.pop(guild.id, None)
+            await self.log_wave(guild, wave)
+
+    async def log_wave(self, guild, wave):
+        if not len(wave) and not wave.failed:
+            return
+
+        self.bot.automod_counter.update({guild.id: len(wave)})
+        await logging.new_log(self.bot, unix_time(), 8, len(wave))
+        for member_id in wave.kicked:
+            if self.bot.join_counter[member_id] <= 2:
+                del self.bot.join_counter[member_id]
+
+        logchannel = guild.get_channel(wave.channel_id)
+        if not logchannel:
+            return
+
+        emoji = self.bot.settings['emojis']['logs']['ban']
+        embed = discord.Embed(color=self.bot.settings['colors']['ban_color'], timestamp=datetime.now(timezone.utc))
+        embed.set_author(name=_("Automod Action"), icon_url=guild.icon.url if guild.icon else None)
+        embed.title = f"{emoji} {_('Raid Wave')}"
+        embed.description = _("**Kicked:** {0}\n**Banned:** {1}\n**Failed:** {2}\n**Duration:** {3}").format(
+            len(wave.kicked), len(wave.banned), wave.failed, btime.human_timedelta(datetime.fromtimestamp(wave.started, timezone.utc), suffix=None))
+        embed.add_field(name=_("Account age"), value='\n'.join(f"`{label}`: {count}" for label, count in zip(AGE_LABELS, wave.histogram) if count) or '-')
+        members = '\n'.join([f"kicked {member_id}" for member_id in wave.kicked] + [f"banned {member_id}" for member_id in wave.banned])
+        file = discord.File(io.BytesIO(members.encode('utf8')), filename='raid.txt') if members else None
+        with suppress(Exception):
+            await logchannel.send(embed=embed, file=file)
+
+    async def anti_phishing(self, message, result, policy):  # this cannot be toggled off if automod is enabled in the server (it is not grouped under anti link or anti invites)
         reason = _("Sending malicious links")
-        phishing_links = PHISHING.search(message.content)
+        phishing_links = result.domains
 
         if phishing_links:
-            agent = {"User-Agent": f"Dredd ({self.bot.website})"}
-            body = {"message": f"{phishing_links}"}
-            validation = await self.bot.session.post(self.bot.config.PHISHING, headers=agent, json=body)  # The API is private. Credits: Fish Project
-            if 500 % (validation.status + 1) == 500:  # service is down
-                return
-            result = await validation.json()
-            if result.get("match") is False:
+            # local index first, the remote api (private, credits: Fish Project) is only asked about unknown domains
+            if not await self.phishing.check(self.bot.session, phishing_links, f"Dredd ({self.bot.website})"):
                 return
-            
+
             await message.delete()  # delete the message
             await self.execute_punishment(4, message, reason)  # ban
 
@@ -373,11 +405,11 @@ class AutomodEvents(commands.Cog, name='AutomodEvents'):
         return embed
 
     async def execute_punishment(self, action, message, reason, time=None):  # sourcery no-metrics
-        automod = cm.get(self.bot, 'automod', message.guild.id)
-        logchannel = message.guild.get_channel(automod['channel'])
+        policy = get_policy(self.bot, message.guild.id)
+        logchannel = message.guild.get_channel(policy.channel)
         muterole = await default.get_muterole(self, message.guild)
         audit_reason = _("Automod Action | {0}").format(reason)
-        anti_raid = cm.get(self.bot, 'raidmode', message.guild.id)
+        anti_raid = policy.raidmode
         error_msg = _("{0} Something failed while punishing the member, sent the error to my developers. "
                       "This is most likely due to me either missing permissions or not being able to access the person and/or role").format(self.bot.settings['emojis']['misc']['warn'])
         await logging.new_log(self.bot, unix_time(), 8, 1)
@@ -390,7 +422,7 @@ class AutomodEvents(commands.Cog, name='AutomodEvents'):
                     if muterole and muterole not in message.author.roles and muterole.position < message.guild.me.top_role.position:
                         await message.author.add_roles(muterole, reason=audit_reason)
                         await default.execute_temporary(self, 1, message.author, message.guild.me, message.guild, muterole, None, reason)
-                        self.batch_messages[(message.guild.id, message.channel.id)].append(_("{0} Muted **{1}** for {2}.").format(self.bot.settings['emojis']['logs']['memberedit'], message.author, reason))
+                        self.bot.log_sink.send(message.channel, _("{0} Muted **{1}** for {2}.").format(self.bot.settings['emojis']['logs']['memberedit'], message.author, reason))
                     elif not muterole:
                         if not message.author.permissions_in(message.channel).send_messages:
                             return
@@ -411,7 +443,7 @@ class AutomodEvents(commands.Cog, name='AutomodEvents'):
                         await message.author.add_roles(muterole, reason=audit_reason)
                         await default.execute_temporary(self, 1, message.author, message.guild.me, message.guild, muterole, time, reason)
                         time = btime.human_timedelta(time.dt, source=message.created_at, suffix=None)
-                        self.batch_messages[(message.guild.id, message.channel.id)].append(_("{0} Muted **{1}** for {2}, reason: {3}.").format(self.bot.settings['emojis']['logs']['memberedit'], message.author, time, reason))
+                        self.bot.log_sink.send(message.channel, _("{0} Muted **{1}** for {2}, reason: {3}.").format(self.bot.settings['emojis']['logs']['memberedit'], message.author, time, reason))
                     elif not muterole:
                         if not message.author.permissions_in(message.channel).send_messages:
                             return
@@ -431,7 +463,7 @@ class AutomodEvents(commands.Cog, name='AutomodEvents'):
                 try:
                     if message.author.top_role.position < message.guild.me.top_role.position:
                         await message.guild.kick(message.author, reason=audit_reason)
-                        self.batch_messages[(message.guild.id, message.channel.id)].append(_("{0} Kicked **{1}** for {2}.").format(self.bot.settings['emojis']['logs']['memberedit'], message.author, reason))
+                        self.bot.log_sink.send(message.channel, _("{0} Kicked **{1}** for {2}.").format(self.bot.settings['emojis']['logs']['memberedit'], message.author, reason))
                     else:
                         await self.update_channel_permissions(message, action)
                     time = None
@@ -445,7 +477,7 @@ class AutomodEvents(commands.Cog, name='AutomodEvents'):
                     if message.author.top_role.position < message.guild.me.top_role.position:
                         await message.guild.ban(message.author, reason=audit_reason)
                         await default.execute_temporary(self, 2, message.author, message.guild.me, message.guild, None, None, reason)
-                        self.batch_messages[(message.guild.id, message.channel.id)].append(_("{0} Banned **{1}** for {2}.").format(self.bot.settings['emojis']['logs']['ban'], message.author, reason))
+                        self.bot.log_sink.send(message.channel, _("{0} Banned **{1}** for {2}.").format(self.bot.settings['emojis']['logs']['ban'], message.author, reason))
                     else:
                         await self.update_channel_permissions(message, action)
                     time = None
@@ -460,7 +492,7 @@ class AutomodEvents(commands.Cog, name='AutomodEvents'):
                         await message.guild.ban(message.author, reason=audit_reason)
                         await default.execute_temporary(self, 2, message.author, message.guild.me, message.guild, None, time, reason)
                         time = btime.human_timedelta(time.dt, source=message.created_at, suffix=None)
-                        self.batch_messages[(message.guild.id, message.channel.id)].append(_("{0} Banned **{1}** for {2}, reason: {3}.").format(self.bot.settings['emojis']['logs']['ban'], message.author, time, reason))
+                        self.bot.log_sink.send(message.channel, _("{0} Banned **{1}** for {2}, reason: {3}.").format(self.bot.settings['emojis']['logs']['ban'], message.author, time, reason))
                     else:
                         time = None
                         await self.update_channel_permissions(message, action)
@@ -558,7 +590,6 @@ class AutomodEvents(commands.Cog, name='AutomodEvents'):
                                              self.bot.settings['emojis']['misc']['warn']
                                          ))
 
-    automodactions = [anti_links, anti_invite, anti_caps, anti_spam, anti_mentions, anti_phishing]
     raidmode = [anti_raid]
 
 
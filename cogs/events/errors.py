@@ -62,8 +62,7 @@ class CommandError(commands.Cog, name="CommandError",
                 await global_cooldown(ctx=ctx)
 
         if ctx.guild:
-            if ctx.guild.chunked is False:
-                await ctx.guild.chunk(cache=True)
+            self.bot.chunker.bump(ctx.guild)  # active guilds are chunked first, commands don't wait for it
             printRAW(f"{datetime.now().__format__('%a %d %b %y, %H:%M')} - {ctx.guild.name} | {ctx.author}"
                      f"> {ctx.message.clean_content}")
             dredd_commands.info(f"{datetime.now().__format__('%a %d %b %y, %H:%M')} - {ctx.guild.name} | {ctx.author}"
@@ -85,38 +84,7 @@ class CommandError(commands.Cog, name="CommandError",
 
     @commands.Cog.listener()
     async def on_command_completion(self, ctx):
-        if ctx.command.parent:
-            cmd = f'{ctx.command.parent} {ctx.command.name}'
-        else:
-            cmd = ctx.command.name
-
-        query = """
-                    INSERT INTO command_logs VALUES($1, $2, $3, $4)
-                    ON CONFLICT (user_id, guild_id, command) DO UPDATE
-                    SET usage = command_logs.usage + 1
-                    WHERE command_logs.user_id = $5
-                    AND command_logs.guild_id = $6
-                    AND command_logs.command = $7
-                """
-
-        guild = ctx.guild.id if ctx.guild else ctx.channel.id
-        await self.bot.db.execute(query, ctx.author.id, guild, str(cmd), 1, ctx.author.id, guild, str(cmd))
-
-        if cmd not in self.bot.cmdUsage:
-            self.bot.cmdUsage[cmd] = 1
-        else:
-            self.bot.cmdUsage[cmd] += 1
-
-        if str(ctx.author.id) not in self.bot.cmdUsers:
-            self.bot.cmdUsers[str(ctx.author.id)] = 1
-        else:
-            self.bot.cmdUsers[str(ctx.author.id)] += 1
-
-        if ctx.guild:
-            if str(ctx.guild.id) not in self.bot.guildUsage:
-                self.bot.guildUsage[str(ctx.guild.id)] = 1
-            else:
-                self.bot.guildUsage[str(ctx.guild.id)] += 1
+        self.bot.command_usage.add(ctx)  # written to command_logs in batches
 
     @commands.Cog.listener()
     async def on_command_error(self, ctx, exc):  # sourcery no-metrics
@@ -15,21 +15,19 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import discord
 import asyncio
-import re
 import logging as log
 
 from discord.ext import commands
 
 from time import time
 from db.cache import CacheManager as CM
-from utils import btime, checks, default, logger as logging, components
+from utils import btime, checks, default, logger as logging, components, pipeline
+from utils.scanner import INVITE, LINKS
 from datetime import datetime, timedelta, timezone
 from contextlib import suppress
 
 dredd_logger = log.getLogger("dredd")
 
-LINKS = re.compile(r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*(),]|%[0-9a-fA-F][0-9a-fA-F])+")
-INVITE = re.compile(r'discord(?:\.com/invite|app\.com/invite|\.gg)/?([a-zA-Z0-9\-]{2,32})')
 
 
 class Events(commands.Cog):
@@ -42,6 +40,13 @@ class Events(commands.Cog):
         self.cooldown_bot_mentions = commands.CooldownMapping.from_cooldown(1, 10.0, commands.BucketType.channel)
         self.cooldown_afk_mentions = commands.CooldownMapping.from_cooldown(5, 10.0, commands.BucketType.channel)
 
+        bot.pipeline.add_stage('afk', self.afk_status, pipeline.AFK)
+        bot.pipeline.add_stage('events', self.message_events, pipeline.EVENTS)
+
+    def cog_unload(self):
+        self.bot.pipeline.remove_stage('afk')
+        self.bot.pipeline.remove_stage('events')
+
     async def bot_check(self, ctx):
         if await ctx.bot.is_admin(ctx.author):
             return True
@@ -89,16 +94,13 @@ class Events(commands.Cog):
             dredd_logger.info("[BOT] Successfully added reaction roles view.")
             self.persistent_views_added = True
 
+        self.bot.chunker.schedule_all(self.bot.guilds)
         support_guild = self.bot.get_guild(self.bot.settings['servers']['main'])
-        await support_guild.chunk(cache=True)
+        await self.bot.chunker.wait(support_guild)
         print(f"{support_guild} chunked")
 
-    @commands.Cog.listener()
-    async def on_message(self, message):  # sourcery no-metrics
-        if message.author.bot:
-            return
-
-        ctx = await self.bot.get_context(message)
+    async def message_events(self, ctx):  # sourcery no-metrics
+        message = ctx.message
         if not ctx.valid:
             await logging.new_log(self.bot, time(), 9, 1)
 
@@ -236,7 +238,9 @@ class Events(commands.Cog):
                             return
 
             guild = self.bot.get_guild(payload.guild_id)
-            member = guild.get_member(payload.user_id)
+            member = next(iter(await self.bot.chunker.members(guild, [payload.user_id])), None)
+            if member is None:
+                return
 
             for item in check['dict']:
                 if str(payload.emoji) == item:
@@ -320,7 +324,7 @@ class Events(commands.Cog):
                 await to_send.send(msg)
             except Exception:
                 pass
-        # await guild.chunk(cache=True)
+        self.bot.chunker.schedule(guild)
         bots = len(guild.bots)
         tch = len(guild.text_channels)
         vch = len(guild.voice_channels)
@@ -368,6 +372,8 @@ class Events(commands.Cog):
         if guild.name is None:
             return
 
+        self.bot.prefixes.invalidate_guild(guild.id)
+        self.bot.message_store.remove_guild(guild.id)
         await asyncio.sleep(3)
 
         check = CM.get(self.bot, 'blacklist', guild.id)
@@ -438,26 +444,6 @@ class Events(commands.Cog):
                 await msg.reply(f"{moksej.mention} failed to insert data into automatic 30 days timer\n`{err}`", allowed_mentions=all_mentions)
 
     # other events
-    @commands.Cog.listener('on_message')
-    async def on_del_add(self, message):
-        return
-        # await self.bot.wait_until_ready()
-        #
-        # if message.channel.id == 603800402013585408 and message.author.id == 568254611354419211:
-        #     e = discord.Embed(color=self.bot.settings['colors']['embed_color'], timestamp=datetime.now(timezone.utc))
-        #     if 'added bot' in message.content.lower():
-        #         e.title = 'New bot added!'
-        #         e.description = message.content
-        #         e.add_field(name='Jump to original', value=f"[Jump]({message.jump_url})")
-        #         mok = self.bot.get_user(345457928972533773)
-        #         return await mok.send(embed=e)
-        #     elif 'resubmitted bot' in message.content.lower():
-        #         e.title = 'Bot resubmitted!'
-        #         e.description = message.content
-        #         e.add_field(name='Jump to original', value=f"[Jump]({message.jump_url})")
-        #         mok = self.bot.get_user(345457928972533773)
-        #         return await mok.send(embed=e)
-
     @commands.Cog.listener('on_member_update')
     async def nicknames_logging(self, before, after):
         await self.bot.wait_until_ready()
@@ -471,13 +457,8 @@ class Events(commands.Cog):
             nick = before.nick or before.name
             await self.bot.db.execute("INSERT INTO nicknames(user_id, guild_id, nickname, time) VALUES($1, $2, $3, $4)", after.id, after.guild.id, nick, datetime.now())
 
-    @commands.Cog.listener('on_message')
-    async def afk_status(self, message):
-        await self.bot.wait_until_ready()
-
-        if message.author.bot:
-            return
-
+    async def afk_status(self, ctx):
+        message = ctx.message
         if not message.guild:
             return
 
@@ -522,20 +503,20 @@ class Events(commands.Cog):
                     except Exception:
                         return
 
-    @commands.Cog.listener('on_message_delete')
+    @commands.Cog.listener('on_stored_message_delete')
     async def snipes_logging(self, message):
         await self.bot.wait_until_ready()
 
-        if CM.get(self.bot, 'snipes_op', message.author.id):
-            return
-
-        if not message.guild:
+        if CM.get(self.bot, 'snipes_op', message.author_id):
             return
 
-        if message.stickers:
-            message.content += _("\n*Sticker* - {0}").format(message.stickers[0].name)
+        channel = self.bot.get_channel(message.channel_id)
+        content = message.content
+        if message.sticker:
+            content += _("\n*Sticker* - {0}").format(message.sticker[0])
 
-        self.bot.snipes[message.channel.id] = {'message': message.content, 'deleted_at': discord.utils.utcnow(), 'author': message.author.id, 'nsfw': message.channel.is_nsfw()}
+        nsfw = channel.is_nsfw() if channel is not None and hasattr(channel, 'is_nsfw') else False
+        self.bot.snipes[message.channel_id] = {'message': content, 'deleted_at': discord.utils.utcnow(), 'author': message.author_id, 'nsfw': nsfw}
 
     @commands.Cog.listener('on_raw_message_delete')
     async def reaction_roles_delete(self, payload):
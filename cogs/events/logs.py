@@ -23,7 +23,7 @@ from datetime import datetime, timezone
 
 from time import time
 from utils import logger as logging
-from utils import btime, default, publicflags
+from utils import btime, cases, default, publicflags
 from db.cache import CacheManager as CM
 from contextlib import suppress
 
@@ -48,16 +48,6 @@ class Logging(commands.Cog):
                 emb_dict[thing] = emb_dict[thing].replace("{1}", str(member.guild.member_count))
         return emb_dict
 
-    async def insert_new_case(self, mod_id, channel, case_num, user_id, guild_id, action, reason):
-        query1 = 'INSERT INTO modlog(mod_id, channel_id, case_num, message_id, user_id, guild_id, action, reason) VALUES($1, $2, $3, $4, $5, $6, $7, $8)'
-        await self.bot.db.execute(query1, mod_id, channel, case_num or 1, None, user_id, guild_id, action, reason)
-
-    async def update_old_case(self, message_id, guild_id, case_num):
-        await self.bot.db.execute("UPDATE modlog SET message_id = $1 WHERE guild_id = $2 AND case_num = $3", message_id, guild_id, case_num or 1)
-        await self.bot.db.execute("UPDATE modlog SET case_num = $1 WHERE guild_id = $2 AND message_id = $3", case_num or 1, guild_id, message_id)
-        await self.bot.db.execute("UPDATE cases SET case_num = $1 + 1 WHERE guild_id = $2", case_num or 1, guild_id)
-        self.bot.case_num[guild_id] += 1
-
     @commands.Cog.listener()
     async def on_member_join(self, member):
         if not self.bot.is_ready():
@@ -77,92 +67,91 @@ class Logging(commands.Cog):
         self.bot.dispatch('member_kick', member.guild, member)
 
     @commands.Cog.listener()
-    async def on_message_edit(self, before, after):
-        if not before.guild or not self.bot.is_ready():
+    async def on_stored_message_edit(self, before, after):
+        # before and after are StoredMessage records, see utils/messagestore.py
+        if not self.bot.is_ready() or before.bot:
             return
 
-        message_edits = CM.get(self.bot, 'messageedits', before.guild.id)
+        message_edits = CM.get(self.bot, 'messageedits', before.guild_id)
 
         if not message_edits:
             return
 
-        if before.author.bot:
+        guild = self.bot.get_guild(before.guild_id)
+        if guild is None:
+            return
+        author = guild.get_member(before.author_id) or self.bot.get_user(before.author_id)
+        channel = guild.get_channel_or_thread(before.channel_id)
+        if author is None or channel is None:
             return
 
-        if before.content != after.content:
-            ctx = await self.bot.get_context(before)
-            ctx2 = await self.bot.get_context(after)
-            if ctx.valid and ctx2.valid:
-                return
-
-            editlog_channel = before.guild.get_channel(message_edits)
-            editlog_embed = discord.Embed(color=self.bot.settings['colors']['update_color'], timestamp=datetime.now(timezone.utc))
-            editlog_embed.title = _("{0} Message Edited").format(self.bot.settings['emojis']['logs']['msgedit'])
-            editlog_embed.description = _("**User:** {0} `{1}`\n**Channel:** {2} `#{3}`\n[Jump to message]({4})").format(before.author.mention, before.author,
-                                                                                                                         before.channel.mention, before.channel.name,
-                                                                                                                         before.jump_url)
-
-            if before.content:
-                editlog_embed.add_field(name=_("**Before:**"),
-                                        value=before.content[:1000] + '...' if len(before.content) > 1000 else before.content,
-                                        inline=False)
-            elif before.attachments != []:
-                editlog_embed.add_field(name=_("**Before:**"),
-                                        value=before.attachments[0].url,
-                                        inline=False)
-
-            editlog_embed.add_field(name=_("**After:**"),
-                                    value=after.content[:1000] + '...' if len(after.content) > 1000 else after.content)
-            editlog_embed.set_footer(text=_("User ID: {0}").format(after.author.id))
+        editlog_channel = guild.get_channel(message_edits)
+        editlog_embed = discord.Embed(color=self.bot.settings['colors']['update_color'], timestamp=datetime.now(timezone.utc))
+        editlog_embed.title = _("{0} Message Edited").format(self.bot.settings['emojis']['logs']['msgedit'])
+        editlog_embed.description = _("**User:** {0} `{1}`\n**Channel:** {2} `#{3}`\n[Jump to message]({4})").format(author.mention, author,
+                                                                                                                     channel.mention, channel.name,
+                                                                                                                     before.jump_url)
+
+        if before.content:
+            editlog_embed.add_field(name=_("**Before:**"),
+                                    value=before.content[:1000] + '...' if len(before.content) > 1000 else before.content,
+                                    inline=False)
+        elif before.attachments:
+            editlog_embed.add_field(name=_("**Before:**"),
+                                    value=before.attachments[0],
+                                    inline=False)
+
+        editlog_embed.add_field(name=_("**After:**"),
+                                value=after.content[:1000] + '...' if len(after.content) > 1000 else after.content)
+        editlog_embed.set_footer(text=_("User ID: {0}").format(after.author_id))
 
-            try:
-                await editlog_channel.send(embed=editlog_embed)
-                await logging.new_log(self.bot, time(), 7, 1)
-            except Exception as e:
-                await default.background_error(self, '`message edit`', e, before.guild, editlog_channel)
+        try:
+            self.bot.log_sink.send(editlog_channel, embed=editlog_embed, event='`message edit`')
+            await logging.new_log(self.bot, time(), 7, 1)
+        except Exception as e:
+            await default.background_error(self, '`message edit`', e, guild, editlog_channel)
 
     @commands.Cog.listener()
-    async def on_message_delete(self, message):
-        if not message.guild or not self.bot.is_ready():
+    async def on_stored_message_delete(self, message):
+        if not self.bot.is_ready() or message.bot:
             return
 
-        message_deletes = CM.get(self.bot, 'messagedeletes', message.guild.id)
+        message_deletes = CM.get(self.bot, 'messagedeletes', message.guild_id)
 
         if not message_deletes:
             return
 
-        if message.author.bot or message.author not in message.guild.members:
+        guild = self.bot.get_guild(message.guild_id)
+        if guild is None:
             return
-
-        ctx = await self.bot.get_context(message)
-        if ctx.valid:
+        author = guild.get_member(message.author_id)
+        channel = guild.get_channel_or_thread(message.channel_id)
+        if author is None or channel is None:
             return
 
-        deletelog_channel = message.guild.get_channel(message_deletes)
+        deletelog_channel = guild.get_channel(message_deletes)
         deletelog_embed = discord.Embed(color=self.bot.settings['colors']['deny_color'], timestamp=datetime.now(timezone.utc))
         deletelog_embed.title = _("{0} Message Deleted").format(self.bot.settings['emojis']['logs']['msgdelete'])
-        deletelog_embed.description = _("**User:** {0} `{1}`\n**Channel:** {2} `#{3}`").format(message.author.mention, message.author,
-                                                                                               message.channel.mention, message.channel.name)
-        if message.content and message.stickers != []:
-            message.content = message.content[:-len(_("\n*Sticker* - {0}").format(message.stickers[0].name))]
+        deletelog_embed.description = _("**User:** {0} `{1}`\n**Channel:** {2} `#{3}`").format(author.mention, author,
+                                                                                               channel.mention, channel.name)
 
         if message.content:
             deletelog_embed.add_field(name=_("**Message:**"),
                                       value=message.content[:1000] + '...' if len(message.content) > 1000 else message.content,
                                       inline=False)
-        if message.attachments != []:
+        if message.attachments:
             deletelog_embed.add_field(name=_("**Attachments:**"),
-                                      value=message.attachments[0].url)
-        if message.stickers != []:
+                                      value=message.attachments[0])
+        if message.sticker:
             deletelog_embed.add_field(name=_("**Sticker:**"),
-                                      value=f"{message.stickers[0].name} - `{message.stickers[0].description}`")
-        deletelog_embed.set_footer(text=_("User ID: {0}").format(message.author.id))
+                                      value=f"{message.sticker[0]} - `{message.sticker[1]}`")
+        deletelog_embed.set_footer(text=_("User ID: {0}").format(message.author_id))
 
         try:
-            await deletelog_channel.send(embed=deletelog_embed)
+            self.bot.log_sink.send(deletelog_channel, embed=deletelog_embed, event='`message delete`')
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
-            await default.background_error(self, '`message delete`', e, message.guild, deletelog_channel)
+            await default.background_error(self, '`message delete`', e, guild, deletelog_channel)
 
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
@@ -185,7 +174,7 @@ class Logging(commands.Cog):
             nick_embed.set_footer(text=_("User ID: {0}").format(before.id))
 
             try:
-                await nick_channel.send(embed=nick_embed)
+                self.bot.log_sink.send(nick_channel, embed=nick_embed, event='`member update`')
                 await logging.new_log(self.bot, time(), 7, 1)
             except Exception as e:
                 await default.background_error(self, '`member update`', e, before.guild, nick_channel)
@@ -229,7 +218,7 @@ class Logging(commands.Cog):
                     updateavatar_embed.set_thumbnail(url=after.avatar.url if after.avatar else after.display_avatar.url)
                     updateavatar_embed.set_footer(text=_("User ID: {0}").format(before.id))
                     try:
-                        await updateavatar_channel.send(embed=updateavatar_embed)
+                        self.bot.log_sink.send(updateavatar_channel, embed=updateavatar_embed, event='`user update (avatar update)`')
                         await logging.new_log(self.bot, time(), 7, 1)
                     except Exception as e:
                         await default.background_error(self, '`user update (avatar update)`', e, guild, updateavatar_channel)
@@ -242,7 +231,7 @@ class Logging(commands.Cog):
                     updateuser_embed.description = _("**Member:** {0} `{1}`\n**Before:** {2}\n**After:** {3}").format(after.mention, after, escape_markdown(before.name), escape_markdown(after.name))
                     updateuser_embed.set_footer(text=_("User ID: {0}").format(before.id))
                     try:
-                        await updateuser_channel.send(embed=updateuser_embed)
+                        self.bot.log_sink.send(updateuser_channel, embed=updateuser_embed, event='`user update (username update)`')
                         await logging.new_log(self.bot, time(), 7, 1)
                     except Exception as e:
                         await default.background_error(self, '`user update (username update)`', e, guild, updateuser_channel)
@@ -251,7 +240,6 @@ class Logging(commands.Cog):
     async def on_member_ban(self, guild, user):
         await asyncio.sleep(1)
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation or not self.bot.is_ready():
             return
         if not guild.me.guild_permissions.view_audit_log:
@@ -267,22 +255,18 @@ class Logging(commands.Cog):
         reason = reason if reason != "None" else "No reason"
 
         log_channel = self.bot.get_channel(moderation)
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
-        await self.insert_new_case(mod.id, log_channel.id, case, user.id, guild.id, 1, reason)
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [user.id], 1, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['ban_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} A member has been banned").format(self.bot.settings['emojis']['logs']['ban'])
         the_user = f"{user} ({user.id})"
         embed.description = _("**Member:** {0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format(the_user, mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`ban members`', e, guild, log_channel)
@@ -291,7 +275,6 @@ class Logging(commands.Cog):
     async def on_member_unban(self, guild, user):
         await asyncio.sleep(1)
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation or not self.bot.is_ready():
             return
         if not guild.me.guild_permissions.view_audit_log:
@@ -307,22 +290,18 @@ class Logging(commands.Cog):
         reason = reason if reason != "None" else "No reason"
 
         log_channel = self.bot.get_channel(moderation)
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
-        await self.insert_new_case(mod.id, log_channel.id, case, user.id, guild.id, 6, reason)
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [user.id], 6, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['approve_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} A member was un-banned").format(self.bot.settings['emojis']['logs']['unban'])
         the_user = f"{user} ({user.id})"
         embed.description = _("**Member:** {0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format(the_user, mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`unban members`', e, guild, log_channel)
@@ -342,7 +321,7 @@ class Logging(commands.Cog):
             embed.title += _(" Guild name changed")
             embed.description = _("**Before:** {0}\n**After:** {1}").format(before.name, after.name)
             try:
-                await channels.send(embed=embed)
+                self.bot.log_sink.send(channels, embed=embed, event='`guild name update`')
                 await logging.new_log(self.bot, time(), 7, 1)
             except Exception as e:
                 await default.background_error(self, '`guild name update`', e, before, channels)
@@ -352,7 +331,7 @@ class Logging(commands.Cog):
             embed.title += _(" Guild region changed")
             embed.description = _("**Before:** {0}\n**After:** {1}").format(before.region, after.region)
             try:
-                await channels.send(embed=embed)
+                self.bot.log_sink.send(channels, embed=embed, event='`guild region update`')
                 await logging.new_log(self.bot, time(), 7, 1)
             except Exception as e:
                 await default.background_error(self, '`guild region update`', e, before, channels)
@@ -362,7 +341,7 @@ class Logging(commands.Cog):
             embed.title += _(" Guild afk channel changed")
             embed.description = _("**Before:** {0}\n**After:** {1}").format(before.afk_channel, after.afk_channel)
             try:
-                await channels.send(embed=embed)
+                self.bot.log_sink.send(channels, embed=embed, event='`guild afk channel update`')
                 await logging.new_log(self.bot, time(), 7, 1)
             except Exception as e:
                 await default.background_error(self, '`guild afk channel update`', e, before, channels)
@@ -373,7 +352,7 @@ class Logging(commands.Cog):
             embed.description = _("**Before:** [Click here]({0})\n**After:** [Click here]({1})").format(before.icon.url, after.icon.url)
             embed.set_thumbnail(url=after.icon.url)
             try:
-                await channels.send(embed=embed)
+                self.bot.log_sink.send(channels, embed=embed, event='`guild icon update`')
                 await logging.new_log(self.bot, time(), 7, 1)
             except Exception as e:
                 await default.background_error(self, '`guild icon update`', e, before, channels)
@@ -383,7 +362,7 @@ class Logging(commands.Cog):
             embed.title += _(" Guild multifactor authentication (MFA) changed")
             embed.description = _("**Before:** {0}\n**After:** {1}").format(before.mfa_level, after.mfa_lever)
             try:
-                await channels.send(embed=embed)
+                self.bot.log_sink.send(channels, embed=embed, event='`guild MFA update`')
                 await logging.new_log(self.bot, time(), 7, 1)
             except Exception as e:
                 await default.background_error(self, '`guild MFA update`', e, before, channels)
@@ -393,7 +372,7 @@ class Logging(commands.Cog):
             embed.title += _(" Guild verification level changed")
             embed.description = _("**Before:** {0}\n**After:** {1}").format(before.verification_level, after.verification_level)
             try:
-                await channels.send(embed=embed)
+                self.bot.log_sink.send(channels, embed=embed, event='`guild verification update`')
                 await logging.new_log(self.bot, time(), 7, 1)
             except Exception as e:
                 await default.background_error(self, '`guild verification update`', e, before, channels)
@@ -403,7 +382,7 @@ class Logging(commands.Cog):
             embed.title += _(" Guild default notifications changed")
             embed.description = _("**Before:** {0}\n**After:** {1}").format(before.default_notifications, after.default_notifications)
             try:
-                await channels.send(embed=embed)
+                self.bot.log_sink.send(channels, embed=embed, event='`guild notifications update`')
                 await logging.new_log(self.bot, time(), 7, 1)
             except Exception as e:
                 await default.background_error(self, '`guild notifications update`', e, before, channels)
@@ -435,7 +414,7 @@ class Logging(commands.Cog):
                                           )
             joinlog_embed.set_footer(text=_("Member #{0}").format(member.guild.member_count))
             try:
-                await joinlog_channel.send(embed=joinlog_embed)
+                self.bot.log_sink.send(joinlog_channel, embed=joinlog_embed, event='`member joinlog`')
                 await logging.new_log(self.bot, time(), 7, 1)
             except Exception as e:
                 await default.background_error(self, '`member joinlog`', e, member.guild, joinlog_channel)
@@ -458,7 +437,7 @@ class Logging(commands.Cog):
                                           )
             joinlog_embed.set_footer(text=_("Members left: {0}").format(member.guild.member_count))
             try:
-                await joinlog_channel.send(embed=joinlog_embed)
+                self.bot.log_sink.send(joinlog_channel, embed=joinlog_embed, event='`member joinlog`')
                 await logging.new_log(self.bot, time(), 7, 1)
             except Exception as e:
                 await default.background_error(self, '`member joinlog`', e, member.guild, joinlog_channel)
@@ -612,7 +591,6 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_ban(self, guild, mod, members, duration, reason, created_at):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
@@ -620,13 +598,9 @@ class Logging(commands.Cog):
         reason = reason or "No reason"
 
         ban_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 1, reason)
         for num, member in enumerate(members, start=1):
             ban_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 1, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['ban_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
@@ -634,11 +608,11 @@ class Logging(commands.Cog):
         embed.description = _("**Member(s):**\n{0}{1}\n**Moderator:** {2} ({3})\n**Reason:** {4}").format("\n".join(ban_list),
                                                                                                           _("\n**Duration:** {0}").format(f"{times} {btime.discord_time_format(duration.dt, 'R')}") if times else '',
                                                                                                           mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`ban members (manual)`', e, guild, log_channel)
@@ -646,31 +620,26 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_hackban(self, guild, mod, members, reason):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
         reason = reason or "No reason"
 
         ban_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 1, reason)
         for num, member in enumerate(members, start=1):
             ban_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 1, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['ban_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} {1} Member(s) hack-banned").format(self.bot.settings['emojis']['logs']['ban'], len(members))
         embed.description = _("**Member(s):**\n{0}{1}\n**Moderator:** {2} ({3})\n**Reason:** {4}").format("\n".join(ban_list[:10]), '' if len(ban_list) <= 10 else f"\n**(+{len(ban_list) - 10}**)",
                                                                                                           mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`hackban members (manual)`', e, guild, log_channel)
@@ -678,31 +647,26 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_kick(self, guild, mod, members, reason):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
         reason = reason or "No reason"
 
         kick_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 2, reason)
         for num, member in enumerate(members, start=1):
             kick_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 2, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['kick_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} {1} Member(s) kicked").format(self.bot.settings['emojis']['logs']['memberleave'], len(members))
         embed.description = _("**Member(s):**\n{0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format("\n".join(kick_list),
                                                                                                        mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`kick members (manual)`', e, guild, log_channel)
@@ -710,31 +674,26 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_softban(self, guild, mod, members, reason):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
         reason = reason or "No reason"
 
         kick_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 3, reason)
         for num, member in enumerate(members, start=1):
             kick_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 3, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['kick_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} {1} Member(s) softbanned").format(self.bot.settings['emojis']['logs']['memberleave'], len(members))
         embed.description = _("**Member(s):**\n{0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format("\n".join(kick_list),
                                                                                                        mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`softban members (manual)`', e, guild, log_channel)
@@ -742,7 +701,6 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_mute(self, guild, mod, members, duration, reason, created_at):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
@@ -751,13 +709,9 @@ class Logging(commands.Cog):
         reason = reason or "No reason"
 
         ban_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 4, reason)
         for num, member in enumerate(members, start=1):
             ban_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 4, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['kick_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
@@ -765,11 +719,11 @@ class Logging(commands.Cog):
         embed.description = _("**Member(s):**\n{0}{1}\n**Moderator:** {2} ({3})\n**Reason:** {4}").format("\n".join(ban_list),
                                                                                                           _("\n**Duration:** {0}").format(f"{times} {btime.discord_time_format(duration.dt, 'R')}") if times else '',
                                                                                                           mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`mute members (manual)`', e, guild, log_channel)
@@ -777,7 +731,6 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_timeout(self, guild, mod, members, duration, reason, created_at):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
@@ -786,13 +739,9 @@ class Logging(commands.Cog):
         reason = reason or "No reason"
 
         ban_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 4, reason)
         for num, member in enumerate(members, start=1):
             ban_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 4, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['kick_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
@@ -800,11 +749,11 @@ class Logging(commands.Cog):
         embed.description = _("**Member(s):**\n{0}{1}\n**Moderator:** {2} ({3})\n**Reason:** {4}").format("\n".join(ban_list),
                                                                                                           _("\n**Duration:** {0}").format(f"{times} {btime.discord_time_format(duration.dt, 'R')}") if times else '',
                                                                                                           mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`timeout members`', e, guild, log_channel)
@@ -812,31 +761,26 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_warn(self, guild, mod, members, reason):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
         reason = reason or "No reason"
 
         warn_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 5, reason)
         for num, member in enumerate(members, start=1):
             warn_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 5, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['warn_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} {1} Member(s) warned").format(self.bot.settings['emojis']['logs']['memberedit'], len(members))
         embed.description = _("**Member(s):**\n{0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format("\n".join(warn_list),
                                                                                                        mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`warn members (manual)`', e, guild, log_channel)
@@ -844,20 +788,15 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_unban(self, guild, mod, members, reason):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
         reason = reason or "No Reason"
 
         unban_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 6, reason)
         for num, member in enumerate(members, start=1):
             unban_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 6, reason)
 
         unban_lists = unban_list if len(unban_list) <= 10 else unban_list[:10]
 
@@ -866,11 +805,11 @@ class Logging(commands.Cog):
         embed.title = _("{0} {1} Member(s) un-banned").format(self.bot.settings['emojis']['logs']['unban'], len(members))
         embed.description = _("**Member(s):**\n{0}{1}\n**Moderator:** {2} ({3})\n**Reason:** {4}").format("\n".join(unban_lists), '' if len(unban_list) <= 10 else f"\n**(+{len(unban_list) - 10}**)",
                                                                                                           mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`unban members (manual)`', e, guild, log_channel)
@@ -878,31 +817,26 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_unmute(self, guild, mod, members, reason):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
         reason = reason or "No Reason"
 
         unmute_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 7, reason)
         for num, member in enumerate(members, start=1):
             unmute_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 7, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['approve_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} {1} Member(s) un-muted").format(self.bot.settings['emojis']['logs']['memberedit'], len(members))
         embed.description = _("**Member(s):**\n{0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format("\n".join(unmute_list),
                                                                                                        mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`unmute members (manual)`', e, guild, log_channel)
@@ -910,31 +844,26 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_untimeout(self, guild, mod, members, reason):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
         reason = reason or "No Reason"
 
         unmute_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 7, reason)
         for num, member in enumerate(members, start=1):
             unmute_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 7, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['approve_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} {1} Member(s) untimedout").format(self.bot.settings['emojis']['logs']['memberedit'], len(members))
         embed.description = _("**Member(s):**\n{0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format("\n".join(unmute_list),
                                                                                                        mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`untimeout members`', e, guild, log_channel)
@@ -943,7 +872,6 @@ class Logging(commands.Cog):
     async def on_member_kick(self, guild, user):
         await asyncio.sleep(1)
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         if not guild.me.guild_permissions.view_audit_log:
@@ -962,22 +890,18 @@ class Logging(commands.Cog):
         reason = reason if reason != "None" else "No reason"
 
         log_channel = self.bot.get_channel(moderation)
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
-        await self.insert_new_case(mod.id, log_channel.id, case, user.id, guild.id, 2, reason)
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [user.id], 2, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['kick_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} A member has been kicked").format(self.bot.settings['emojis']['logs']['memberleave'])
         the_user = f"{user} ({user.id})"
         embed.description = _("**Member:** {0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format(the_user, mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`kick members`', e, guild, log_channel)
@@ -985,31 +909,26 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_voice_mute(self, guild, mod, members, reason):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
         reason = reason or "No reason"
 
         mute_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 8, reason)
         for num, member in enumerate(members, start=1):
             mute_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 8, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['update_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} {1} Member(s) voice muted").format(self.bot.settings['emojis']['logs']['vmute'], len(members))
         embed.description = _("**Member(s):**\n{0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format("\n".join(mute_list),
                                                                                                        mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`voice mute members (manual)`', e, guild, log_channel)
@@ -1017,31 +936,26 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_voice_unmute(self, guild, mod, members, reason):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
         reason = reason or "No reason"
 
         mute_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 9, reason)
         for num, member in enumerate(members, start=1):
             mute_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 9, reason)
 
         embed = discord.Embed(color=self.bot.settings['colors']['update_color'], timestamp=datetime.now(timezone.utc))
         embed.set_author(name=mod, icon_url=mod.avatar.url if mod.avatar else mod.display_avatar.url, url=f'https://discord.com/users/{mod.id}')
         embed.title = _("{0} {1} Member(s) voice unmuted").format(self.bot.settings['emojis']['logs']['vunmute'], len(members))
         embed.description = _("**Member(s):**\n{0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format("\n".join(mute_list),
                                                                                                        mod, mod.id, reason)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`voice unmute members (manual)`', e, guild, log_channel)
@@ -1049,20 +963,15 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     async def on_dehoist(self, guild, mod, members):
         moderation = CM.get(self.bot, 'moderation', guild.id)
-        case = CM.get(self.bot, 'case_num', guild.id)
         if not moderation:
             return
         log_channel = self.bot.get_channel(moderation)
         reason = None
 
         dehoist_list = []
-        query = 'INSERT INTO cases(guild_id, case_num) VALUES($1, $2) ON CONFLICT (guild_id) DO NOTHING'
-        await self.bot.db.execute(query, guild.id, case or 0)
-        if not case:
-            self.bot.case_num[guild.id] = 1
+        case = await cases.new_case(self.bot, guild.id, mod.id, log_channel.id, [member.id for member in members], 10, reason)
         for num, member in enumerate(members, start=1):
             dehoist_list.append(f"`[{num}]` {member} ({member.id})")
-            await self.insert_new_case(mod.id, log_channel.id, case, member.id, guild.id, 10, reason)
 
         dehoist_lists = dehoist_list if len(dehoist_list) <= 10 else dehoist_list[:10]
 
@@ -1071,11 +980,11 @@ class Logging(commands.Cog):
         embed.title = _("{0} {1} Member(s) dehoisted").format(self.bot.settings['emojis']['logs']['memberedit'], len(members))
         embed.description = _("**Member(s):**\n{0}{1}\n**Moderator:** {2} ({3})\n").format("\n".join(dehoist_lists), '' if len(dehoist_list) <= 10 else f"\n**(+{len(dehoist_list) - 10}**)",
                                                                                            mod, mod.id)
-        embed.set_footer(text=_("Case ID: #{0}").format(case or 1))
+        embed.set_footer(text=_("Case ID: #{0}").format(case))
 
         try:
             message = await log_channel.send(embed=embed)
-            await self.update_old_case(message.id, guild.id, case)
+            await cases.attach_message(self.bot, guild.id, case, message.id)
             await logging.new_log(self.bot, time(), 7, 1)
         except Exception as e:
             await default.background_error(self, '`unban members (manual)`', e, guild, log_channel)
@@ -1094,6 +1003,7 @@ class Logging(commands.Cog):
             if not booster:
                 await self.bot.db.execute("INSERT INTO boosters(user_id, prefix) VALUES($1, $2)", after.id, self.bot.settings['default']['owner_prefix'])
                 self.bot.boosters[after.id] = self.bot.settings['default']['owner_prefix']
+                self.bot.prefixes.invalidate_user(after.id)
                 channel = self.bot.get_channel(self.bot.settings['channels']['boosters-chat'])
                 perks = "`[1]` Cool badge\n`[2]` No cooldowns\n`[3]` No voting\n`[4]` Custom prefix (accessible everywhere, even in DMs)\n`[5]` Ability to link social media which will be displayed in `-userinfo`"
                 await channel.send("{0} **{1}** Thank you for boosting this server, as a reward you now have these perks:\n{2}".format(
@@ -32,6 +32,7 @@ from io import BytesIO
 
 from db.cache import CacheManager as CM
 from utils import btime, default, rtfm
+from utils.enums import LogType
 from utils.paginator import Pages
 from utils.i18n import locale_doc
 
@@ -121,11 +122,13 @@ Dredd is a bot that will help your server with moderation, provide fun to your m
 • Commands: **{10}**
 • Members: **{11}**
 • Servers: **{12}**
-• Channels: {13} **{14}** | {15} **{16}**\n
+• Channels: {13} **{14}** | {15} **{16}**
+• Commands used since boot: **{19}**\n
 """).format(version, escape_markdown(str(Moksej)), self.bot.settings['emojis']['misc']['python'], discord.__version__, btime.discord_time_format(self.bot.uptime, source='R'),
             btime.discord_time_format(self.bot.user.created_at), btime.discord_time_format(self.bot.user.created_at, source='R'), self.bot.support, self.bot.invite,
             self.get_last_commits(), f'{totcmd:,}', f'{mems:,}', f'{len(self.bot.guilds):,}', self.bot.settings['emojis']['logs']['unlock'], f'{text:,}',
-            self.bot.settings['emojis']['logs']['vcunlock'], f'{voice:,}', website, "https://github.com/iDevision/discord.py")
+            self.bot.settings['emojis']['logs']['vcunlock'], f'{voice:,}', website, "https://github.com/iDevision/discord.py",
+            f'{self.bot.log_stats.total(LogType.command_invoked):,}')
         embed.set_image(
             url=self.bot.settings['banners']['default'])
 
@@ -137,11 +140,13 @@ Dredd is a bot that will help your server with moderation, provide fun to your m
     async def system(self, ctx):
         _(""" A detailed information of the server the bot is hosted on. """)
 
+        stats = self.bot.log_stats
         embed = discord.Embed(colour=self.bot.settings['colors']['embed_color'])
         embed.description = _("**System CPU:**\n- Frequency: {0} Mhz\n- Cores: {1}\n- Usage: {2}%\n\n"
                               "**System Memory:**\n- Available: {3} MB\n- Total: {4} MB\n- Used: {5} MB\n\n"
                               "**System Disk:**\n- Total: {6} GB\n- Used: {7} GB\n- Free: {8} GB\n\n"
-                              "**Process Info:**\n- Memory Usage: {9} MB\n- CPU Usage: {10}%\n- Threads: {11}").format(round(psutil.cpu_freq().current, 2),
+                              "**Process Info:**\n- Memory Usage: {9} MB\n- CPU Usage: {10}%\n- Threads: {11}\n\n"
+                              "**Since boot:**\n- Commands used: {12}\n- Messages seen: {13}\n- Logs sent: {14}\n- Automod actions: {15}").format(round(psutil.cpu_freq().current, 2),
                                                                                                                        psutil.cpu_count(), psutil.cpu_percent(),
                                                                                                                        round(psutil.virtual_memory().available / 1048576),
                                                                                                                        round(psutil.virtual_memory().total / 1048576),
@@ -150,7 +155,9 @@ Dredd is a bot that will help your server with moderation, provide fun to your m
                                                                                                                        round(psutil.disk_usage("/").used / 1073741824, 2),
                                                                                                                        round(psutil.disk_usage("/").free / 1073741824, 2),
                                                                                                                        round(self.bot.process.memory_full_info().rss / 1048576, 2),
-                                                                                                                       self.bot.process.cpu_percent(), self.bot.process.num_threads())
+                                                                                                                       self.bot.process.cpu_percent(), self.bot.process.num_threads(),
+                                                                                                                       f'{stats.total(LogType.command_invoked):,}', f'{stats.total(LogType.message_sent):,}',
+                                                                                                                       f'{stats.total(LogType.logs_sent):,}', f'{stats.total(LogType.automod_action):,}')
 
         return await ctx.send(embed=embed)
 
@@ -176,7 +183,7 @@ Dredd is a bot that will help your server with moderation, provide fun to your m
         e = discord.Embed(color=embcolor)
         e.set_author(name=_("{0}'s Information").format(user), icon_url=user.avatar.url if user.avatar else user.display_avatar.url)
 
-        member = ctx.guild.get_member(user.id)
+        member = next(iter(await self.bot.chunker.members(ctx.guild, [user.id])), None)
         if member:
             nick = member.nick or 'N/A'
             nicks = ''
@@ -248,8 +255,7 @@ Dredd is a bot that will help your server with moderation, provide fun to your m
     async def serverinfo(self, ctx):
         _(""" A detailed information of the current server """)
 
-        if not ctx.guild.chunked:
-            await ctx.guild.chunk(cache=True)
+        await self.bot.chunker.wait(ctx.guild)
 
         acks = default.server_badges(ctx, ctx.guild)
         ack = _("\n**Acknowledgements:**\n{0}").format(acks) if acks else ''
@@ -755,36 +761,28 @@ Dredd is a bot that will help your server with moderation, provide fun to your m
         if await self.bot.is_owner(ctx.author):
             opts.append(option)
         if not option or option not in opts:
-            cmd = await self.bot.db.fetch("select command, sum(usage) from command_logs where user_id != $1 group by command order by sum(usage) desc LIMIT 10", 345457928972533773)
+            cmd, total = await self.bot.command_usage.top('global')
             index = _('**Top 10 most used commands:**')
-            query1 = 'select sum(usage) from command_logs where user_id != $1'
-            total = await self.bot.db.fetchval(query1, 345457928972533773)
             if not total:
                 return await ctx.send(_("{0} Looks like you haven't used any commands :/").format(self.bot.settings['emojis']['misc']['warn']))
             index2 = _('In total users have used {0} commands!').format(total)
         elif option == 'me':
-            query = 'select command, sum(usage) from command_logs where user_id = $1 group by command order by sum(usage) desc limit 10'
-            cmd = await self.bot.db.fetch(query, ctx.author.id)
+            cmd, total = await self.bot.command_usage.top('user', ctx.author.id)
             index = _('**Your top 10 most used commands**')
-            total = await self.bot.db.fetchval('select sum(usage) from command_logs where user_id = $1', ctx.author.id)
             if not total:
                 return await ctx.send(_("{0} Looks like you haven't used any commands :/").format(self.bot.settings['emojis']['misc']['warn']))
             index2 = _("In total you have used {0:,} commands!").format(total)
         elif option == 'guild':
             if not ctx.guild:
                 return await ctx.send(_("{0} This command must be ran in any server, not dms").format(self.bot.settings['emojis']['misc']['warn']))
-            query = 'select command, sum(usage) from command_logs where guild_id = $1 and user_id != $2 group by command order by sum(usage) desc limit 10'
-            cmd = await self.bot.db.fetch(query, ctx.guild.id, 345457928972533773)
+            cmd, total = await self.bot.command_usage.top('guild', ctx.guild.id)
             index = _('**Top 10 most used commands in this server:**')
-            total = await self.bot.db.fetchval('select sum(usage) from command_logs where guild_id = $1 and user_id != $2', ctx.guild.id, 345457928972533773)
             if not total:
                 return await ctx.send(_("{0} Looks like you haven't used any commands :/").format(self.bot.settings['emojis']['misc']['warn']))
             index2 = _("In total this guild has used {0:,} commands!").format(total)
         else:
-            query = 'select command, sum(usage) from command_logs where user_id = $1 group by command order by sum(usage) desc limit 10'
-            cmd = await self.bot.db.fetch(query, int(option))
+            cmd, total = await self.bot.command_usage.top('user', int(option))
             index = f'**Top 10 most used commands by {self.bot.get_user(int(option))}:**'
-            total = await self.bot.db.fetchval('select sum(usage) from command_logs where user_id = $1', int(option))
             if not total:
                 return await ctx.send("{0} Looks like they haven't used any commands :/".format(self.bot.settings['emojis']['misc']['warn']))
             index2 = f"In total {self.bot.get_user(int(option))} has used {total:,} commands!"
@@ -808,12 +806,11 @@ Dredd is a bot that will help your server with moderation, provide fun to your m
     async def newusers(self, ctx, *, count: int):
         _(""" A list of newest members in the server """)
 
+        await self.bot.chunker.wait(ctx.guild)
         if len(ctx.guild.members) < count:
             return await ctx.send(_("This server has {0} members").format(len(ctx.guild.members)))
         counts = max(min(count, 10), 1)
 
-        if not ctx.guild.chunked:
-            await self.bot.request_offline_members(ctx.guild)
         members = sorted(ctx.guild.members, key=lambda m: m.joined_at, reverse=True)[:counts]
         e = discord.Embed(title=_('Newest member(s) in this server:'), colour=self.bot.settings['colors']['embed_color'])
         for num, member in enumerate(members, start=1):
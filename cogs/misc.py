@@ -57,6 +57,7 @@ class Misc(commands.Cog, name='Miscellaneous'):
             self.bot.reminders[ctx.author.id] = {'1': {'time': time, 'content': content, 'channel': ctx.channel.id, 'message': ctx.message.id}}
         else:
             self.bot.reminders[ctx.author.id][str(len(check_reminders) + 1)] = {'time': time, 'content': content, 'channel': ctx.channel.id, 'message': ctx.message.id}
+        self.bot.reminder_engine.add(ctx.author.id, ctx.channel.id, ctx.message.id, time, content)
 
     async def perform_action(self, value: bool, interaction: discord.Interaction, command: Optional[str]) -> None:  # sourcery no-metrics
         if command:
@@ -672,6 +673,7 @@ class Misc(commands.Cog, name='Miscellaneous'):
         else:
             the_reminder = check_reminders[reminder]['content']
             the_time = check_reminders[reminder]['time']
+            self.bot.reminder_engine.remove(ctx.author.id, check_reminders[reminder]['message'], the_time)
             self.bot.reminders[ctx.author.id].pop(reminder)
             await self.bot.db.execute("DELETE FROM reminders WHERE user_id = $1 AND reminder = $2 AND time = $3", ctx.author.id, the_reminder, the_time)
             await LC.reminders(self.bot)
@@ -28,7 +28,7 @@ from datetime import datetime, timezone, timedelta
 
 from utils import default, btime
 from utils.checks import BannedMember, MemberID, moderator, admin
-from utils.paginator import Pages
+from utils.modhistory import HistoryPages
 from db.cache import CacheManager as cm
 from contextlib import suppress
 from utils.i18n import locale_doc
@@ -2015,23 +2015,21 @@ class moderation(commands.Cog, name='Moderation'):
                 edited, edited_cases = 0, []
                 for loop in range(last_cases):
                     case_id = total_cases - (last_cases - edited)
-                    case_check = await self.bot.db.fetch("SELECT * FROM modlog WHERE guild_id = $1 AND case_num = $2", ctx.guild.id, case_id)
-                    if case_check:
-                        channel = ctx.guild.get_channel(case_check[0]['channel_id'])
+                    case = await self.bot.mod_history.get_case(ctx.guild.id, case_id)
+                    if case:
+                        channel = ctx.guild.get_channel(case['channel_id'])
                         try:
-                            message = await channel.fetch_message(case_check[0]['message_id'])
+                            message = await channel.fetch_message(case['message_id'])
                         except Exception:
                             message = None
                         edited += 1
                         if message:
-                            old_reason = await self.bot.db.fetchval("SELECT reason FROM modlog WHERE guild_id = $1 AND case_num = $2", ctx.guild.id, case_id)
-                            old_reason = old_reason or "No reason"
+                            old_reason = case['reason'] or "No reason"
                             embed = message.embeds[0]
                             new_description = embed.description[:-len(old_reason)] + new_reason  # not using .replace cause then it replaces even usernames etc
                             embed.description = new_description
                             await message.edit(embed=embed)
-                            query = 'UPDATE modlog SET reason = $1 WHERE guild_id = $2 AND case_num = $3'
-                            await self.bot.db.execute(query, new_reason, ctx.guild.id, case_id)
+                            await self.bot.mod_history.set_reason(ctx.guild.id, case_id, new_reason)
                             edited_cases.append(str(case_id))
                             await asyncio.sleep(2)  # to make sure we don't get ratelimited
                 if edited_cases:
@@ -2040,14 +2038,14 @@ class moderation(commands.Cog, name='Moderation'):
                     return await ctx.send(_("{0} Failed to edit last {1} case(s), this might be because the log message was deleted").format(self.bot.settings['emojis']['misc']['warn'], last_cases))
 
         else:
-            case_check = await self.bot.db.fetch("SELECT * FROM modlog WHERE guild_id = $1 AND case_num = $2", ctx.guild.id, case_id)
+            case = await self.bot.mod_history.get_case(ctx.guild.id, case_id)
 
-            if not case_check:
+            if not case:
                 return await ctx.send(_("{0} Case `#{1}` doesn't exist.").format(self.bot.settings['emojis']['misc']['warn'], case_id))
 
-            channel = ctx.guild.get_channel(case_check[0]['channel_id'])
+            channel = ctx.guild.get_channel(case['channel_id'])
             try:
-                message = await channel.fetch_message(case_check[0]['message_id'])
+                message = await channel.fetch_message(case['message_id'])
             except discord.NotFound:
                 return await ctx.send(_("{0} Unknown message! Make sure I have permissions "
                                         "to see the logging channel and if that message exists.").format(self.bot.settings['emojis']['misc']['warn']))
@@ -2056,14 +2054,12 @@ class moderation(commands.Cog, name='Moderation'):
             except discord.HTTPException:
                 return await ctx.send(_("{0} Retrieving the message failed.").format(self.bot.settings['emojis']['misc']['warn']))
 
-            old_reason = await self.bot.db.fetchval("SELECT reason FROM modlog WHERE guild_id = $1 AND case_num = $2", ctx.guild.id, case_id)
-            old_reason = old_reason or "No reason"
+            old_reason = case['reason'] or "No reason"
             embed = message.embeds[0]
             new_description = embed.description[:-len(old_reason)] + new_reason  # not using .replace cause then it replaces even usernames etc
             embed.description = new_description
             await message.edit(embed=embed)
-            query = 'UPDATE modlog SET reason = $1 WHERE guild_id = $2 AND case_num = $3'
-            await self.bot.db.execute(query, new_reason, ctx.guild.id, case_id)
+            await self.bot.mod_history.set_reason(ctx.guild.id, case_id, new_reason)
 
             await ctx.channel.send(content=_('Successfully edited case `#{0}` reason').format(case_id), embed=embed)
 
@@ -2082,11 +2078,11 @@ class moderation(commands.Cog, name='Moderation'):
                 self.bot.settings['emojis']['misc']['warn'], len(reason) - 450
             ))
 
-        case_check = await self.bot.db.fetch("SELECT * FROM modlog WHERE guild_id = $1 AND case_num = $2", ctx.guild.id, case_id)
+        case = await self.bot.mod_history.get_case(ctx.guild.id, case_id)
 
-        if not case_check:
+        if not case:
             return await ctx.send(_("{0} Case `#{1}` doesn't exist.").format(self.bot.settings['emojis']['misc']['warn'], case_id))
-        channel = ctx.guild.get_channel(case_check[0]['channel_id'])
+        channel = ctx.guild.get_channel(case['channel_id'])
 
         embed = discord.Embed(color=self.bot.settings['colors']['approve_color'],
                               title=_("{0} Case was deleted").format(self.bot.settings['emojis']['logs']['guildedit']),
@@ -2095,7 +2091,7 @@ class moderation(commands.Cog, name='Moderation'):
         embed.description = _("**Case ID:** {0}\n**Moderator:** {1} ({2})\n**Reason:** {3}").format(
             case_id, ctx.author, ctx.author.id, reason
         )
-        await self.bot.db.execute("DELETE FROM modlog WHERE guild_id = $1 AND case_num = $2", ctx.guild.id, case_id)
+        await self.bot.mod_history.delete_case(ctx.guild.id, case_id)
         if not channel:
             await ctx.send(_("{0} Case `#{1}` was successfuly deleted, but I was unable to send a log message to "
                              "the logging channel in which case was logged. *It was most likely deleted*").format(
@@ -2119,14 +2115,14 @@ class moderation(commands.Cog, name='Moderation'):
     async def showcase(self, ctx, case_id: int):
         _(""" Get more information of the case """)
 
-        case_check = await self.bot.db.fetch("SELECT * FROM modlog WHERE guild_id = $1 AND case_num = $2", ctx.guild.id, case_id)
+        case = await self.bot.mod_history.get_case(ctx.guild.id, case_id)
 
-        if not case_check:
+        if not case:
             return await ctx.send(_("{0} Case `#{1}` doesn't exist.").format(self.bot.settings['emojis']['misc']['warn'], case_id))
 
-        channel = ctx.guild.get_channel(case_check[0]['channel_id'])
+        channel = ctx.guild.get_channel(case['channel_id'])
         try:
-            message = await channel.fetch_message(case_check[0]['message_id'])
+            message = await channel.fetch_message(case['message_id'])
         except discord.NotFound:
             return await ctx.send(_("{0} Unknown message! Make sure I have permissions "
                                     "to see the logging channel and if that message exists.").format(self.bot.settings['emojis']['misc']['warn']))
@@ -2146,59 +2142,18 @@ class moderation(commands.Cog, name='Moderation'):
     async def history(self, ctx, user: discord.User):  # sourcery no-metrics
         _(""" Get a history of user's punishments """)
 
-        case_check = await self.bot.db.fetch("SELECT * FROM modlog WHERE guild_id = $1 AND user_id = $2 ORDER BY case_num", ctx.guild.id, user.id)
-        no_msg = _("{0} {1} doesn't have any punishments history.").format(self.bot.settings['emojis']['misc']['warn'], user)
-
-        if not case_check:
-            return await ctx.send(no_msg)
-
-        history = []
-        bans, warns, mutes, kicks, softbans = 0, 0, 0, 0, 0
-        for data in case_check:
-            if not data['reason']:
-                continue
-            if data['action'] == 1:
-                action = _('ban')
-                bans += 1
-            elif data['action'] == 2:
-                action = _('kick')
-                kicks += 1
-            elif data['action'] == 3:
-                action = _('softban')
-                softbans += 1
-            elif data['action'] == 4:
-                action = _('mute')
-                mutes += 1
-            elif data['action'] == 5:
-                action = _('warn')
-                warns += 1
-            elif data['action'] == 6:
-                action = _('unban')
-            elif data['action'] == 7:
-                action = _('unmute')
-            elif data['action'] == 8:
-                action = _('voice mute')
-            elif data['action'] == 9:
-                action = _('voice unmute')
-            try:
-                mod = await self.bot.try_user(data['mod_id'])
-            except Exception:
-                mod = _("Not Found. ID: {0}").format(data['mod_id'])
-            history.append(_("**Case ID:** {0}\n**Action:** {1}\n**Moderator:** {2} ({3})\n**Reason:** {4}\n\n").format(
-                data['case_num'], action, mod, mod.id, data['reason'][:150] + '...' if len(data['reason']) > 150 else data['reason']
-            ))
-
-        if not history:
-            return await ctx.send(no_msg)
-
-        paginator = Pages(ctx,
-                          title=_("{0} Punishments History").format(user),
-                          entries=history,
-                          thumbnail=None,
-                          per_page=8,
-                          embed_color=self.bot.settings['colors']['embed_color'],
-                          footertext=_("Muted: {0}; Banned: {1}; Kicked: {2}; Softbanned: {3}; Warned: {4}").format(mutes, bans, kicks, softbans, warns),
-                          author=ctx.author)
+        summary = await self.bot.mod_history.summary(ctx.guild.id, user.id)
+        if not summary['total']:
+            return await ctx.send(_("{0} {1} doesn't have any punishments history.").format(self.bot.settings['emojis']['misc']['warn'], user))
+
+        paginator = HistoryPages(ctx, user, summary,
+                                 title=_("{0} Punishments History").format(user),
+                                 thumbnail=None,
+                                 per_page=8,
+                                 embed_color=self.bot.settings['colors']['embed_color'],
+                                 footertext=_("Muted: {0}; Banned: {1}; Kicked: {2}; Softbanned: {3}; Warned: {4}").format(
+                                     summary['mutes'], summary['bans'], summary['kicks'], summary['softbans'], summary['warns']),
+                                 author=ctx.author)
         await paginator.paginate()
 
     @commands.group(brief=_("Shows the duration of tempmute left."), name='temp-duration', invoke_without_command=True, aliases=['temp-dur'])
@@ -30,6 +30,7 @@ from datetime import datetime, timedelta
 from db.cache import CacheManager as cm
 from cogs.music import Player
 from contextlib import suppress
+from collections import defaultdict
 from colorama import Fore as print_color
 
 dredd_logger = logging.getLogger("dredd")
@@ -40,9 +41,10 @@ class Tasks(commands.Cog, name="Tasks", command_attrs=dict(hidden=True)):
         self.bot = bot
         self.help_icon = ''
         self.guild_data.start()
-        self.temp_ban.start()
-        self.temp_mute.start()
+        self.temp_punishments.start()
+        self.page_reminders.start()
         self.reminders.start()
+        self.acknowledge_reminders.start()
         self.dispatch_unmute.start()
         self.dispatch_unban.start()
         self.delete_nicknames.start()
@@ -54,9 +56,12 @@ class Tasks(commands.Cog, name="Tasks", command_attrs=dict(hidden=True)):
 
     def cog_unload(self):
         self.guild_data.cancel()
-        self.temp_ban.cancel()
-        self.temp_mute.cancel()
+        self.temp_punishments.cancel()
+        self.page_reminders.cancel()
         self.reminders.cancel()
+        self.acknowledge_reminders.cancel()
+        self.bot.reminder_engine.stop()
+        self.bot.loop.create_task(self.bot.reminder_engine.flush())
         self.dispatch_unmute.cancel()
         self.dispatch_unban.cancel()
         self.delete_nicknames.cancel()
@@ -79,59 +84,73 @@ class Tasks(commands.Cog, name="Tasks", command_attrs=dict(hidden=True)):
         except Exception as e:
             print(e)
 
-    @tasks.loop(seconds=1)
-    async def temp_ban(self):
-        try:
-            for result in self.bot.temp_bans:
-                check = cm.get(self.bot, 'temp_bans', result)
-                if check:
-                    now = datetime.utcnow()
-                    the_time = check['time']
-                    seconds = (the_time - now).total_seconds()
-                    if the_time and seconds <= 0:
-                        user = await self.bot.try_user(int(result.split(', ')[0]))
-                        guild = self.bot.get_guild(int(result.split(', ')[1]))
-                        mod = await self.bot.try_user(int(check['moderator']))
-                        to_disp = cm.get(self.bot, 'to_unban', guild.id)
-                        if not to_disp:
-                            self.bot.to_unban[guild.id] = {'users': [], 'mod': mod}
-                        await default.execute_untemporary(self, 2, user, guild)
-                        with suppress(NotFound):
-                            await guild.unban(user, reason='Auto Unban')
-                            self.bot.to_unban[guild.id]['users'].append(user)
-        except Exception as e:
-            print(print_color.RED, "[AUTO UNBAN] - {e}")
-
-    @tasks.loop(seconds=1)
-    async def temp_mute(self):
-        try:
-            for result in self.bot.temp_mutes:
-                check = cm.get(self.bot, 'temp_mutes', result)
-                if check:
-                    now = datetime.utcnow()
-                    the_time = check['time']
-                    seconds = (the_time - now).total_seconds()
-                    if the_time and seconds <= 0:
-                        user = await self.bot.try_user(int(result.split(', ')[0]))
-                        guild = self.bot.get_guild(int(result.split(', ')[1]))
-                        mod = await self.bot.try_user(int(check['moderator']))
-                        to_disp = cm.get(self.bot, 'to_unmute', guild.id)
-                        if not to_disp:
-                            self.bot.to_unmute[guild.id] = {'users': [], 'mod': mod}
-                        await default.execute_untemporary(self, 1, user, guild)
-                        role = guild.get_role(int(check['role']))
-                        member = guild.get_member(user.id)
-                        if role:
-                            await member.remove_roles(role, reason='Auto Unmute')
-                        if member:
-                            self.bot.to_unmute[guild.id]['users'].append(member)
-        except Exception as e:
-            print(print_color.RED, "[AUTO UNMUTE] - {e}")
+    def schedule_temporary(self):
+        for action, cache in ((1, self.bot.temp_mutes), (2, self.bot.temp_bans)):
+            for result, check in cache.items():
+                user_id, guild_id = result.split(', ')
+                self.bot.expiry.schedule((action, int(user_id), int(guild_id)), check['time'])
+
+    @tasks.loop(seconds=0)
+    async def temp_punishments(self):
+        due = await self.bot.expiry.wait()  # sleeps until the next temp ban/mute expires
+        batches = defaultdict(list)
+        for action, user_id, guild_id in due:
+            batches[(action, guild_id)].append(user_id)
+
+        for (action, guild_id), user_ids in batches.items():
+            try:
+                if action == 1:
+                    await self.expire_mutes(guild_id, user_ids)
+                else:
+                    await self.expire_bans(guild_id, user_ids)
+            except Exception as e:
+                print(print_color.RED, f"[AUTO {'UNMUTE' if action == 1 else 'UNBAN'}] - {e}")
+
+    async def expire_bans(self, guild_id, user_ids):
+        checks = {user_id: cm.get(self.bot, 'temp_bans', f"{user_id}, {guild_id}") for user_id in user_ids}
+        await default.execute_untemporary_many(self, 2, user_ids, guild_id)
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            return
+
+        for user_id, check in checks.items():
+            if not check:
+                continue
+            if not cm.get(self.bot, 'to_unban', guild.id):
+                mod = await self.bot.try_user(int(check['moderator']))
+                self.bot.to_unban[guild.id] = {'users': [], 'mod': mod}
+            user = await self.bot.try_user(user_id)
+            with suppress(NotFound):
+                await guild.unban(user, reason='Auto Unban')
+                self.bot.to_unban[guild.id]['users'].append(user)
+
+    async def expire_mutes(self, guild_id, user_ids):
+        checks = {user_id: cm.get(self.bot, 'temp_mutes', f"{user_id}, {guild_id}") for user_id in user_ids}
+        await default.execute_untemporary_many(self, 1, user_ids, guild_id)
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            return
+
+        members = {m.id: m for m in await self.bot.chunker.members(guild, [x for x, check in checks.items() if check])}
+        for user_id, check in checks.items():
+            if not check:
+                continue
+            if not cm.get(self.bot, 'to_unmute', guild.id):
+                mod = await self.bot.try_user(int(check['moderator']))
+                self.bot.to_unmute[guild.id] = {'users': [], 'mod': mod}
+            role = guild.get_role(int(check['role']))
+            member = members.get(user_id)
+            if not member:
+                continue
+            if role:
+                with suppress(NotFound):
+                    await member.remove_roles(role, reason='Auto Unmute')
+            self.bot.to_unmute[guild.id]['users'].append(member)
 
     @tasks.loop(seconds=10)
     async def dispatch_unmute(self):
         try:
-            for guild in self.bot.to_unmute:
+            for guild in list(self.bot.to_unmute):
                 if len(self.bot.to_unmute[guild]['users']) >= 1:
                     self.bot.dispatch('unmute', self.bot.get_guild(guild), self.bot.to_unmute[guild]['mod'], self.bot.to_unmute[guild]['users'], 'Auto Unmute')
                 self.bot.to_unmute.pop(guild, None)
@@ -141,47 +160,30 @@ class Tasks(commands.Cog, name="Tasks", command_attrs=dict(hidden=True)):
     @tasks.loop(seconds=10)
     async def dispatch_unban(self):
         try:
-            for guild in self.bot.to_unban:
+            for guild in list(self.bot.to_unban):
                 if len(self.bot.to_unban[guild]['users']) >= 1:
                     self.bot.dispatch('unban', self.bot.get_guild(guild), self.bot.to_unban[guild]['mod'], self.bot.to_unban[guild]['users'], 'Auto Unban')
                 self.bot.to_unban.pop(guild, None)
         except Exception as e:
             print(print_color.RED, "[DISPATCH UNMUTE] - {e}")
 
-    @tasks.loop(seconds=1)
+    @tasks.loop(seconds=0)
     async def reminders(self):
         try:
-            reminds = self.bot.reminders
-            for result in reminds:
-                for result_2 in reminds[result]:
-                    json = reminds[result][result_2]
-                    the_time = json['time']
-                    try:
-                        now = datetime.utcnow()
-                        seconds = (the_time - now).total_seconds()
-                    except Exception:
-                        now = discord.utils.utcnow()
-                        seconds = (the_time - now).total_seconds()
-                    if the_time and seconds <= 0:
-                        try:
-                            channel = self.bot.get_channel(json['channel'])
-                            message = await channel.fetch_message(json['message'])
-                            await message.reply(json['content'], allowed_mentions=discord.AllowedMentions(replied_user=True))
-                        except Exception:
-                            user = self.bot.get_user(result)
-                            try:
-                                channel = self.bot.get_channel(json['channel'])
-                                await channel.send(f"{user.mention}: {json['content']}", allowed_mentions=discord.AllowedMentions(users=True))
-                            except Exception:
-                                try:
-                                    reminder = json['content']
-                                    await user.send(_("*The original message was deleted or I'm missing permissions*\n\nYour reminder: {0}").format(reminder[:1800] + '...' if len(reminder) > 1800 else reminder))
-                                except Exception:
-                                    pass
-                        self.bot.reminders[result].pop(result_2)
-                        await self.bot.db.execute("DELETE FROM reminders WHERE user_id = $1 AND reminder = $2 AND time = $3", result, json['content'], json['time'])
-        except Exception:
-            pass
+            await self.bot.reminder_engine.dispatch()  # sleeps until the next reminder is due
+        except Exception as e:
+            print(print_color.RED, f"[REMINDERS] - {e}")
+
+    @tasks.loop(minutes=20)
+    async def page_reminders(self):
+        await self.bot.reminder_engine.page_in()
+
+    @tasks.loop(seconds=5)
+    async def acknowledge_reminders(self):
+        try:
+            await self.bot.reminder_engine.flush()
+        except Exception as e:
+            print(print_color.RED, f"[REMINDERS] Failed to delete delivered reminders - {e}")
 
     @tasks.loop(hours=6)
     async def backups(self):
@@ -235,27 +237,36 @@ class Tasks(commands.Cog, name="Tasks", command_attrs=dict(hidden=True)):
     @tasks.loop(minutes=15)
     async def clear_automod_counter(self):
         self.bot.automod_counter.clear()
+        automod = self.bot.get_cog('AutomodEvents')
+        if automod:
+            automod.raids.cleanup(time())  # forget join windows of guilds that went quiet
 
     @guild_data.before_loop
     async def before_guild_delete(self):
         await self.bot.wait_until_ready()
         print(print_color.GREEN, "[BACKGROUND] Started automatic guild data delete process")
 
-    @temp_ban.before_loop
-    async def before_temp_ban(self):
-        await self.bot.wait_until_ready()
-        print(print_color.GREEN, "[BACKGROUND] Started temp bans unbanning process")
-
-    @temp_mute.before_loop
-    async def before_temp_mute(self):
+    @temp_punishments.before_loop
+    async def before_temp_punishments(self):
         await self.bot.wait_until_ready()
-        print(print_color.GREEN, "[BACKGROUND] Started temp mutes unmuting process")
+        await self.bot.warm_start.wait_loaded()  # a restored snapshot can miss temp punishments made after it was written
+        self.schedule_temporary()
+        print(print_color.GREEN, "[BACKGROUND] Started temp bans and temp mutes expiry process")
 
     @reminders.before_loop
     async def before_reminders(self):
         await self.bot.wait_until_ready()
+        self.bot.reminder_engine.start()
         print(print_color.GREEN, "[BACKGROUND] Started sending reminders")
 
+    @page_reminders.before_loop
+    async def before_page_reminders(self):
+        await self.bot.wait_until_ready()
+
+    @acknowledge_reminders.before_loop
+    async def before_acknowledge_reminders(self):
+        await self.bot.wait_until_ready()
+
     @delete_nicknames.before_loop
     async def before_delete_nicknames(self):
         await self.bot.wait_until_ready()
@@ -24,13 +24,13 @@ from importlib import reload as importlib_reload
 from typing import Union
 
 from prettytable import PrettyTable
-from utils import default, btime, checks, i18n, enums
+from utils import default, btime, checks, i18n, enums, scanner
 from utils.paginator import TextPages
+from utils.policy import invalidate_policy
 from db.cache import LoadCache as LC, CacheManager as CM, DreddGuild, Blacklist, DreddUser
 from datetime import datetime, timezone
 from contextlib import suppress
 
-from cogs.events.automod import AutomodEvents as automod
 
 # THIS COG IS NOT MADE WELL
 # AS I DIDN'T WANT TO SPEND
@@ -116,14 +116,7 @@ class Buttons(discord.ui.View):
         await interaction.response.defer()
         instance: Union[discord.Guild, discord.User] = self.user or self.guild
 
-        if isinstance(instance, discord.Guild):
-            query = 'select command, sum(usage) from command_logs where guild_id = $1 and user_id != $2 group by command order by sum(usage) desc limit 10'
-            cmd = await self.bot.db.fetch(query, instance.id, 345457928972533773 if instance.id != 345457928972533773 else 1)
-            total = await self.bot.db.fetchval('select sum(usage) from command_logs where guild_id = $1 and user_id != $2', instance.id, 345457928972533773 if instance.id != 345457928972533773 else 1)
-        else:
-            query = 'select command, sum(usage) from command_logs where user_id = $1 group by command order by sum(usage) desc limit 10'
-            cmd = await self.bot.db.fetch(query, instance.id)
-            total = await self.bot.db.fetchval('select sum(usage) from command_logs where user_id = $1', instance.id)
+        cmd, total = await self.bot.command_usage.top('guild' if isinstance(instance, discord.Guild) else 'user', instance.id)
         index = '**Top 10 most used commands in this server:**'
         if not total:
             return await interaction.response.send_message("No commands used.", ephemeral=True)
@@ -232,6 +225,8 @@ class owner(commands.Cog, name="Owner", command_attrs={"slash_command": False}):
     @dev.command(name='reload-cache', aliases=['rcache'])
     async def dev_reload_cache(self, ctx):
         await LC.reloadall(self.bot)
+        invalidate_policy(self.bot)
+        self.bot.prefixes.clear()
         await ctx.send("I've successfully reloaded cache!")
 
     @dev.command(name='reload-config', aliases=['rconfig', 'rconf'])
@@ -299,14 +294,28 @@ class owner(commands.Cog, name="Owner", command_attrs={"slash_command": False}):
 
     @dev.command(name="automod")
     async def dev_automod(self, ctx, guild_id: int = None):
+        cog = self.bot.get_cog('AutomodEvents')
+        limiters = '\n'.join(f"`{name}`: {stats['buckets']} buckets, {stats['bytes'] / 1024:.1f} KiB, {stats['evicted']} evicted"
+                              for name, stats in cog.rate_limit_stats().items())
+        limiters += f"\n`scanner`: {scanner.stats['scans']} scans, {scanner.stats['overruns']} over the {scanner.BUDGET * 1000:.0f}ms budget"
         if len(self.bot.automod_counter) <= 0:
-            return await ctx.send("No servers are currently experiencing raids!")
-        batches = len(automod(self.bot).batch_messages)
+            return await ctx.send(f"No servers are currently experiencing raids!\n{limiters}")
+        batches = self.bot.log_sink.stats()
         huge_servers = len(self.bot.automod_counter) if not guild_id else self.bot.get_guild(guild_id)
         huge_raids = sum(self.bot.automod_counter.values()) if not guild_id else self.bot.automod_counter.get(guild_id)
-        return await ctx.send(f"{batches} messages globally are currently awaiting to be sent.\n"
+        return await ctx.send(f"{batches['pending']} messages globally are currently awaiting to be sent "
+                              f"({batches['dropped']} dropped, {batches['failed']} failed).\n"
                               f"{huge_servers} server(s) currently experiencing raids, "
-                              f"{huge_raids} user(s) automoderated.")
+                              f"{huge_raids} user(s) automoderated.\n{limiters}")
+
+    @dev.command(name="pipeline")
+    async def dev_pipeline(self, ctx):
+        table = PrettyTable(['Stage', 'Calls', 'Average', 'Max'])
+        for order, name, stage in self.bot.pipeline.stages:
+            timing = self.bot.pipeline.timings[name]
+            table.add_row([name, timing.calls, f"{timing.average * 1000:.2f}ms", f"{timing.max * 1000:.2f}ms"])
+        guilds = f"Guild settings: {len(self.bot.guild_settings)} guilds cached"
+        await ctx.send(f"```\n{table}\n{guilds}\nChunker: {self.bot.chunker.stats()}\nMessage store: {self.bot.message_store.stats()}\nLog stats: {self.bot.log_stats.stats()}\nCommand usage: {self.bot.command_usage.stats()}\nMod history: {self.bot.mod_history.stats()}```")
 
     @commands.group(brief='Change bot\'s theme', invoke_without_command=True)
     async def theme(self, ctx):
@@ -355,7 +364,7 @@ class owner(commands.Cog, name="Owner", command_attrs={"slash_command": False}):
 
         acks = default.bot_acknowledgements(ctx, user, True)
         suggestions = await self.bot.db.fetch("SELECT suggestion_id FROM suggestions WHERE user_id = $1", user.id)
-        commands = await self.bot.db.fetchval("SELECT sum(usage) FROM command_logs WHERE user_id = $1", user.id) or 0
+        commands = (await self.bot.command_usage.top('user', user.id))[1]
         ids = []
         for id in suggestions:
             ids.append(f"{id['suggestion_id']}")
@@ -386,8 +395,7 @@ class owner(commands.Cog, name="Owner", command_attrs={"slash_command": False}):
         guild = server
         if guild is None:
             return await ctx.send(f"{self.bot.settings['emojis']['misc']['warn']} | That server doesn't seem to exist. Are you sure the server ID is correct?")
-        if not guild.chunked:
-            await guild.chunk()
+        await self.bot.chunker.wait(guild)
 
         acks = default.server_badges(ctx, guild)
         logging = default.server_logs(ctx, guild)
@@ -462,7 +470,7 @@ class owner(commands.Cog, name="Owner", command_attrs={"slash_command": False}):
         lines, firstlineno = inspect.getsourcelines(src)
         module = obj.callback.__module__
         location = module.replace('.', '/') + '.py'
-        used = await self.bot.db.fetchval("SELECT sum(usage) FROM command_logs WHERE command = $1", str(cmd))
+        used = await self.bot.command_usage.used(str(cmd))
         tot_errors = await self.bot.db.fetchval("SELECT count(*) FROM errors WHERE error_command = $1", str(cmd))
         resolved = await self.bot.db.fetch('SELECT array_agg(error_id), count(*) FROM errors WHERE error_command = $1 AND error_status = $2', str(cmd), 1)
         unresolved = await self.bot.db.fetch('SELECT array_agg(error_id), count(*) FROM errors WHERE error_command = $1 AND error_status = $2', str(cmd), 0)
@@ -516,6 +524,7 @@ class owner(commands.Cog, name="Owner", command_attrs={"slash_command": False}):
         await self.bot.db.execute(f"INSERT INTO {ranks[rank]} VALUES($1, $2)", user.id, '-')
         attr = getattr(self.bot, ranks[rank])
         attr[user.id] = '-'
+        self.bot.prefixes.invalidate_user(user.id)
         rank = 'donator' if ranks[rank] == 'boosters' else 'bot_admin'
         badge = ctx.bot.settings['emojis']['ranks'][rank]
         if CM.get(self.bot, 'badges', user.id):
@@ -552,6 +561,7 @@ class owner(commands.Cog, name="Owner", command_attrs={"slash_command": False}):
         await self.bot.db.execute(f"DELETE FROM {ranks[rank]} WHERE user_id = $1", user.id)
         attr = getattr(self.bot, ranks[rank])
         attr.pop(user.id)
+        self.bot.prefixes.invalidate_user(user.id)
         rank = 'donator' if ranks[rank] == 'boosters' else 'bot_admin'
         badge = ctx.bot.settings['emojis']['ranks'][rank]
         await self.bot.db.execute("UPDATE badges SET flags = flags - $1 WHERE _id = $2", ranks[rank], user.id)
@@ -68,6 +68,10 @@ DREDD_API_CLIENT = ""
 SENTRY = ""
 
 PHISHING = ""
+PHISHING_FEED = ""  # newline separated or json list of phishing domains, snapshotted to db/phishing_domains.txt
+
+CACHE_SNAPSHOT = 'db/cache.snapshot'  # written on shutdown and every 10 minutes, restored on boot when it's less than a day old
+MESSAGE_STORE_BUDGET = 32 * 1024 * 1024  # bytes of recent messages kept for edit/delete logs and snipes
 
 WEBSOCKET = ('', '', '', 12345)
 
@@ -0,0 +1,46 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import List
+
+# cases.case_num is the guild's next case number. The block of $2 numbers is reserved and the modlog rows of
+# every member are inserted by one statement, so two actions can never get the same number
+NEW_CASE_QUERY = """
+WITH reserved AS (
+    INSERT INTO cases(guild_id, case_num) VALUES($1, 1 + $2)
+    ON CONFLICT (guild_id) DO UPDATE SET case_num = greatest(cases.case_num, 1) + $2
+    RETURNING case_num - $2 AS case_num
+), logged AS (
+    INSERT INTO modlog(mod_id, channel_id, case_num, message_id, user_id, guild_id, action, reason)
+    SELECT $3, $4, reserved.case_num, NULL, user_id, $1, $5, $6 FROM reserved, unnest($7::bigint[]) AS user_id
+)
+SELECT case_num FROM reserved
+"""
+
+
+async def new_case(bot, guild_id: int, mod_id: int, channel_id: int, user_ids: List[int], action: int, reason: str, count: int = 1) -> int:
+    """ Reserves ``count`` case numbers and logs the action against the first one.
+
+    Every member of the action shares the case, like one modlog message does.
+    Returns the case number. """
+    case_num = await bot.db.fetchval(NEW_CASE_QUERY, guild_id, count, mod_id, channel_id, user_ids, action, reason)
+    bot.case_num[guild_id] = case_num + count
+    return case_num
+
+
+async def attach_message(bot, guild_id: int, case_num: int, message_id: int) -> None:
+    """ Links the modlog message to the case once it's sent. """
+    await bot.db.execute("UPDATE modlog SET message_id = $1 WHERE guild_id = $2 AND case_num = $3", message_id, guild_id, case_num)
+    bot.mod_history.forget(guild_id, case_num)
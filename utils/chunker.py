@@ -0,0 +1,132 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import heapq
+import logging
+
+from collections import Counter
+from db.cache import CacheManager as cm
+from itertools import count
+from typing import Dict, Iterable, List, Optional, Tuple
+
+dredd_logger = logging.getLogger("dredd")
+
+URGENT = 0  # someone is waiting for the guild
+QUEUED = 1
+
+
+class ChunkScheduler:
+    """ Chunks guilds in the background, one at a time per shard.
+
+    Guilds are ordered by whether someone waits for them, their command
+    activity, whether automod or anti raid is enabled and their size.
+    Each shard waits ``delay`` seconds between two chunk requests, which
+    keeps chunking well under the gateway's 120 sends a minute. """
+
+    def __init__(self, bot, delay: float = 1.0, timeout: float = 60.0):
+        self.bot = bot
+        self.delay = delay
+        self.timeout = timeout
+        self.queues: Dict[int, List[Tuple]] = {}  # shard_id: heap of (urgency, priority, seq, guild_id)
+        self.queued: Dict[int, Tuple] = {}  # guild_id: its current heap entry, older entries are skipped
+        self.workers: Dict[int, asyncio.Task] = {}
+        self.waiters: Dict[int, asyncio.Future] = {}
+        self.activity = Counter()  # guild_id: commands used
+        self.counters = Counter(chunked=0, failed=0, members=0)
+        self._seq = count()
+
+    def stats(self) -> dict:
+        return dict(self.counters, queued=len(self.queued), waiting=len(self.waiters), shards=len(self.workers))
+
+    def priority(self, guild) -> tuple:
+        protected = bool(cm.get(self.bot, 'automod', guild.id) or cm.get(self.bot, 'raidmode', guild.id))
+        return -self.activity[guild.id], not protected, -(guild.member_count or 0)
+
+    def schedule(self, guild, urgent: bool = False) -> None:
+        if guild.chunked:
+            return
+        entry = (URGENT if urgent else QUEUED, self.priority(guild), next(self._seq), guild.id)
+        current = self.queued.get(guild.id)
+        if current is not None and current[:2] <= entry[:2]:
+            return
+        self.queued[guild.id] = entry
+        heapq.heappush(self.queues.setdefault(guild.shard_id, []), entry)
+
+        worker = self.workers.get(guild.shard_id)
+        if worker is None or worker.done():
+            self.workers[guild.shard_id] = self.bot.loop.create_task(self.worker(guild.shard_id))
+
+    def schedule_all(self, guilds: Iterable) -> None:
+        for guild in guilds:
+            self.schedule(guild)
+
+    def bump(self, guild) -> None:
+        """ Counts a command in the guild, so it's chunked sooner. """
+        self.activity[guild.id] += 1
+        self.schedule(guild)
+
+    async def wait(self, guild) -> None:
+        """ Chunks the guild ahead of the others and waits for it. """
+        if guild.chunked:
+            return
+        future = self.waiters.get(guild.id)
+        if future is None:
+            future = self.waiters[guild.id] = self.bot.loop.create_future()
+        self.schedule(guild, urgent=True)
+        await asyncio.shield(future)
+
+    async def members(self, guild, user_ids: List[int]) -> list:
+        """ Only the given members, without waiting for the whole guild. """
+        cached = [m for m in map(guild.get_member, user_ids) if m is not None]
+        if guild.chunked or len(cached) == len(user_ids):
+            return cached
+        missing = [x for x in user_ids if guild.get_member(x) is None]
+        for i in range(0, len(missing), 100):
+            cached += await guild.query_members(user_ids=missing[i:i + 100], cache=True)
+        return cached
+
+    async def worker(self, shard_id: int) -> None:
+        heap = self.queues[shard_id]
+        while heap:
+            entry = heapq.heappop(heap)
+            guild_id = entry[-1]
+            if self.queued.get(guild_id) is not entry:
+                continue
+            del self.queued[guild_id]
+
+            guild = self.bot.get_guild(guild_id)
+            requested = guild is not None and not guild.chunked
+            if requested:
+                try:
+                    members = await asyncio.wait_for(guild.chunk(cache=True), timeout=self.timeout)
+                    self.counters['chunked'] += 1
+                    self.counters['members'] += len(members)
+                except Exception as e:
+                    self.counters['failed'] += 1
+                    dredd_logger.error(f"[CHUNKER] Failed to chunk {guild_id}: {e}")
+
+            future: Optional[asyncio.Future] = self.waiters.pop(guild_id, None)
+            if future is not None and not future.done():
+                future.set_result(None)  # waiters go on even if chunking failed, they see what's cached
+            if requested:
+                await asyncio.sleep(self.delay)
+        del self.workers[shard_id]
+
+    def close(self) -> None:
+        for worker in self.workers.values():
+            worker.cancel()
+        for future in self.waiters.values():
+            future.cancel()
@@ -0,0 +1,255 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import logging
+
+from collections import Counter, OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+dredd_logger = logging.getLogger("dredd")
+
+UPSERT_QUERY = """
+INSERT INTO command_logs VALUES($1, $2, $3, $4)
+ON CONFLICT (user_id, guild_id, command) DO UPDATE
+SET usage = command_logs.usage + EXCLUDED.usage
+"""
+
+# command_logs summed per command, per guild and command, and per user and command. They're kept up to date
+# by every flush, the bot owner's usage is left out of the global and guild rollups like it is everywhere else
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS command_usage_global (command text PRIMARY KEY, usage bigint NOT NULL);
+CREATE TABLE IF NOT EXISTS command_usage_guilds (guild_id bigint, command text, usage bigint NOT NULL, PRIMARY KEY (guild_id, command));
+CREATE TABLE IF NOT EXISTS command_usage_users (user_id bigint, command text, usage bigint NOT NULL, PRIMARY KEY (user_id, command));
+"""
+BACKFILL_QUERIES = (
+    "INSERT INTO command_usage_global SELECT command, sum(usage) FROM command_logs WHERE user_id != $1 GROUP BY command",
+    "INSERT INTO command_usage_guilds SELECT guild_id, command, sum(usage) FROM command_logs WHERE user_id != $1 GROUP BY guild_id, command",
+    "INSERT INTO command_usage_users SELECT user_id, command, sum(usage) FROM command_logs GROUP BY user_id, command",
+)
+ROLLUP_UPSERTS = (
+    "INSERT INTO command_usage_global VALUES($1, $2) ON CONFLICT (command) DO UPDATE SET usage = command_usage_global.usage + EXCLUDED.usage",
+    "INSERT INTO command_usage_guilds VALUES($1, $2, $3) ON CONFLICT (guild_id, command) DO UPDATE SET usage = command_usage_guilds.usage + EXCLUDED.usage",
+    "INSERT INTO command_usage_users VALUES($1, $2, $3) ON CONFLICT (user_id, command) DO UPDATE SET usage = command_usage_users.usage + EXCLUDED.usage",
+)
+
+# top commands of a scope with the scope's total, from the rollups or from command_logs while they aren't set up
+TOP_QUERIES = {
+    'global': "SELECT command, usage AS sum, sum(usage) OVER () AS total FROM command_usage_global ORDER BY usage DESC LIMIT $1",
+    'guild': "SELECT command, usage AS sum, sum(usage) OVER () AS total FROM command_usage_guilds WHERE guild_id = $2 ORDER BY usage DESC LIMIT $1",
+    'user': "SELECT command, usage AS sum, sum(usage) OVER () AS total FROM command_usage_users WHERE user_id = $2 ORDER BY usage DESC LIMIT $1",
+}
+FALLBACK_QUERIES = {
+    'global': """SELECT command, sum(usage), sum(sum(usage)) OVER () AS total FROM command_logs
+                 WHERE user_id != $2 GROUP BY command ORDER BY sum(usage) DESC LIMIT $1""",
+    'guild': """SELECT command, sum(usage), sum(sum(usage)) OVER () AS total FROM command_logs
+                WHERE guild_id = $2 AND user_id != $3 GROUP BY command ORDER BY sum(usage) DESC LIMIT $1""",
+    'user': """SELECT command, sum(usage), sum(sum(usage)) OVER () AS total FROM command_logs
+               WHERE user_id = $2 GROUP BY command ORDER BY sum(usage) DESC LIMIT $1""",
+}
+COMMAND_QUERY = """SELECT (SELECT coalesce(sum(usage), 0) FROM command_usage_global WHERE command = $1)
+                        + (SELECT coalesce(sum(usage), 0) FROM command_usage_users WHERE user_id = $2 AND command = $1)"""
+
+
+def command_name(command) -> str:
+    if command.parent:
+        return f'{command.parent} {command.name}'
+    return command.name
+
+
+class TopK:
+    """ Approximate top ``size`` counts (space saving), memory stays bounded.
+
+    When it's full a new key takes over the smallest counter, so counts can be
+    overestimated by at most that counter, kept in ``errors``. """
+
+    __slots__ = ('size', 'counts', 'errors')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, key) -> bool:
+        return key in self.counts
+
+    def __getitem__(self, key) -> int:
+        return self.counts.get(key, 0)
+
+    def add(self, key, value: int = 1) -> None:
+        counts = self.counts
+        if key in counts:
+            counts[key] += value
+        elif len(counts) < self.size:
+            counts[key] = value
+            self.errors[key] = 0
+        else:
+            smallest = min(counts, key=counts.__getitem__)
+            floor = counts.pop(smallest)
+            del self.errors[smallest]
+            counts[key] = floor + value
+            self.errors[key] = floor
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        return Counter(self.counts).most_common(n)
+
+
+class CommandUsage:
+    """ Collects command usage and writes it to command_logs in batches.
+
+    Uses of the same (user, guild, command) are summed in memory and written
+    every ``interval`` seconds with one batched upsert, the rollup tables are
+    updated in the same transaction. A failed write keeps its counts for the
+    next one. Since boot totals are kept per command, and for the ``top`` most
+    active users and guilds.
+
+    Top commands are read from the rollups and cached until a flush changes
+    the scope. """
+
+    def __init__(self, bot, interval: float = 5.0, top: int = 100, cache_size: int = 1024):
+        self.bot = bot
+        self.interval = interval
+        self.pending = Counter()  # (user_id, guild_id, command): uses
+        self.commands = Counter()  # command: uses since boot
+        self.users = TopK(top)
+        self.guilds = TopK(top)
+        self.rollups = False  # set once the rollup tables exist and are filled
+        self.cache_size = cache_size
+        self.cache: 'OrderedDict[Tuple[str, Optional[int]], Tuple[int, list, int]]' = OrderedDict()  # (scope, id): (limit, top rows, total)
+        self.counters = Counter(used=0, flushes=0, rows=0, failed=0, cache_hits=0, cache_misses=0)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def stats(self) -> dict:
+        return dict(self.counters, pending=len(self.pending), cached=len(self.cache), rollups=self.rollups)
+
+    @property
+    def owner_id(self) -> int:
+        return self.bot.owner_id
+
+    async def setup(self) -> None:
+        """ Creates the rollup tables, filling them from command_logs the first time. """
+        async with self._lock:  # nothing is flushed while the rollups are filled
+            try:
+                async with self.bot.db.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.execute(ROLLUP_SCHEMA)
+                        if await conn.fetchval("SELECT NOT EXISTS (SELECT 1 FROM command_usage_users)"):
+                            await conn.execute("LOCK TABLE command_logs IN SHARE MODE")
+                            for query in BACKFILL_QUERIES:
+                                await conn.execute(query, *((self.owner_id,) if '$1' in query else ()))
+                            dredd_logger.info("[COMMAND USAGE] Filled the rollup tables from command_logs.")
+            except Exception as e:
+                dredd_logger.error(f"[COMMAND USAGE] Rollups are unavailable, reading command_logs instead: {e}")
+                return
+            self.rollups = True
+            self.cache.clear()
+
+    def add(self, ctx) -> None:
+        command = command_name(ctx.command)
+        guild_id = ctx.guild.id if ctx.guild else ctx.channel.id  # dms are logged under the channel
+        self.pending[ctx.author.id, guild_id, command] += 1
+        self.commands[command] += 1
+        self.users.add(ctx.author.id)
+        if ctx.guild:
+            self.guilds.add(ctx.guild.id)
+        self.counters['used'] += 1
+        self.start()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = self.bot.loop.create_task(self.run())
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def rollup_rows(self, pending: Counter) -> Tuple[list, list, list]:
+        commands, guilds, users = Counter(), Counter(), Counter()
+        for (user_id, guild_id, command), usage in pending.items():
+            users[user_id, command] += usage
+            if user_id != self.owner_id:
+                commands[command] += usage
+                guilds[guild_id, command] += usage
+        return (sorted(commands.items()),
+                sorted((guild_id, command, usage) for (guild_id, command), usage in guilds.items()),
+                sorted((user_id, command, usage) for (user_id, command), usage in users.items()))
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, Counter()
+            rows = sorted((user_id, guild_id, command, usage) for (user_id, guild_id, command), usage in pending.items())  # same lock order in every batch
+            try:
+                async with self.bot.db.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.executemany(UPSERT_QUERY, rows)
+                        if self.rollups:
+                            for query, rollup in zip(ROLLUP_UPSERTS, self.rollup_rows(pending)):
+                                await conn.executemany(query, rollup)
+            except Exception as e:
+                self.pending.update(pending)
+                self.counters['failed'] += 1
+                dredd_logger.error(f"[COMMAND USAGE] Failed to write {len(rows)} rows, retrying on the next flush: {e}")
+                return
+            self.counters['flushes'] += 1
+            self.counters['rows'] += len(rows)
+
+            self.cache.pop(('global', None), None)
+            for user_id, guild_id, command, usage in rows:
+                self.cache.pop(('guild', guild_id), None)
+                self.cache.pop(('user', user_id), None)
+
+    async def top(self, scope: str, id: Optional[int] = None, limit: int = 10) -> Tuple[list, int]:
+        """ Most used commands of everyone (global), a guild or a user, and their total.
+
+        Rows have ``command`` and ``sum`` like the old aggregate queries. The
+        bot owner's usage only counts in the user scope. """
+        key = (scope, id)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] >= limit:
+            self.cache.move_to_end(key)
+            self.counters['cache_hits'] += 1
+            return cached[1][:limit], cached[2]
+        self.counters['cache_misses'] += 1
+
+        if self.rollups:
+            args = (limit,) if scope == 'global' else (limit, id)
+            rows = await self.bot.db.fetch(TOP_QUERIES[scope], *args)
+        else:
+            args = {'global': (limit, self.owner_id), 'guild': (limit, id, self.owner_id), 'user': (limit, id)}[scope]
+            rows = await self.bot.db.fetch(FALLBACK_QUERIES[scope], *args)
+        total = int(rows[0]['total']) if rows else 0
+
+        self.cache[key] = (limit, rows, total)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return rows, total
+
+    async def used(self, command: str) -> int:
+        """ How many times the command was used, by everyone. """
+        if self.rollups:
+            return await self.bot.db.fetchval(COMMAND_QUERY, command, self.owner_id)
+        return await self.bot.db.fetchval("SELECT coalesce(sum(usage), 0) FROM command_logs WHERE command = $1", command)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        await self.flush()
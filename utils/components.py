@@ -25,6 +25,7 @@ from contextlib import suppress
 from utils import i18n, default, publicflags, paginator
 from utils.enums import PlaylistEnum, SelfRoles, ReactionRolesComponentDisplay, ReactionRolesEmbed, ReactionRolesMessageType
 from db.cache import ReactionRoles
+from utils.policy import invalidate_policy
 
 RURL = re.compile(r'https?://(?:www\.)?.+')
 SPOTIFY_RURL = re.compile(r'https?://open.spotify.com/(?P<type>album|playlist|track)/(?P<id>[a-zA-Z0-9]+)')
@@ -860,6 +861,7 @@ class AutomodTimeSelect(discord.ui.Select):
             elif int(value) == 5:
                 await self.ctx.bot.db.execute("UPDATE links SET time = $1 WHERE guild_id = $2", duration, guild_id)
                 self.ctx.bot.links[guild_id]["time"] = duration
+        invalidate_policy(self.ctx.bot, guild_id)
 
         return await interaction.response.send_message(_("{0} Successfully set the duration to {duration}.").format(self.ctx.bot.settings['emojis']['misc']['white-mark'], duration=duration))
 
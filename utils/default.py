@@ -283,6 +283,7 @@ async def execute_temporary(ctx, action, user, mod, guild, role, duration, reaso
                                  mod.id, role.id, reason)
         if duration:
             ctx.bot.temp_mutes[f"{user.id}, {guild.id}"] = {'time': duration, 'reason': reason, 'role': role.id, 'moderator': mod.id}
+            ctx.bot.expiry.schedule((action, user.id, guild.id), duration)
         else:
             ctx.bot.mutes[f"{user.id}, {guild.id}"] = {'reason': reason, 'role': role.id, 'moderator': mod.id}
     elif action == 2:
@@ -290,12 +291,14 @@ async def execute_temporary(ctx, action, user, mod, guild, role, duration, reaso
                                  mod.id, None, reason)
         if duration:
             ctx.bot.temp_bans[f"{user.id}, {guild.id}"] = {'time': duration, 'reason': reason, 'moderator': mod.id}
+            ctx.bot.expiry.schedule((action, user.id, guild.id), duration)
         else:
             ctx.bot.bans[f"{user.id}, {guild.id}"] = {'reason': reason, 'moderator': mod.id}
 
 
 async def execute_untemporary(ctx, action, user, guild):
     await ctx.bot.db.execute("DELETE FROM modactions WHERE user_id = $1 AND guild_id = $2", user.id, guild.id)
+    ctx.bot.expiry.cancel((action, user.id, guild.id))
     if action == 1:
         ctx.bot.temp_mutes.pop(f"{user.id}, {guild.id}", None)
         ctx.bot.mutes.pop(f"{user.id}, {guild.id}", None)
@@ -304,6 +307,16 @@ async def execute_untemporary(ctx, action, user, guild):
         ctx.bot.bans.pop(f"{user.id}, {guild.id}", None)
 
 
+async def execute_untemporary_many(ctx, action, user_ids: List[int], guild_id: int):
+    await ctx.bot.db.execute("DELETE FROM modactions WHERE guild_id = $1 AND user_id = ANY($2::bigint[])", guild_id, user_ids)
+    cache = ctx.bot.temp_mutes if action == 1 else ctx.bot.temp_bans
+    permanent = ctx.bot.mutes if action == 1 else ctx.bot.bans
+    for user_id in user_ids:
+        ctx.bot.expiry.cancel((action, user_id, guild_id))
+        cache.pop(f"{user_id}, {guild_id}", None)
+        permanent.pop(f"{user_id}, {guild_id}", None)
+
+
 # noinspection PyUnboundLocalVariable,PyUnusedLocal
 async def get_muterole(ctx, guild, error=False):
     custom = guild.data.muterole
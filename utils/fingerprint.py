@@ -0,0 +1,173 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import re
+import unicodedata
+
+from array import array
+from typing import List, Optional, Tuple
+
+NON_WORD = re.compile(r'[\W_]+')
+REPEATS = re.compile(r'(.)\1+')
+
+SHINGLE = 4  # characters per shingle
+MAX_LENGTH = 512  # only the start of very long messages is fingerprinted
+MIN_LENGTH = 8  # shorter messages are left to the exact duplicate check
+BANDS, ROWS = 4, 3  # 12 min hashes, messages share a band if they're likely near duplicates
+SEEDS = tuple(int.from_bytes(hashlib.blake2b(str(i).encode(), digest_size=8).digest(), 'big') for i in range(BANDS * ROWS))
+
+
+def normalize(content: str) -> str:
+    # "FREE   nitro!!!", "free nitrooo" and "ｆｒｅｅ ｎｉｔｒｏ" all become "frenitro"
+    text = unicodedata.normalize('NFKD', content[:MAX_LENGTH]).casefold()
+    return REPEATS.sub(r'\1', NON_WORD.sub('', text))
+
+
+def signature(text: str) -> Tuple[int, ...]:
+    shingles = {hash(text[i:i + SHINGLE]) for i in range(max(len(text) - SHINGLE + 1, 1))}
+    return tuple(min(map(seed.__xor__, shingles)) for seed in SEEDS)
+
+
+def bands(content: str) -> Optional[List[int]]:
+    """ Locality sensitive keys of the content, None if it's too short to fingerprint. """
+    text = normalize(content)
+    if len(text) < MIN_LENGTH:
+        return None
+    sig = signature(text)
+    return [hash((band, sig[band * ROWS:band * ROWS + ROWS])) for band in range(BANDS)]
+
+
+class SketchWindow:
+    """ Sliding window of approximate counters in a fixed amount of memory.
+
+    Counters are a count-min sketch (``depth`` rows of ``width`` slots), there's
+    one for the current and one for the previous window. Estimates can only be
+    too high when keys collide, never too low. """
+
+    def __init__(self, per: float, width: int = 1 << 16, depth: int = 2):
+        self.per = per
+        self.width = width
+        self.depth = depth
+        self.start = 0.0
+        self.current = self._table()
+        self.previous = self._table()
+
+    def _table(self) -> array:
+        return array('H', bytes(2 * self.width * self.depth))
+
+    @property
+    def bytes_used(self) -> int:
+        return 2 * self.current.itemsize * len(self.current)
+
+    def _rotate(self, now: float) -> float:
+        elapsed = now - self.start
+        if elapsed >= self.per:
+            windows = int(elapsed // self.per)
+            self.previous = self.current if windows == 1 else self._table()
+            self.current = self._table()
+            self.start += windows * self.per
+            elapsed -= windows * self.per
+        return 1.0 - elapsed / self.per
+
+    def _slots(self, key: int) -> List[int]:
+        key &= 0xFFFFFFFFFFFFFFFF
+        return [row * self.width + (key >> (row * 16)) % self.width for row in range(self.depth)]
+
+    def add(self, key: int, now: float) -> float:
+        weight = self._rotate(now)
+        current, previous = self.current, self.previous
+        estimate = None
+        for slot in self._slots(key):
+            if current[slot] < 0xFFFF:
+                current[slot] += 1
+            count = previous[slot] * weight + current[slot]
+            estimate = count if estimate is None else min(estimate, count)
+        return estimate
+
+    def get(self, key: int, now: float) -> float:
+        weight = self._rotate(now)
+        return min(self.previous[slot] * weight + self.current[slot] for slot in self._slots(key))
+
+    def discard(self, key: int, now: float) -> None:
+        """ Takes the key's count out of both windows, keys sharing its slots can end up under counted. """
+        self._rotate(now)
+        slots = self._slots(key)
+        for table in (self.current, self.previous):
+            count = min(table[slot] for slot in slots)
+            for slot in slots:
+                table[slot] -= count
+
+
+class NearDuplicateDetector:
+    """ Groups near duplicate messages per channel and per guild.
+
+    ``check`` returns ``'channel'`` when a channel is flooded with the same
+    message and the author sent it at least ``min_repeats`` times, ``'guild'``
+    when several accounts post it across the guild and the author either
+    repeated it or is a new member, and None otherwise. A scope's count starts
+    over once it triggered, so others joining in on the same message aren't
+    punished with it. Memory doesn't grow with the amount of messages. """
+
+    def __init__(self, per: float = 20.0, channel_limit: int = 12, guild_limit: int = 20, min_authors: int = 4, min_repeats: int = 3):
+        self.channel_limit = channel_limit
+        self.guild_limit = guild_limit
+        self.min_authors = min_authors
+        self.min_repeats = min_repeats
+        self.counts = SketchWindow(per)
+        self.authors = SketchWindow(per)  # distinct authors per guild and band
+
+    @property
+    def bytes_used(self) -> int:
+        return self.counts.bytes_used + self.authors.bytes_used
+
+    def check(self, message, now: float, new_member: bool = False) -> Optional[str]:
+        """ Verdict for the message, everyone posting the same text once is just chatter.
+
+        >>> from types import SimpleNamespace as NS
+        >>> detector = NearDuplicateDetector()
+        >>> [detector.check(NS(content='happy new year everyone!', channel=NS(id=i % 3), guild=NS(id=1), author=NS(id=i)), i * 0.3)
+        ...  for i in range(30)].count(None)
+        30
+        """
+        keys = bands(message.content)
+        if not keys:
+            return None
+
+        channel_id, guild_id, author_id = message.channel.id, message.guild.id, message.author.id
+        channel = guild = authors = repeats = posted = 0.0
+        for band in keys:
+            channel = max(channel, self.counts.add(hash((channel_id, band)), now))
+            repeats = max(repeats, self.counts.add(hash((channel_id, band, author_id)), now))
+            guild = max(guild, self.counts.add(hash((guild_id, band)), now))
+            author = self.authors.add(hash((guild_id, band, author_id)), now)
+            posted = max(posted, author)
+            if author < 1.5:  # first time this author posted it
+                authors = max(authors, self.authors.add(hash((guild_id, band)), now))
+            else:
+                authors = max(authors, self.authors.get(hash((guild_id, band)), now))
+
+        if guild > self.guild_limit and authors >= self.min_authors and (posted >= self.min_repeats or new_member):
+            for band in keys:
+                self.counts.discard(hash((guild_id, band)), now)
+                self.authors.discard(hash((guild_id, band)), now)
+                self.authors.discard(hash((guild_id, band, author_id)), now)
+            return 'guild'
+        if channel > self.channel_limit and repeats >= self.min_repeats:
+            for band in keys:
+                self.counts.discard(hash((channel_id, band)), now)
+                self.counts.discard(hash((channel_id, band, author_id)), now)
+            return 'channel'
+        return None
@@ -0,0 +1,85 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import discord
+
+from contextlib import suppress
+from typing import Optional
+from utils.lru import TTLCache, MISSING
+
+
+class InviteResolver:
+    """ Resolves invite codes to the guild id they point to.
+
+    Valid codes are cached for ``ttl`` seconds, invalid ones for ``negative_ttl``.
+    Concurrent lookups of the same code share a single request. """
+
+    def __init__(self, bot, maxsize: int = 10000, ttl: float = 3600.0, negative_ttl: float = 300.0):
+        self.bot = bot
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)  # code: guild id, None if the invite is invalid
+        self.seeded = set()  # guild ids
+        self._inflight = {}  # code: future
+
+    def put(self, code: str, guild_id: Optional[int]) -> None:
+        self.cache.set(code, guild_id, ttl=None if guild_id else self.negative_ttl)
+
+    async def seed(self, guild: discord.Guild) -> None:
+        if guild.id in self.seeded:
+            return
+        self.seeded.add(guild.id)
+
+        if guild.vanity_url_code:
+            self.put(guild.vanity_url_code, guild.id)
+        if guild.me.guild_permissions.manage_guild:
+            with suppress(discord.HTTPException):
+                for invite in await guild.invites():
+                    self.put(invite.code, guild.id)
+
+    async def resolve(self, code: str) -> Optional[int]:
+        guild_id = self.cache.get(code, MISSING)
+        if guild_id is not MISSING:
+            return guild_id
+
+        future = self._inflight.get(code)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = self.bot.loop.create_future()
+        self._inflight[code] = future
+        try:
+            guild_id = await self.fetch(code)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark it as retrieved in case nobody else was waiting
+            raise
+        else:
+            future.set_result(guild_id)
+            return guild_id
+        finally:
+            self._inflight.pop(code, None)
+
+    async def fetch(self, code: str) -> Optional[int]:
+        try:
+            invite = await self.bot.fetch_invite(code, with_counts=False)
+            guild_id = invite.guild.id if invite.guild else None
+        except discord.NotFound:
+            guild_id = None
+        self.put(code, guild_id)
+        return guild_id
@@ -16,7 +16,6 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import time
 import logging
 
-from utils.enums import LogType
 from logging.handlers import RotatingFileHandler
 
 dredd_logger = logging.getLogger("dredd")
@@ -85,13 +84,5 @@ discord_logger.addHandler(handler)
 
 
 async def new_log(bot, timestamp: time, type: int, value: int):
-    if not LogType.has_value(type):
-        type = -1
-        return dredd_logger.warning(f"{LogType(type)} - unknown log type, tried adding {value}")
-    dredd_logger.info(f"{LogType(type)} - added {value}")
-    query = "SELECT time FROM logging WHERE type = $1 and time > extract(epoch from now())::int - 86400"
-    check = await bot.db.fetchval(query, type)  # keep adding +(value) if there are results in the last 24 hours
-    if not check or type in {1, 2, 6, } and type != 10:
-        await bot.db.execute("INSERT INTO logging VALUES($1, $2, $3)", timestamp, type, value)
-    else:
-        await bot.db.execute("UPDATE logging SET value = value + $1 WHERE type = $2 AND time = $3", value, type, check)
+    # counted in memory and written in batches by bot.log_stats, see utils/logstats.py
+    bot.log_stats.add(type, value, timestamp)
@@ -0,0 +1,198 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import discord
+import logging
+
+from collections import Counter, deque
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+from utils import default
+
+dredd_logger = logging.getLogger("dredd")
+
+MAX_CONTENT = 2000
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+
+
+class LogSink:
+    """ Coalesces log messages per channel and sends them in the background.
+
+    Every channel has a bounded queue, when it's full the oldest entry is
+    dropped. A channel is flushed once it has enough entries to fill a message
+    or its oldest entry waited ``interval`` seconds. Text lines are joined into
+    as few messages as possible and embeds are sent up to 10 per message.
+    When a channel can't be sent to anymore, the error is reported with
+    ``default.background_error`` like a failed direct send was. """
+
+    def __init__(self, bot, maxsize: int = 100, interval: float = 5.0, max_retries: int = 3):
+        self.bot = bot
+        self.maxsize = maxsize
+        self.interval = interval
+        self.max_retries = max_retries
+        self.queues: Dict[int, deque] = {}  # channel_id: deque of (queued at, content, embed)
+        self.retry_at: Dict[int, float] = {}  # channel_id: monotonic time, set when sending failed
+        self.retries = Counter()  # channel_id: failed attempts in a row
+        self.sources: Dict[int, tuple] = {}  # channel_id: (channel, event) of the latest log, for error reports
+        self.counters = Counter(queued=0, sent=0, messages=0, dropped=0, failed=0)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def stats(self) -> dict:
+        return dict(self.counters, pending=len(self), channels=len(self.queues))
+
+    def send(self, channel, content: Optional[str] = None, *, embed: Optional[discord.Embed] = None, event: str = '`log sink`') -> bool:
+        """ Queues a log, returns False if the channel can't take it. """
+        if channel is None or content is None and embed is None:
+            return False
+        self.sources[channel.id] = (channel, event)
+
+        queue = self.queues.get(channel.id)
+        if queue is None:
+            queue = self.queues[channel.id] = deque()
+        if len(queue) >= self.maxsize:
+            queue.popleft()
+            self.counters['dropped'] += 1
+        queue.append((monotonic(), content, embed))
+        self.counters['queued'] += 1
+
+        if len(queue) >= MAX_EMBEDS:
+            self._wakeup.set()
+        self.start()
+        return True
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = self.bot.loop.create_task(self.run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        for channel_id in list(self.queues):
+            await self.flush(channel_id)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval / 2)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            now = monotonic()
+            for channel_id, queue in list(self.queues.items()):
+                if not queue:
+                    del self.queues[channel_id]
+                elif self.retry_at.get(channel_id, 0) <= now and (len(queue) >= MAX_EMBEDS or now - queue[0][0] >= self.interval):
+                    try:
+                        await self.flush(channel_id)
+                    except Exception as e:
+                        dredd_logger.error(f"[LOG SINK] Failed to flush {channel_id}: {e}")
+
+    @staticmethod
+    def batches(entries) -> List[Tuple[dict, int]]:
+        # consecutive text lines become one message, consecutive embeds are grouped 10 at a time
+        batches, lines, embeds, size = [], [], [], 0
+
+        def emit():
+            nonlocal lines, embeds, size
+            if lines:
+                batches.append(({'content': '\n'.join(lines)}, len(lines)))
+            if embeds:
+                batches.append(({'embeds': embeds}, len(embeds)))
+            lines, embeds, size = [], [], 0
+
+        for _, content, embed in entries:
+            if content is not None:
+                content = content[:MAX_CONTENT]
+                if embeds or size + len(content) + len(lines) > MAX_CONTENT:
+                    emit()
+                lines.append(content)
+                size += len(content)
+            if embed is not None:
+                if lines or len(embeds) >= MAX_EMBEDS or size + len(embed) > MAX_EMBED_CHARS:
+                    emit()
+                embeds.append(embed)
+                size += len(embed)
+        emit()
+        return batches
+
+    async def flush(self, channel_id: int) -> None:
+        queue = self.queues.pop(channel_id, None)
+        if not queue:
+            return
+
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            self.counters['dropped'] += len(queue)
+            await self.report(channel_id, LookupError(f"log channel {channel_id} was deleted"))
+            return
+
+        batches = self.batches(queue)
+        for i, (batch, count) in enumerate(batches):
+            try:
+                await channel.send(**batch)
+            except (discord.Forbidden, discord.NotFound) as e:
+                self.counters['dropped'] += sum(c for _, c in batches[i:])
+                self.retries.pop(channel_id, None)
+                await self.report(channel_id, e)
+                return
+            except discord.HTTPException as e:
+                # discord.py already waited out the rate limits it could, back off and try the rest later
+                self.retries[channel_id] += 1
+                if self.retries[channel_id] > self.max_retries:
+                    self.retries.pop(channel_id, None)
+                    self.counters['failed'] += count
+                    continue
+                retry_after = getattr(e, 'retry_after', None) or 2 ** self.retries[channel_id]
+                self.retry_at[channel_id] = monotonic() + retry_after
+                self.requeue(channel_id, batches[i:])
+                return
+            self.counters['messages'] += 1
+            self.counters['sent'] += count
+
+        self.retries.pop(channel_id, None)
+        self.retry_at.pop(channel_id, None)
+        if channel_id not in self.queues:
+            self.sources.pop(channel_id, None)
+
+    async def report(self, channel_id: int, error: Exception) -> None:
+        # the logs can't be delivered until the guild fixes the channel, same report a direct send used to give
+        channel, event = self.sources.pop(channel_id, (None, None))
+        if channel is None:
+            return
+        try:
+            await default.background_error(self, event, error, channel.guild, channel)
+        except Exception as e:
+            dredd_logger.error(f"[LOG SINK] Failed to report the error of {channel_id}: {e}")
+
+    def requeue(self, channel_id: int, batches: List[Tuple[dict, int]]) -> None:
+        now = monotonic()
+        entries = []
+        for batch, _ in batches:
+            if 'content' in batch:
+                entries.append((now, batch['content'], None))
+            else:
+                entries.extend((now, None, embed) for embed in batch['embeds'])
+
+        queue = self.queues.get(channel_id)
+        if queue is not None:  # logged while we were sending
+            entries.extend(queue)
+        self.queues[channel_id] = deque(entries)
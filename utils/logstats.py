@@ -0,0 +1,110 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import logging
+
+from collections import Counter
+from time import time
+from typing import List, Optional, Tuple
+
+from utils.enums import LogType
+
+dredd_logger = logging.getLogger("dredd")
+
+# every event of these types gets its own row, the others are summed into one row per day
+EVENT_TYPES = frozenset({LogType.guild_add.value, LogType.guild_remove.value, LogType.error_occured.value})
+
+# adds to the type's row from the last 24 hours, or starts a new one, in a single round trip
+UPSERT_QUERY = """
+WITH current AS (
+    SELECT time FROM logging WHERE type = $1 AND time > extract(epoch from now())::int - 86400 ORDER BY time DESC LIMIT 1
+), updated AS (
+    UPDATE logging SET value = value + $2 WHERE type = $1 AND time = (SELECT time FROM current) RETURNING 1
+)
+INSERT INTO logging SELECT $3, $1, $2 WHERE NOT EXISTS (SELECT 1 FROM updated)
+"""
+
+
+class LogStats:
+    """ Counts logging stats in memory and writes them every ``interval`` seconds.
+
+    ``pending`` is what wasn't written yet, ``totals`` everything counted since
+    boot. A flush writes one statement per type, counts of a failed flush are
+    kept for the next one. """
+
+    def __init__(self, bot, interval: float = 60.0):
+        self.bot = bot
+        self.interval = interval
+        self.pending = Counter()  # type: value
+        self.events: List[Tuple[float, int, int]] = []  # (timestamp, type, value) rows of EVENT_TYPES
+        self.totals = Counter()  # type: value since boot
+        self.counters = Counter(flushes=0, statements=0, failed=0)
+        self._task: Optional[asyncio.Task] = None
+
+    def stats(self) -> dict:
+        return dict(self.counters, pending=sum(self.pending.values()) + len(self.events))
+
+    def total(self, type: LogType) -> int:
+        return self.totals[type.value]
+
+    def add(self, type: int, value: int = 1, timestamp: Optional[float] = None) -> None:
+        if not LogType.has_value(type):
+            dredd_logger.warning(f"{LogType(-1)} - unknown log type {type}, tried adding {value}")
+            return
+        if type in EVENT_TYPES:
+            self.events.append((time() if timestamp is None else timestamp, type, value))
+        else:
+            self.pending[type] += value
+        self.totals[type] += value
+        self.start()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = self.bot.loop.create_task(self.run())
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        pending, self.pending = self.pending, Counter()
+        events, self.events = self.events, []
+        if not pending and not events:
+            return
+        now = time()
+        try:
+            async with self.bot.db.acquire() as conn:
+                async with conn.transaction():
+                    if events:
+                        await conn.executemany("INSERT INTO logging VALUES($1, $2, $3)", events)
+                    for type, value in pending.items():
+                        await conn.execute(UPSERT_QUERY, type, value, now)
+        except Exception as e:
+            self.pending.update(pending)
+            self.events[:0] = events
+            self.counters['failed'] += 1
+            dredd_logger.error(f"[LOG STATS] Failed to write {len(pending) + len(events)} stats, retrying on the next flush: {e}")
+            return
+        self.counters['flushes'] += 1
+        self.counters['statements'] += len(pending) + bool(events)
+        dredd_logger.info(f"[LOG STATS] Wrote {', '.join(f'{LogType(t).name} +{v}' for t, v in pending.items()) or 'no counters'}"
+                          f" and {len(events)} events.")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        await self.flush()
@@ -0,0 +1,236 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from array import array
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from db.cache import CacheManager as cm
+from typing import Dict, NamedTuple, Optional, Tuple
+
+SLOT_BYTES = 4 * 8 + 1 + 3 * 8  # ids, channels, authors, created at, bot flag, three list pointers
+
+
+class StoredMessage(NamedTuple):
+    id: int
+    guild_id: int
+    channel_id: int
+    author_id: int
+    bot: bool
+    content: str
+    attachments: Tuple[str, ...]  # urls
+    sticker: Optional[Tuple[str, str]]  # name, description
+    created_at: float
+
+    @property
+    def jump_url(self) -> str:
+        return f'https://discord.com/channels/{self.guild_id}/{self.channel_id}/{self.id}'
+
+    @property
+    def created(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at, timezone.utc)
+
+
+def message_size(content: str, attachments, sticker) -> int:
+    size = len(content) + sum(len(x) for x in attachments)
+    if sticker is not None:
+        size += len(sticker[0]) + len(sticker[1])
+    return size
+
+
+class MessageRing:
+    """ The latest messages of one guild, oldest ones are overwritten.
+
+    Numbers live in arrays and a dict maps message ids to their slot. The
+    ring starts small and doubles until it reaches ``capacity``. """
+
+    __slots__ = ('guild_id', 'capacity', 'ids', 'channels', 'authors', 'created', 'bots', 'contents', 'attachments',
+                 'stickers', 'index', 'start', 'size', 'bytes')
+
+    def __init__(self, guild_id: int, capacity: int, initial: int = 16):
+        self.guild_id = guild_id
+        self.capacity = capacity
+        self.index: Dict[int, int] = {}  # message_id: slot
+        self.start = 0
+        self.size = 0
+        self.bytes = 0
+        self.allocate(min(initial, capacity))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def slots(self) -> int:
+        return len(self.ids)
+
+    @property
+    def footprint(self) -> int:
+        return self.bytes + self.slots * SLOT_BYTES
+
+    def allocate(self, slots: int) -> None:
+        # re-lays the ring out from slot 0, oldest first
+        order = [(self.start + i) % self.slots for i in range(self.size)] if self.size else []
+        old = (self.ids, self.channels, self.authors, self.created, self.bots, self.contents, self.attachments, self.stickers) if order else None
+        self.ids, self.channels, self.authors = array('Q', bytes(8 * slots)), array('Q', bytes(8 * slots)), array('Q', bytes(8 * slots))
+        self.created, self.bots = array('d', bytes(8 * slots)), array('b', bytes(slots))
+        self.contents, self.attachments, self.stickers = [None] * slots, [None] * slots, [None] * slots
+        if old:
+            for new_slot, old_slot in enumerate(order):
+                for target, source in zip((self.ids, self.channels, self.authors, self.created, self.bots, self.contents, self.attachments, self.stickers), old):
+                    target[new_slot] = source[old_slot]
+            self.index = {self.ids[slot]: slot for slot in range(len(order)) if self.contents[slot] is not None}
+        self.start = 0
+
+    def push(self, message_id: int, channel_id: int, author_id: int, bot: bool, content: str, attachments, sticker, created_at: float) -> int:
+        """ Stores the message, returns the bytes it freed by overwriting the oldest one. """
+        freed = 0
+        if self.size == self.slots:
+            if self.slots < self.capacity:
+                self.allocate(min(self.slots * 2, self.capacity))
+            else:
+                freed = self.pop_oldest()
+        slot = (self.start + self.size) % self.slots
+        self.size += 1
+
+        self.ids[slot], self.channels[slot], self.authors[slot] = message_id, channel_id, author_id
+        self.created[slot], self.bots[slot] = created_at, bot
+        self.contents[slot], self.attachments[slot], self.stickers[slot] = content, attachments or None, sticker
+        self.index[message_id] = slot
+        self.bytes += message_size(content, attachments, sticker)
+        return freed
+
+    def pop_oldest(self) -> int:
+        if not self.size:
+            return 0
+        slot = self.start
+        freed = self.clear_slot(slot)
+        self.start = (self.start + 1) % self.slots
+        self.size -= 1
+        return freed
+
+    def clear_slot(self, slot: int) -> int:
+        content = self.contents[slot]
+        if content is None:  # deleted already
+            return 0
+        freed = message_size(content, self.attachments[slot] or (), self.stickers[slot])
+        if self.index.get(self.ids[slot]) == slot:
+            del self.index[self.ids[slot]]
+        self.contents[slot] = self.attachments[slot] = self.stickers[slot] = None
+        self.bytes -= freed
+        return freed
+
+    def get(self, message_id: int) -> Optional[StoredMessage]:
+        slot = self.index.get(message_id)
+        if slot is None:
+            return None
+        return StoredMessage(message_id, self.guild_id, self.channels[slot], self.authors[slot], bool(self.bots[slot]),
+                             self.contents[slot], self.attachments[slot] or (), self.stickers[slot], self.created[slot])
+
+    def edit(self, message_id: int, content: str) -> int:
+        """ Replaces the content, returns the change in bytes. """
+        slot = self.index[message_id]
+        delta = len(content) - len(self.contents[slot])
+        self.contents[slot] = content
+        self.bytes += delta
+        return delta
+
+    def delete(self, message_id: int) -> int:
+        slot = self.index.get(message_id)
+        return 0 if slot is None else self.clear_slot(slot)
+
+
+class MessageStore:
+    """ Compact copies of recent guild messages for edit/delete logs and snipes.
+
+    Only the fields the logs need are kept, in one ring per guild. Guilds are
+    covered when they log edits or deletes, or for authors that didn't opt out
+    of snipes. When the store goes over ``budget`` bytes the oldest messages
+    are dropped, first from the guild that went over its share, then from the
+    other guilds in turn. """
+
+    def __init__(self, bot, budget: int = 32 * 1024 * 1024, capacity: int = 2048):
+        self.bot = bot
+        self.budget = budget
+        self.capacity = capacity  # messages per guild
+        self.rings: 'OrderedDict[int, MessageRing]' = OrderedDict()
+        self.used = 0  # bytes, approximate
+        self.counters = Counter(stored=0, hits=0, misses=0, evicted=0)
+
+    def __len__(self) -> int:
+        return sum(len(ring) for ring in self.rings.values())
+
+    def stats(self) -> dict:
+        return dict(self.counters, messages=len(self), guilds=len(self.rings), bytes=self.used, budget=self.budget)
+
+    def wants(self, message) -> bool:
+        guild_id = message.guild.id
+        return bool(cm.get(self.bot, 'messageedits', guild_id) or cm.get(self.bot, 'messagedeletes', guild_id)
+                    or not cm.get(self.bot, 'snipes_op', message.author.id))
+
+    def add(self, message) -> None:
+        ring = self.rings.get(message.guild.id)
+        if ring is None:
+            ring = self.rings[message.guild.id] = MessageRing(message.guild.id, self.capacity)
+            self.used += ring.footprint
+
+        sticker = None
+        if message.stickers:
+            sticker = (message.stickers[0].name, getattr(message.stickers[0], 'description', None) or '')
+        before = ring.footprint
+        if ring.push(message.id, message.channel.id, message.author.id, message.author.bot, message.content,
+                     tuple(a.url for a in message.attachments), sticker, message.created_at.timestamp()):
+            self.counters['evicted'] += 1
+        self.counters['stored'] += 1
+        self.used += ring.footprint - before
+        if self.used > self.budget:
+            self.reclaim(ring)
+
+    def reclaim(self, ring: MessageRing) -> None:
+        while self.used > self.budget and self.rings:
+            share = self.budget / len(self.rings)
+            if ring.footprint > share and len(ring) > 1:
+                victim = ring
+            else:
+                guild_id, victim = next(iter(self.rings.items()))
+                self.rings.move_to_end(guild_id)
+                if not len(victim):
+                    del self.rings[guild_id]
+                    self.used -= victim.footprint
+                    continue
+            self.used -= victim.pop_oldest()
+            self.counters['evicted'] += 1
+
+    def get(self, guild_id: int, message_id: int) -> Optional[StoredMessage]:
+        ring = self.rings.get(guild_id)
+        message = ring.get(message_id) if ring is not None else None
+        self.counters['hits' if message else 'misses'] += 1
+        return message
+
+    def edit(self, guild_id: int, message_id: int, content: str) -> Optional[StoredMessage]:
+        """ Updates the content, returns the message as it was before. """
+        before = self.get(guild_id, message_id)
+        if before is not None and before.content != content:
+            self.used += self.rings[guild_id].edit(message_id, content)
+        return before
+
+    def delete(self, guild_id: int, message_id: int) -> Optional[StoredMessage]:
+        message = self.get(guild_id, message_id)
+        if message is not None:
+            self.used -= self.rings[guild_id].delete(message_id)
+        return message
+
+    def remove_guild(self, guild_id: int) -> None:
+        ring = self.rings.pop(guild_id, None)
+        if ring is not None:
+            self.used -= ring.footprint
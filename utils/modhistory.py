@@ -0,0 +1,166 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import logging
+
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from utils.paginator import LazyPages
+
+dredd_logger = logging.getLogger("dredd")
+
+HISTORY_INDEX = "CREATE INDEX IF NOT EXISTS modlog_history_idx ON modlog (guild_id, user_id, case_num)"
+
+# history only lists cases that have a reason
+HISTORY_FILTER = "guild_id = $1 AND user_id = $2 AND coalesce(reason, '') != ''"
+SUMMARY_QUERY = f"""SELECT count(*) AS total, count(*) FILTER (WHERE action = 1) AS bans, count(*) FILTER (WHERE action = 2) AS kicks,
+                           count(*) FILTER (WHERE action = 3) AS softbans, count(*) FILTER (WHERE action = 4) AS mutes,
+                           count(*) FILTER (WHERE action = 5) AS warns
+                    FROM modlog WHERE {HISTORY_FILTER}"""
+PAGE_AFTER = f"SELECT case_num, action, mod_id, reason FROM modlog WHERE {HISTORY_FILTER} AND case_num > $3 ORDER BY case_num LIMIT $4"
+PAGE_BEFORE = f"SELECT case_num, action, mod_id, reason FROM modlog WHERE {HISTORY_FILTER} AND case_num < $3 ORDER BY case_num DESC LIMIT $4"
+PAGE_OFFSET = f"SELECT case_num, action, mod_id, reason FROM modlog WHERE {HISTORY_FILTER} ORDER BY case_num OFFSET $3 LIMIT $4"
+
+FIRST_CASE = -1
+LAST_CASE = 2 ** 31 - 1
+
+
+def action_name(action: int) -> str:
+    return {
+        1: _('ban'), 2: _('kick'), 3: _('softban'), 4: _('mute'), 5: _('warn'), 6: _('unban'),
+        7: _('unmute'), 8: _('voice mute'), 9: _('voice unmute'), 10: _('dehoist'),
+    }.get(action, _('unknown'))
+
+
+class ModHistory:
+    """ Reads modlog cases for the moderation commands.
+
+    Cases looked up by number are kept in a small LRU per guild, shared by
+    showcase, reason and deletecase. Anything that changes a case has to go
+    through here, or call ``forget``. """
+
+    def __init__(self, bot, per_guild: int = 32, guilds: int = 1000):
+        self.bot = bot
+        self.per_guild = per_guild
+        self.max_guilds = guilds
+        self.cases: 'OrderedDict[int, OrderedDict[int, dict]]' = OrderedDict()  # guild_id: {case_num: first modlog row}
+        self.counters = Counter(hits=0, misses=0)
+
+    def stats(self) -> dict:
+        return dict(self.counters, guilds=len(self.cases), cases=sum(len(x) for x in self.cases.values()))
+
+    async def setup(self) -> None:
+        try:
+            await self.bot.db.execute(HISTORY_INDEX)
+        except Exception as e:
+            dredd_logger.error(f"[MOD HISTORY] Couldn't create the history index: {e}")
+
+    def remember(self, guild_id: int, case_num: int, case: dict) -> None:
+        cached = self.cases.get(guild_id)
+        if cached is None:
+            cached = self.cases[guild_id] = OrderedDict()
+            if len(self.cases) > self.max_guilds:
+                self.cases.popitem(last=False)
+        self.cases.move_to_end(guild_id)
+        cached[case_num] = case
+        cached.move_to_end(case_num)
+        if len(cached) > self.per_guild:
+            cached.popitem(last=False)
+
+    def forget(self, guild_id: int, case_num: int) -> None:
+        cached = self.cases.get(guild_id)
+        if cached is not None:
+            cached.pop(case_num, None)
+
+    async def get_case(self, guild_id: int, case_num: int) -> Optional[dict]:
+        cached = self.cases.get(guild_id)
+        case = cached.get(case_num) if cached is not None else None
+        if case is not None:
+            self.counters['hits'] += 1
+            self.cases.move_to_end(guild_id)
+            cached.move_to_end(case_num)
+            return case
+
+        self.counters['misses'] += 1
+        row = await self.bot.db.fetchrow("SELECT * FROM modlog WHERE guild_id = $1 AND case_num = $2 LIMIT 1", guild_id, case_num)
+        if row is None:
+            return None
+        case = dict(row)
+        self.remember(guild_id, case_num, case)
+        return case
+
+    async def set_reason(self, guild_id: int, case_num: int, reason: str) -> None:
+        await self.bot.db.execute("UPDATE modlog SET reason = $1 WHERE guild_id = $2 AND case_num = $3", reason, guild_id, case_num)
+        cached = self.cases.get(guild_id)
+        if cached is not None and case_num in cached:
+            cached[case_num]['reason'] = reason
+
+    async def delete_case(self, guild_id: int, case_num: int) -> None:
+        await self.bot.db.execute("DELETE FROM modlog WHERE guild_id = $1 AND case_num = $2", guild_id, case_num)
+        self.forget(guild_id, case_num)
+
+    async def summary(self, guild_id: int, user_id: int):
+        return await self.bot.db.fetchrow(SUMMARY_QUERY, guild_id, user_id)
+
+    async def after(self, guild_id: int, user_id: int, case_num: int, limit: int) -> list:
+        return await self.bot.db.fetch(PAGE_AFTER, guild_id, user_id, case_num, limit)
+
+    async def before(self, guild_id: int, user_id: int, case_num: int, limit: int) -> list:
+        """ Cases before ``case_num``, oldest first. """
+        return list(reversed(await self.bot.db.fetch(PAGE_BEFORE, guild_id, user_id, case_num, limit)))
+
+    async def at(self, guild_id: int, user_id: int, offset: int, limit: int) -> list:
+        return await self.bot.db.fetch(PAGE_OFFSET, guild_id, user_id, offset, limit)
+
+
+class HistoryPages(LazyPages):
+    """ A user's punishments history, one page of cases is fetched at a time.
+
+    Pages next to an already loaded one are found by case number, only
+    jumping to a page in the middle uses an offset. """
+
+    def __init__(self, ctx, user, summary, **kwargs):
+        super().__init__(ctx, total=summary['total'], fetch_page=self.load_page, **kwargs)
+        self.user = user
+        self.history: ModHistory = ctx.bot.mod_history
+        self.bounds: Dict[int, tuple] = {}  # page: (first case_num, last case_num)
+
+    async def load_page(self, page: int) -> List[str]:
+        history, guild_id, user_id, per_page = self.history, self.context.guild.id, self.user.id, self.per_page
+        if page - 1 in self.bounds:
+            rows = await history.after(guild_id, user_id, self.bounds[page - 1][1], per_page)
+        elif page + 1 in self.bounds:
+            rows = await history.before(guild_id, user_id, self.bounds[page + 1][0], per_page)
+        elif page == 1:
+            rows = await history.after(guild_id, user_id, FIRST_CASE, per_page)
+        elif page == self.maximum_pages:
+            rows = await history.before(guild_id, user_id, LAST_CASE, len(self.entries) - (page - 1) * per_page)
+        else:
+            rows = await history.at(guild_id, user_id, (page - 1) * per_page, per_page)
+        if rows:
+            self.bounds[page] = (rows[0]['case_num'], rows[-1]['case_num'])
+
+        entries = []
+        for data in rows:
+            try:
+                mod = await self.bot.try_user(data['mod_id'])
+                mod_id = mod.id
+            except Exception:
+                mod, mod_id = _("Not Found. ID: {0}").format(data['mod_id']), data['mod_id']
+            entries.append(_("**Case ID:** {0}\n**Action:** {1}\n**Moderator:** {2} ({3})\n**Reason:** {4}\n\n").format(
+                data['case_num'], action_name(data['action']), mod, mod_id, data['reason'][:150] + '...' if len(data['reason']) > 150 else data['reason']
+            ))
+        return entries
@@ -290,6 +290,24 @@ class Pages:
         await self.show_page(1, first=True)
 
 
+class LazyPages(Pages):
+    """Like Pages, but only the number of entries is known up front.
+    Each page is loaded by awaiting ``fetch_page(page)`` the first time it's shown.
+    """
+    def __init__(self, ctx, *, total, fetch_page, **kwargs):
+        super().__init__(ctx, entries=range(total), **kwargs)  # only counted, the entries come from fetch_page
+        self.fetch_page = fetch_page
+        self.pages = {}
+
+    def get_page(self, page):
+        return self.pages.get(page, [])
+
+    async def show_page(self, page, *, first=False):
+        if page not in self.pages:
+            self.pages[page] = await self.fetch_page(page)
+        await super().show_page(page, first=first)
+
+
 class FieldPages(Pages):
     """Similar to Pages except entries should be a list of
     tuples having (key, value) to show as embed fields instead.
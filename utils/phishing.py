@@ -0,0 +1,151 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import aiohttp
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+from utils.lru import TTLCache
+
+dredd_logger = logging.getLogger("dredd")
+
+# never worth asking the remote api about these
+SAFE_DOMAINS = frozenset({
+    'discord.com', 'discord.gg', 'discordapp.com', 'discordapp.net', 'discord.media', 'dreddbot.xyz',
+    'youtube.com', 'youtu.be', 'google.com', 'github.com', 'twitter.com', 'twitch.tv', 'reddit.com',
+    'imgur.com', 'tenor.com', 'giphy.com', 'spotify.com', 'wikipedia.org', 'instagram.com'
+})
+
+
+def domain_hash(domain: str) -> int:
+    return int.from_bytes(hashlib.blake2b(domain.encode('utf8'), digest_size=8).digest(), 'big')
+
+
+def suffixes(domain: str) -> List[str]:
+    # a.b.example.com -> a.b.example.com, b.example.com, example.com
+    labels = domain.strip('.').lower().split('.')
+    return ['.'.join(labels[i:]) for i in range(len(labels) - 1)]
+
+
+def build_hashes(domains: Iterable[str]) -> array:
+    cleaned = (domain.strip().lower() for domain in domains)
+    hashes = {domain_hash(domain) for domain in cleaned if domain and not domain.startswith('#')}
+    return array('Q', sorted(hashes))
+
+
+def parse_feed(text: str) -> Tuple[List[str], array]:
+    domains = json.loads(text) if text.lstrip().startswith('[') else text.splitlines()
+    return domains, build_hashes(domains)
+
+
+def write_snapshot(path: str, domains: List[str]) -> None:
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('\n'.join(domains))
+
+
+class PhishingIndex:
+    """ Local index of known phishing domains.
+
+    Domains are kept as sorted 64 bit hashes (8 bytes each) instead of
+    strings, a domain matches if it or any of its parent domains is listed. """
+
+    def __init__(self, path: str = 'db/phishing_domains.txt', feed: Optional[str] = None, remote: Optional[str] = None):
+        self.path = path
+        self.feed = feed
+        self.remote = remote
+        self.hashes = array('Q')
+        self.verdicts = TTLCache(maxsize=20000, ttl=3600.0)  # domain: is phishing, from the remote api
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @property
+    def bytes_used(self) -> int:
+        return self.hashes.itemsize * len(self.hashes)
+
+    def build(self, domains: Iterable[str]) -> None:
+        self.hashes = build_hashes(domains)
+
+    def load(self) -> None:
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, 'r', encoding='utf8') as f:
+            self.build(f)
+        dredd_logger.info(f"[PHISHING] Loaded {len(self)} domains from {self.path}.")
+
+    async def refresh(self, session: aiohttp.ClientSession) -> None:
+        if not self.feed:
+            return
+        async with session.get(self.feed, timeout=aiohttp.ClientTimeout(total=60)) as r:
+            r.raise_for_status()
+            text = await r.text()
+
+        loop = asyncio.get_event_loop()
+        domains, hashes = await loop.run_in_executor(None, parse_feed, text)  # hashing a large feed would block the gateway
+        self.hashes = hashes
+        await loop.run_in_executor(None, write_snapshot, self.path, domains)  # snapshot for the next boot
+        dredd_logger.info(f"[PHISHING] Refreshed the index, {len(self)} domains.")
+
+    def is_listed(self, domain: str) -> bool:
+        hashes = self.hashes
+        for suffix in suffixes(domain):
+            value = domain_hash(suffix)
+            i = bisect_left(hashes, value)
+            if i < len(hashes) and hashes[i] == value:
+                return True
+        return False
+
+    @staticmethod
+    def is_safe(domain: str) -> bool:
+        return any(suffix in SAFE_DOMAINS for suffix in suffixes(domain))
+
+    async def check(self, session: aiohttp.ClientSession, domains: List[str], user_agent: str) -> bool:
+        unknown = []
+        for domain in domains:
+            if self.is_listed(domain):
+                return True
+            verdict = self.verdicts.get(domain)
+            if verdict:
+                return True
+            if verdict is None and not self.is_safe(domain):
+                unknown.append(domain)
+
+        if not unknown or not self.remote:
+            return False
+
+        try:
+            body = {"message": " ".join(unknown)}
+            async with session.post(self.remote, headers={"User-Agent": user_agent}, json=body, timeout=aiohttp.ClientTimeout(total=3)) as r:
+                if 500 % (r.status + 1) == 500:  # service is down
+                    return False
+                result = await r.json()
+        except Exception:
+            return False
+
+        if result.get("match") is False:
+            for domain in unknown:
+                self.verdicts.set(domain, False)
+            return False
+
+        matches = [m.get("domain") for m in result.get("matches", []) if isinstance(m, dict)]
+        for domain in matches or (unknown if len(unknown) == 1 else []):
+            self.verdicts.set(domain, True, ttl=86400.0)
+        return True
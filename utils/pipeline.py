@@ -0,0 +1,87 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from discord.ext.commands.view import StringView
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+Stage = Callable[..., Awaitable[Optional[bool]]]
+
+# stage order, lower runs first
+COMMANDS = 10
+MESSAGES = 15  # ahead of automod, which can delete the message before its stage returns
+AUTOMOD = 20
+AFK = 30
+EVENTS = 40
+
+
+class StageTiming:
+    __slots__ = ('calls', 'total', 'max')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def average(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class MessagePipeline:
+    """ Runs every message through ordered stages that share one context.
+
+    The context (and with it the prefix) is resolved once per message,
+    messages that don't start with any prefix get a context without one
+    straight away instead of going through ``get_context``.
+    A stage returning True stops the stages after it, an exception in a
+    stage is reported through ``bot.on_error`` and the next stage runs.
+    Stages are awaited one after another, anything that can take long (like
+    a command waiting for a reply) has to run in its own task. """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.stages: List[Tuple[int, str, Stage]] = []
+        self.timings: Dict[str, StageTiming] = {}
+
+    def add_stage(self, name: str, stage: Stage, order: int) -> None:
+        self.remove_stage(name)
+        self.stages.append((order, name, stage))
+        self.stages.sort(key=lambda x: x[:2])
+        self.timings.setdefault(name, StageTiming())
+
+    def remove_stage(self, name: str) -> None:
+        self.stages = [x for x in self.stages if x[1] != name]
+
+    async def process(self, message, cls) -> None:
+        if self.bot.prefixes.match(message) is None:
+            ctx = cls(prefix=None, view=StringView(message.content), bot=self.bot, message=message)
+        else:
+            ctx = await self.bot.get_context(message, cls=cls)
+        for order, name, stage in self.stages:
+            timing = self.timings[name]
+            started = perf_counter()
+            try:
+                stop = await stage(ctx)
+            except Exception:
+                await self.bot.on_error(f'on_message ({name})')
+                stop = False
+            finally:
+                elapsed = perf_counter() - started
+                timing.calls += 1
+                timing.total += elapsed
+                timing.max = max(timing.max, elapsed)
+            if stop:
+                break
@@ -0,0 +1,84 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from db.cache import CacheManager as cm
+from typing import FrozenSet, NamedTuple, Optional, Tuple
+
+MISSING = object()
+POLICY_FIELDS = frozenset(('automod', 'spam', 'invites', 'masscaps', 'links', 'massmention', 'raidmode',
+                           'channels_whitelist', 'roles_whitelist', 'users_whitelist'))  # guild settings a policy is compiled from
+
+
+class AutomodPolicy(NamedTuple):
+    channel: int  # logging channel
+    ignore_admins: bool
+    delete_messages: bool
+    channels_whitelist: FrozenSet[int]
+    roles_whitelist: FrozenSet[int]
+    users_whitelist: FrozenSet[int]
+    spam: Optional[dict]
+    invites: Optional[dict]
+    masscaps: Optional[dict]
+    links: Optional[dict]
+    massmention: Optional[dict]
+    raidmode: Optional[dict]
+    actions: Tuple[str, ...]  # names of the enabled automod actions, in the order they run
+
+    def is_whitelisted(self, member, channel=None) -> bool:
+        if member.id in self.users_whitelist:
+            return True
+        if channel is not None and channel.id in self.channels_whitelist:
+            return True
+        # noinspection PyProtectedMember
+        return bool(self.roles_whitelist) and not self.roles_whitelist.isdisjoint(member._roles)
+
+
+def compile_policy(bot, guild_id: int) -> Optional[AutomodPolicy]:
+    automod = cm.get(bot, 'automod', guild_id)
+    if not automod:
+        return None
+
+    # copies, so the policy doesn't change under the hot path until it's rebuilt
+    spam, invites, masscaps, links, massmention, raidmode = (
+        dict(settings) if settings else None for settings in (cm.get(bot, name, guild_id) for name in ('spam', 'invites', 'masscaps', 'links', 'massmention', 'raidmode'))
+    )
+    enabled = (('anti_links', links), ('anti_invite', invites), ('anti_caps', masscaps), ('anti_spam', spam),
+               ('anti_mentions', massmention), ('anti_phishing', True))  # anti phishing can't be toggled off
+
+    return AutomodPolicy(
+        channel=automod['channel'],
+        ignore_admins=automod['ignore_admins'],
+        delete_messages=automod['delete_messages'],
+        channels_whitelist=frozenset(cm.get(bot, 'channels_whitelist', guild_id) or ()),
+        roles_whitelist=frozenset(cm.get(bot, 'roles_whitelist', guild_id) or ()),
+        users_whitelist=frozenset(cm.get(bot, 'users_whitelist', guild_id) or ()),
+        spam=spam, invites=invites, masscaps=masscaps, links=links, massmention=massmention,
+        raidmode=raidmode,
+        actions=tuple(name for name, settings in enabled if settings)
+    )
+
+
+def get_policy(bot, guild_id: int) -> Optional[AutomodPolicy]:
+    policy = bot.automod_policies.get(guild_id, MISSING)
+    if policy is MISSING:
+        policy = bot.automod_policies[guild_id] = compile_policy(bot, guild_id)  # None is cached too, most guilds don't use automod
+    return policy
+
+
+def invalidate_policy(bot, guild_id: Optional[int] = None) -> None:
+    if guild_id is None:
+        bot.automod_policies.clear()
+    else:
+        bot.automod_policies.pop(guild_id, None)
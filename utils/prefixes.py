@@ -0,0 +1,87 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from db.cache import CacheManager as cm
+from typing import Dict, Optional, Tuple
+
+BETA_ID = 663122720044875796
+BETA_PREFIXES = ('rw ', 'db ')
+DM_PREFIX = '!'
+
+
+class PrefixMatcher:
+    """ Prefixes of every guild and user, compiled once and kept until they change.
+
+    ``get`` is what ``get_prefix`` returns, ``match`` tells whether a message
+    starts with any of them without building a context. Guild entries are
+    invalidated by the guild settings hook when the prefix changes, user
+    entries have to be invalidated when someone's booster prefix or rank changes. """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.guilds: Dict[int, Tuple[str, ...]] = {}
+        self.users: Dict[int, Tuple[str, ...]] = {}
+        self._mentions: Tuple[str, ...] = ()
+
+    @property
+    def mentions(self) -> Tuple[str, ...]:
+        if not self._mentions and self.bot.user:
+            self._mentions = (f'<@{self.bot.user.id}> ', f'<@!{self.bot.user.id}> ')
+        return self._mentions
+
+    def guild(self, guild) -> Tuple[str, ...]:
+        if guild is None:
+            return (DM_PREFIX,)
+        prefixes = self.guilds.get(guild.id)
+        if prefixes is None:
+            prefixes = self.guilds[guild.id] = (guild.data.prefix,)
+        return prefixes
+
+    def user(self, user_id: int) -> Tuple[str, ...]:
+        prefixes = self.users.get(user_id)
+        if prefixes is None:
+            prefixes = []
+            dev = cm.get(self.bot, 'devs', user_id)
+            booster = cm.get(self.bot, 'boosters', user_id)
+            if dev or booster is not None:
+                prefixes.append(booster if booster is not None else 'dredd ')
+            if dev or cm.get(self.bot, 'admins', user_id):
+                prefixes.append('d ')
+            prefixes = self.users[user_id] = tuple(prefixes)
+        return prefixes
+
+    def get(self, message) -> Tuple[str, ...]:
+        if self.bot.user.id == BETA_ID:  # for beta, so I don't accidentally kill both bots
+            return self.mentions + BETA_PREFIXES
+        return self.mentions + self.guild(message.guild) + self.user(message.author.id)
+
+    def match(self, message) -> Optional[str]:
+        content = message.content
+        if not content:
+            return None
+        for prefix in self.get(message):
+            if content.startswith(prefix):
+                return prefix
+        return None
+
+    def invalidate_guild(self, guild_id: int) -> None:
+        self.guilds.pop(guild_id, None)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.users.pop(user_id, None)
+
+    def clear(self) -> None:
+        self.guilds.clear()
+        self.users.clear()
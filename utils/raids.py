@@ -0,0 +1,113 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+
+from collections import deque
+from typing import Dict, List
+
+AGE_BUCKETS = (1, 7, 30, 365)  # account age in days, histograms have one more bucket for older accounts
+AGE_LABELS = ('< 1 day', '< 7 days', '< 30 days', '< 1 year', 'older')
+YOUNG = 3  # buckets below this are accounts younger than 30 days
+
+
+def age_bucket(member, now: float) -> int:
+    days = (now - member.created_at.timestamp()) / 86400
+    for i, limit in enumerate(AGE_BUCKETS):
+        if days < limit:
+            return i
+    return len(AGE_BUCKETS)
+
+
+class JoinWindow:
+    """ Joins of one guild in the last ``per`` seconds and a histogram of their account ages. """
+    __slots__ = ('joins', 'histogram')
+
+    def __init__(self):
+        self.joins = deque()  # (timestamp, age bucket)
+        self.histogram = [0] * len(AGE_LABELS)
+
+    def __len__(self) -> int:
+        return len(self.joins)
+
+    def push(self, now: float, bucket: int, per: float, cap: int) -> None:
+        self.expire(now, per)
+        if len(self.joins) >= cap:
+            self.histogram[self.joins.popleft()[1]] -= 1
+        self.joins.append((now, bucket))
+        self.histogram[bucket] += 1
+
+    def expire(self, now: float, per: float) -> None:
+        joins, histogram = self.joins, self.histogram
+        while joins and now - joins[0][0] > per:
+            histogram[joins.popleft()[1]] -= 1
+
+    @property
+    def young(self) -> int:
+        return sum(self.histogram[:YOUNG])
+
+
+class RaidWave:
+    """ Offenders of a raid that are punished in bulk and logged once. """
+
+    def __init__(self, guild_id: int, action: int, channel_id: int, started: float):
+        self.guild_id = guild_id
+        self.action = action  # raidmode action, 1 kick new accounts, 2 ban new accounts, 3 kick everyone, 4 ban everyone
+        self.channel_id = channel_id
+        self.started = started
+        self.queue = asyncio.Queue()
+        self.kicked: List[int] = []
+        self.banned: List[int] = []
+        self.failed = 0
+        self.histogram = [0] * len(AGE_LABELS)
+        self.task = None
+
+    def __len__(self) -> int:
+        return len(self.kicked) + len(self.banned)
+
+
+class RaidDetector:
+    """ Recognizes raid waves from the join rate and account ages of each guild.
+
+    A guild is in a wave when at least ``joins`` members joined in the last ``per``
+    seconds and ``young_ratio`` of them have accounts younger than 30 days, or
+    when ``burst`` members joined regardless of their account age. """
+
+    def __init__(self, per: float = 30.0, joins: int = 10, young_ratio: float = 0.5, burst: int = 25, quiet: float = 30.0):
+        self.per = per
+        self.joins = joins
+        self.young_ratio = young_ratio
+        self.burst = burst
+        self.quiet = quiet  # seconds without offenders before a wave is over
+        self.windows: Dict[int, JoinWindow] = {}
+        self.waves: Dict[int, RaidWave] = {}
+
+    def record(self, member, now: float) -> bool:
+        """ Records the join, returns True if the guild is in a raid wave. """
+        window = self.windows.get(member.guild.id)
+        if window is None:
+            window = self.windows[member.guild.id] = JoinWindow()
+        window.push(now, age_bucket(member, now), self.per, self.burst * 4)
+
+        if member.guild.id in self.waves:
+            return True
+        joined = len(window)
+        return joined >= self.burst or joined >= self.joins and window.young >= joined * self.young_ratio
+
+    def cleanup(self, now: float) -> None:
+        for guild_id, window in list(self.windows.items()):
+            window.expire(now, self.per)
+            if not window:
+                del self.windows[guild_id]
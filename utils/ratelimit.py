@@ -0,0 +1,141 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import sys
+
+from array import array
+from typing import Callable, Dict, List
+
+
+def fingerprint(*parts) -> int:
+    # 64 bit hash, so buckets never hold on to the message content itself
+    data = '\x00'.join(str(part) for part in parts).encode('utf8', 'surrogatepass')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+# bucket keys, same buckets the old cooldown mappings used
+def content_key(message) -> int:
+    return fingerprint(message.channel.id, message.content)
+
+
+def user_key(message) -> int:
+    return message.author.id
+
+
+def member_key(message) -> int:
+    return fingerprint(message.guild.id, message.author.id)
+
+
+def channel_key(message) -> int:
+    return message.channel.id
+
+
+class RateLimiter:
+    """ Sliding window rate limiter, ``rate`` hits per ``per`` seconds.
+
+    Every bucket is a slot in a few flat arrays (window start, last hit,
+    hits in the current and previous window), the key only maps to the slot.
+    Buckets idle for two windows are reused and the store never holds more
+    than ``maxsize`` of them, the least recently hit bucket goes first. """
+
+    def __init__(self, rate: int, per: float, key: Callable[..., int], maxsize: int = 50000):
+        self.rate = rate
+        self.per = per
+        self.key = key
+        self.maxsize = maxsize
+        self._slots: Dict[int, int] = {}  # key: slot, ordered from least to most recently hit
+        self._free: List[int] = []
+        self._start = array('d')  # start of the current window
+        self._last = array('d')  # last hit
+        self._current = array('H')
+        self._previous = array('H')
+        self.evicted = 0  # buckets dropped because the store was full
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def bytes_used(self) -> int:
+        arrays = (self._start, self._last, self._current, self._previous)
+        return sum(a.itemsize * len(a) for a in arrays) + sys.getsizeof(self._slots) + sys.getsizeof(self._free)
+
+    def stats(self) -> dict:
+        return {'buckets': len(self), 'slots': len(self._start), 'bytes': self.bytes_used, 'evicted': self.evicted}
+
+    def _expire(self, now: float) -> None:
+        slots = self._slots
+        while slots:
+            key = next(iter(slots))
+            slot = slots[key]
+            if now - self._last[slot] < self.per * 2:
+                break
+            del slots[key]
+            self._free.append(slot)
+
+    def _allocate(self, now: float) -> int:
+        self._expire(now)
+        if len(self._slots) >= self.maxsize:
+            self._free.append(self._slots.pop(next(iter(self._slots))))
+            self.evicted += 1
+
+        if self._free:
+            slot = self._free.pop()
+            self._start[slot] = now
+            self._last[slot] = now
+            self._current[slot] = 0
+            self._previous[slot] = 0
+            return slot
+
+        self._start.append(now)
+        self._last.append(now)
+        self._current.append(0)
+        self._previous.append(0)
+        return len(self._start) - 1
+
+    def hit(self, message, now: float) -> bool:
+        """ Records a hit, returns True if the bucket went over the limit. """
+        key = self.key(message)
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            slot = self._allocate(now)
+        self._slots[key] = slot  # move to the end, it's the most recently hit now
+
+        per = self.per
+        elapsed = now - self._start[slot]
+        if elapsed >= per:
+            windows = int(elapsed // per)
+            self._previous[slot] = self._current[slot] if windows == 1 else 0
+            self._current[slot] = 0
+            self._start[slot] += windows * per
+            elapsed -= windows * per
+
+        if self._current[slot] < 0xFFFF:
+            self._current[slot] += 1
+        self._last[slot] = now
+
+        weight = 1.0 - elapsed / per  # share of the previous window still inside the sliding window
+        return self._previous[slot] * weight + self._current[slot] > self.rate
+
+    def reset(self, message) -> None:
+        slot = self._slots.pop(self.key(message), None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def clear(self) -> None:
+        self._slots.clear()
+        self._free.clear()
+        for a in (self._start, self._last, self._current, self._previous):
+            del a[:]
@@ -0,0 +1,145 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import discord
+import logging
+
+from datetime import datetime, timedelta
+from contextlib import suppress
+from utils.scheduler import ExpiryScheduler, to_timestamp
+
+dredd_logger = logging.getLogger("dredd")
+
+
+class ReminderEngine:
+    """ Delivers reminders from a priority queue with a bounded pool of workers.
+
+    Only reminders due within ``horizon`` are kept in memory, the rest stay in
+    the database until ``page_in`` gets to them. A reminder stays in ``pending``
+    until a worker handled it, so ``stop`` can put whatever was due but not
+    delivered back on the schedule. """
+
+    def __init__(self, bot, workers: int = 8, horizon: timedelta = timedelta(hours=1)):
+        self.bot = bot
+        self.workers = workers
+        self.horizon = horizon
+        self.scheduler = ExpiryScheduler()
+        self.pending = {}  # key: reminder, keys are (user_id, message_id, timestamp)
+        self.queue = asyncio.Queue(maxsize=workers * 4)  # keys of due reminders
+        self.delivered = []  # (user_id, reminder, time) waiting to be deleted from the db
+        self.loaded_until = None
+        self._workers = []
+
+    @staticmethod
+    def key(user_id: int, message_id: int, time) -> tuple:
+        return user_id, message_id, to_timestamp(time)
+
+    def add(self, user_id: int, channel_id: int, message_id: int, time, content: str) -> None:
+        if self.loaded_until is None or to_timestamp(time) > self.loaded_until:
+            return  # page_in will pick it up once it gets closer
+
+        key = self.key(user_id, message_id, time)
+        self.pending[key] = {'user': user_id, 'channel': channel_id, 'message': message_id, 'time': time, 'content': content}
+        self.scheduler.schedule(key, time)
+
+    def remove(self, user_id: int, message_id: int, time) -> None:
+        key = self.key(user_id, message_id, time)
+        self.pending.pop(key, None)
+        self.scheduler.cancel(key)
+
+    async def page_in(self) -> None:
+        start = self.loaded_until
+        until = datetime.utcnow() + self.horizon
+        self.loaded_until = to_timestamp(until)  # moved before the query so add() doesn't miss anything created meanwhile
+        if start is None:
+            query = "SELECT user_id, channel_id, message_id, time, reminder FROM reminders WHERE time <= $1"
+            rows = await self.bot.db.fetch(query, until)
+        else:
+            query = "SELECT user_id, channel_id, message_id, time, reminder FROM reminders WHERE time > $1 AND time <= $2"
+            rows = await self.bot.db.fetch(query, datetime.utcfromtimestamp(start), until)
+
+        for row in rows:
+            self.add(row['user_id'], row['channel_id'], row['message_id'], row['time'], row['reminder'])
+        dredd_logger.info(f"[REMINDERS] Paged in {len(rows)} reminders.")
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [self.bot.loop.create_task(self.worker()) for _ in range(self.workers)]
+
+    def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+        # reminders that were due but not delivered yet are queued or were dropped with the dispatcher
+        self.queue = asyncio.Queue(maxsize=self.workers * 4)
+        for key, reminder in self.pending.items():
+            if key not in self.scheduler:
+                self.scheduler.schedule(key, reminder['time'])
+
+    async def dispatch(self) -> None:
+        for key in await self.scheduler.wait():
+            if key in self.pending:
+                await self.queue.put(key)  # blocks once every worker is busy
+
+    async def worker(self) -> None:
+        while True:
+            key = await self.queue.get()
+            reminder = self.pending.get(key)
+            if reminder is None:  # removed while it was queued
+                self.queue.task_done()
+                continue
+            try:
+                await self.deliver(reminder)
+            except Exception as e:  # a cancelled delivery stays pending, stop() schedules it again
+                dredd_logger.error(f"[REMINDERS] Failed to deliver reminder - {e}")
+            self.pending.pop(key, None)
+            self.acknowledge(reminder)
+            self.queue.task_done()
+
+    async def deliver(self, reminder: dict) -> None:
+        channel = self.bot.get_channel(reminder['channel'])
+        content = reminder['content']
+        if channel:
+            with suppress(discord.HTTPException):
+                message = channel.get_partial_message(reminder['message'])  # replying doesn't need the message to be fetched first
+                return await message.reply(content, allowed_mentions=discord.AllowedMentions(replied_user=True))
+            with suppress(discord.HTTPException):
+                return await channel.send(f"<@{reminder['user']}>: {content}", allowed_mentions=discord.AllowedMentions(users=True))
+
+        user = self.bot.get_user(reminder['user'])
+        if user:
+            with suppress(discord.HTTPException):
+                await user.send(_("*The original message was deleted or I'm missing permissions*\n\nYour reminder: {0}").format(content[:1800] + '...' if len(content) > 1800 else content))
+
+    def acknowledge(self, reminder: dict) -> None:
+        self.delivered.append((reminder['user'], reminder['content'], reminder['time']))
+        reminders = self.bot.reminders.get(reminder['user'], {})
+        for num, cached in list(reminders.items()):
+            if cached['message'] == reminder['message'] and cached['content'] == reminder['content']:
+                reminders.pop(num)
+                break
+
+    async def flush(self) -> None:
+        if not self.delivered:
+            return
+
+        delivered, self.delivered = self.delivered, []
+        try:
+            await self.bot.db.executemany("DELETE FROM reminders WHERE user_id = $1 AND reminder = $2 AND time = $3", delivered)
+        except Exception:
+            self.delivered.extend(delivered)  # try again on the next flush
+            raise
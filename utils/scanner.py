@@ -0,0 +1,146 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import logging
+import re
+
+from collections import Counter
+from time import perf_counter
+from typing import Iterator, List, Optional, Tuple
+
+dredd_logger = logging.getLogger("dredd")
+
+# every pattern here runs on untrusted content, so none of them may backtrack more than a bounded amount:
+# no overlapping alternatives under a quantifier and no nested unbounded quantifiers
+INVITE_PATTERN = r'discord(?:\.com/invite|app\.com/invite|\.gg)/?([a-zA-Z0-9\-]{2,32})'
+LINKS_PATTERN = r"https?://[!$-_a-z]+"  # same characters the old alternation of classes allowed
+DOMAIN_PATTERN = r"[a-z0-9][a-z0-9.-]*"  # only a candidate, labels are validated in python
+
+INVITE = re.compile(INVITE_PATTERN)
+LINKS = re.compile(LINKS_PATTERN)
+LABEL = re.compile(r"[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?")
+
+# one alternation so the content is only walked once, earlier groups win on the same position
+TOKENS = re.compile(
+    r"(?P<invite>{0})|(?P<link>{1})|(?P<domain>{2})".format(
+        INVITE_PATTERN.replace('([a-zA-Z0-9\\-]{2,32})', '(?P<code>[a-zA-Z0-9\\-]{2,32})'), LINKS_PATTERN, DOMAIN_PATTERN
+    )
+)
+HOST = re.compile(r"https?://(?:[^@/?#]*@)?([^/?#:]+)")
+CAPS_TABLE = str.maketrans('', '', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+INVITE_TAIL = len('app.com/invite/') + 32  # how far an invite can reach past the domain it starts in
+BUDGET = 0.005  # seconds, a scan taking longer than this is counted as an overrun
+stats = Counter(scans=0, overruns=0)
+
+
+def split_domains(candidate: str) -> Iterator[str]:
+    # "a..b.example.com-" -> "b.example.com", runs of at least two valid labels
+    labels = []
+    for label in candidate.split('.') + ['']:
+        label = label.strip('-')
+        if len(label) <= 63 and LABEL.fullmatch(label):
+            labels.append(label)
+            continue
+        if len(labels) > 1 and len(labels[-1]) > 1:
+            yield '.'.join(labels)
+        labels = []
+
+
+class ScanResult:
+    __slots__ = ('length', 'invites', 'links', 'domains', 'caps', 'mentions')
+
+    def __init__(self, length: int, invites: List[str], links: List[str], domains: List[str], caps: int, mentions: int):
+        self.length = length
+        self.invites = invites  # invite codes
+        self.links = links  # links that aren't invites
+        self.domains = domains  # hosts of the links and bare domains, lower cased
+        self.caps = caps
+        self.mentions = mentions  # humans mentioned, excluding the author
+
+    def __repr__(self) -> str:
+        return f"<ScanResult length={self.length} invites={self.invites} links={self.links} domains={self.domains} caps={self.caps} mentions={self.mentions}>"
+
+    @property
+    def caps_ratio(self) -> float:
+        return self.caps / self.length if self.length else 0.0
+
+
+def scan_content(content: str) -> Tuple[List[str], List[str], List[str], int]:
+    """ Invite codes, links, domains and the number of capital letters.
+
+    >>> scan_content('join www.discord.gg/abcd')[0]
+    ['abcd']
+    >>> scan_content('ptb.discord.com/invite/abcd')[0]
+    ['abcd']
+    >>> scan_content('canary.discordapp.com/invite/xyzw')[0]
+    ['xyzw']
+    >>> scan_content('https://discord.gg/abcd and www.example.com')[:3]
+    (['abcd'], [], ['www.example.com'])
+    """
+    invites, links, domains = [], [], []
+    for match in TOKENS.finditer(content):
+        kind = match.lastgroup
+        if kind == 'domain':
+            # a subdomain (www.discord.gg/..., ptb.discord.com/invite/...) takes the position before the invite can
+            invite = 'discord' in match.group() and INVITE.search(content, match.start(), match.end() + INVITE_TAIL)
+            if invite and invite.start() < match.end():
+                invites.append(invite.group(1))
+            elif '.' in match.group():
+                domains.extend(split_domains(match.group()))
+        elif kind == 'invite':
+            invites.append(match.group('code'))
+        else:
+            link = match.group()
+            invite = 'discord' in link and INVITE.search(link)
+            if invite:  # invites wrapped in a link are still invites
+                invites.append(invite.group(1))
+                continue
+            links.append(link)
+            host = HOST.match(link)
+            if host:
+                domains.append(host.group(1).lower())
+
+    caps = len(content) - len(content.translate(CAPS_TABLE))
+    return invites, links, domains, caps
+
+
+def scan(message) -> ScanResult:
+    content = message.content
+    started = perf_counter()
+    invites, links, domains, caps = scan_content(content)
+    elapsed = perf_counter() - started
+    stats['scans'] += 1
+    if elapsed > BUDGET:
+        stats['overruns'] += 1
+        dredd_logger.warning(f"[SCANNER] Scanning message {message.id} ({len(content)} characters) took {elapsed * 1000:.1f}ms")
+    author_id = message.author.id
+    mentions = sum(not x.bot and x.id != author_id for x in message.mentions)
+    return ScanResult(len(content), invites, links, domains, caps, mentions)
+
+
+def diff(previous: ScanResult, current: ScanResult) -> Optional[ScanResult]:
+    """ What an edit introduced, None if there's nothing new to check.
+
+    Caps and mentions are whole message properties, they're only kept
+    if the edit made them worse. """
+    invites = [x for x in current.invites if x not in previous.invites]
+    links = [x for x in current.links if x not in previous.links]
+    domains = [x for x in current.domains if x not in previous.domains]
+    caps = current.caps if current.caps_ratio > previous.caps_ratio else 0
+    mentions = current.mentions if current.mentions > previous.mentions else 0
+    if not invites and not links and not domains and not caps and not mentions:
+        return None
+    return ScanResult(current.length, invites, links, domains, caps, mentions)
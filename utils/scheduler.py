@@ -0,0 +1,106 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import heapq
+import itertools
+
+from datetime import datetime, timezone
+from time import time
+from typing import Hashable, List, Optional, Union
+
+
+def to_timestamp(when: Union[datetime, float, int]) -> float:
+    if isinstance(when, datetime):
+        if when.tzinfo is None:  # everything in the db is stored as naive utc
+            when = when.replace(tzinfo=timezone.utc)
+        return when.timestamp()
+    return float(when)
+
+
+class ExpiryScheduler:
+    """ Min-heap of keys ordered by the time they expire at.
+
+    Cancelling or rescheduling a key doesn't touch the heap, the old
+    entry is simply skipped once it reaches the top. """
+
+    def __init__(self):
+        self._heap = []  # (deadline, sequence, key)
+        self._entries = {}  # key: (deadline, sequence)
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def schedule(self, key: Hashable, when: Union[datetime, float, int]) -> None:
+        deadline = to_timestamp(when)
+        head = self.next_deadline()
+        sequence = next(self._sequence)
+        self._entries[key] = (deadline, sequence)
+        heapq.heappush(self._heap, (deadline, sequence, key))
+        if head is None or deadline < head:
+            self._wakeup.set()  # the sleeper is waiting for a later deadline
+
+    def cancel(self, key: Hashable) -> bool:
+        if self._entries.pop(key, None) is None:
+            return False
+        if len(self._heap) > 64 and len(self._heap) > len(self._entries) * 2:
+            self._compact()
+        return True
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._entries.clear()
+        self._wakeup.set()
+
+    def next_deadline(self) -> Optional[float]:
+        heap = self._heap
+        while heap and self._entries.get(heap[0][2]) != heap[0][:2]:
+            heapq.heappop(heap)  # cancelled or rescheduled
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Hashable]:
+        now = time() if now is None else now
+        heap, entries, due = self._heap, self._entries, []
+        while heap and heap[0][0] <= now and (limit is None or len(due) < limit):
+            deadline, sequence, key = heapq.heappop(heap)
+            if entries.get(key) == (deadline, sequence):
+                del entries[key]
+                due.append(key)
+        return due
+
+    async def wait(self, limit: Optional[int] = None) -> List[Hashable]:
+        """ Sleeps until at least one key is due and returns every due key. """
+        while True:
+            due = self.pop_due(limit=limit)
+            if due:
+                return due
+
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(deadline - time(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _compact(self) -> None:
+        entries = self._entries
+        self._heap = [(deadline, sequence, key) for key, (deadline, sequence) in entries.items()]
+        heapq.heapify(self._heap)
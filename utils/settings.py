@@ -0,0 +1,229 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import logging
+
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+dredd_logger = logging.getLogger("dredd")
+
+MISSING: Any = object()
+
+Listener = Callable[[int, str, Any, Any], None]  # guild_id, field, old value, new value
+
+
+class GuildSettings:
+    """ Every cached setting of one guild, unset fields hold MISSING. """
+
+    # logging channels
+    moderation: Optional[int]
+    memberlog: Optional[int]
+    joinlog: Optional[int]
+    leavelog: Optional[int]
+    guildlog: Optional[int]
+    messageedits: Optional[int]
+    messagedeletes: Optional[int]
+    modlog: Optional[int]
+
+    # roles
+    joinrole: Optional[dict]
+    mute_role: Optional[int]
+    mod_role: Optional[int]
+    admin_role: Optional[int]
+
+    # automod
+    automod: Optional[dict]
+    spam: Optional[dict]
+    masscaps: Optional[dict]
+    invites: Optional[dict]
+    massmention: Optional[dict]
+    links: Optional[dict]
+    raidmode: Optional[dict]
+    channels_whitelist: Optional[list]
+    roles_whitelist: Optional[list]
+    users_whitelist: Optional[list]
+
+    # other
+    prefix: Optional[str]
+    translations: Optional[str]
+    joinmessage: Optional[dict]
+    leavemessage: Optional[dict]
+    antihoist: Optional[bool]
+    case_num: Optional[int]
+
+    __slots__ = ('moderation', 'memberlog', 'joinlog', 'leavelog', 'guildlog', 'messageedits', 'messagedeletes', 'modlog',
+                 'joinrole', 'mute_role', 'mod_role', 'admin_role',
+                 'automod', 'spam', 'masscaps', 'invites', 'massmention', 'links', 'raidmode',
+                 'channels_whitelist', 'roles_whitelist', 'users_whitelist',
+                 'prefix', 'translations', 'joinmessage', 'leavemessage', 'antihoist', 'case_num')
+
+    def __init__(self):
+        for field in self.__slots__:
+            setattr(self, field, MISSING)
+
+    def __repr__(self) -> str:
+        return f"<GuildSettings {' '.join(f'{f}={v!r}' for f, v in self.items())}>"
+
+    def items(self) -> Iterator:
+        for field in self.__slots__:
+            value = getattr(self, field)
+            if value is not MISSING:
+                yield field, value
+
+    def is_empty(self) -> bool:
+        return all(getattr(self, field) is MISSING for field in self.__slots__)
+
+
+FIELDS = frozenset(GuildSettings.__slots__)
+
+
+class GuildSettingsStore:
+    """ One GuildSettings record per guild, in a single map.
+
+    Listeners are called with ``(guild_id, field, old, new)`` whenever a field
+    is assigned or removed, ``new`` is MISSING on removal. Nested values (the
+    automod dicts, whitelists) edited in place don't go through the store, so
+    code doing that has to call ``notify`` itself. """
+
+    def __init__(self):
+        self.guilds: Dict[int, GuildSettings] = {}
+        self.listeners: List[Listener] = []
+        self.views: Dict[str, SettingsView] = {}
+
+    def __len__(self) -> int:
+        return len(self.guilds)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self.guilds
+
+    def get(self, guild_id: int) -> Optional[GuildSettings]:
+        return self.guilds.get(guild_id)
+
+    def value(self, guild_id: int, field: str, default=None) -> Any:
+        record = self.guilds.get(guild_id)
+        if record is None:
+            return default
+        value = getattr(record, field)
+        return default if value is MISSING else value
+
+    def set(self, guild_id: int, field: str, value: Any) -> None:
+        record = self.guilds.get(guild_id)
+        if record is None:
+            record = self.guilds[guild_id] = GuildSettings()
+        old = getattr(record, field)
+        setattr(record, field, value)
+        self.notify(guild_id, field, old, value)
+
+    def update(self, guild_id: int, fields: dict, notify: bool = True) -> None:
+        if not fields:
+            return
+        record = self.guilds.get(guild_id)
+        if record is None:
+            record = self.guilds[guild_id] = GuildSettings()
+        for field, value in fields.items():
+            old = getattr(record, field)
+            setattr(record, field, value)
+            if notify:
+                self.notify(guild_id, field, old, value)
+
+    def unset(self, guild_id: int, field: str) -> Any:
+        """ Removes the field, returns its old value or MISSING if it wasn't set. """
+        record = self.guilds.get(guild_id)
+        if record is None:
+            return MISSING
+        old = getattr(record, field)
+        if old is MISSING:
+            return MISSING
+        setattr(record, field, MISSING)
+        if record.is_empty():
+            del self.guilds[guild_id]
+        self.notify(guild_id, field, old, MISSING)
+        return old
+
+    def remove(self, guild_id: int) -> None:
+        record = self.guilds.pop(guild_id, None)
+        if record is not None:
+            for field, value in list(record.items()):
+                self.notify(guild_id, field, value, MISSING)
+
+    def clear(self) -> None:
+        self.guilds.clear()
+
+    def subscribe(self, listener: Listener) -> None:
+        self.listeners.append(listener)
+
+    def notify(self, guild_id: int, field: str, old: Any = MISSING, new: Any = MISSING) -> None:
+        for listener in self.listeners:
+            try:
+                listener(guild_id, field, old, new)
+            except Exception as e:
+                dredd_logger.error(f"[SETTINGS] Listener {listener} failed for {guild_id} {field}: {e}")
+
+    def view(self, field: str) -> 'SettingsView':
+        if field not in FIELDS:
+            raise KeyError(field)
+        view = self.views.get(field)
+        if view is None:
+            view = self.views[field] = SettingsView(self, field)
+        return view
+
+
+class SettingsView(MutableMapping):
+    """ ``guild_id: value`` mapping over one field of every record.
+
+    Stands in for the per setting dicts that used to live on the bot, so
+    ``bot.prefix[guild_id]`` and ``cm.get(bot, 'prefix', guild_id)`` keep working. """
+
+    __slots__ = ('store', 'field')
+
+    def __init__(self, store: GuildSettingsStore, field: str):
+        self.store = store
+        self.field = field
+
+    def __repr__(self) -> str:
+        return f'<SettingsView {self.field} guilds={len(self)}>'
+
+    def __getitem__(self, guild_id: int) -> Any:
+        record = self.store.guilds.get(guild_id)
+        value = MISSING if record is None else getattr(record, self.field)
+        if value is MISSING:
+            raise KeyError(guild_id)
+        return value
+
+    def get(self, guild_id: int, default=None) -> Any:
+        return self.store.value(guild_id, self.field, default)
+
+    def __contains__(self, guild_id) -> bool:
+        return self.store.value(guild_id, self.field, MISSING) is not MISSING
+
+    def __setitem__(self, guild_id: int, value: Any) -> None:
+        self.store.set(guild_id, self.field, value)
+
+    def __delitem__(self, guild_id: int) -> None:
+        if self.store.unset(guild_id, self.field) is MISSING:
+            raise KeyError(guild_id)
+
+    def __iter__(self) -> Iterator[int]:
+        field = self.field
+        return iter([guild_id for guild_id, record in self.store.guilds.items() if getattr(record, field) is not MISSING])
+
+    def __len__(self) -> int:
+        field = self.field
+        return sum(1 for record in self.store.guilds.values() if getattr(record, field) is not MISSING)
+
+    def clear(self) -> None:
+        for guild_id in list(self):
+            self.store.unset(guild_id, self.field)
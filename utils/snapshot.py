@@ -0,0 +1,219 @@
+"""
+Dredd, discord bot
+Copyright (C) 2022 Moksej
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import struct
+
+from time import perf_counter, time
+from typing import Any, Dict, Optional
+
+dredd_logger = logging.getLogger("dredd")
+
+# File layout, little endian:
+#   header   magic, version, section count, written at (unix time), blake2b-256 of everything after the header
+#   index    one entry per section: name, offset from the start of the file, length
+#   sections pickled caches, each one readable on its own through the mmap
+MAGIC = b'DRSN'
+VERSION = 1
+HEADER = struct.Struct('<4sHHd32s')
+ENTRY = struct.Struct('<32sQQ')
+
+# global caches kept in the snapshot next to the guild settings
+CACHES = ('devs', 'admins', 'boosters', 'badges', 'blacklist', 'rr', 'temp_bans', 'temp_mutes', 'mutes', 'bans',
+          'guild_disabled', 'cog_disabled', 'disabled_commands', 'guilds_data')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def encode(sections: Dict[str, Any], written_at: Optional[float] = None) -> bytes:
+    payloads = [(name.encode(), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)) for name, value in sections.items()]
+    offset = HEADER.size + ENTRY.size * len(payloads)
+    body = bytearray()
+    for name, payload in payloads:
+        body += ENTRY.pack(name, offset, len(payload))
+        offset += len(payload)
+    for _, payload in payloads:
+        body += payload
+
+    checksum = hashlib.blake2b(body, digest_size=32).digest()
+    return HEADER.pack(MAGIC, VERSION, len(payloads), time() if written_at is None else written_at, checksum) + body
+
+
+def write(path: str, data: bytes) -> int:
+    """ Replaces the file atomically, returns its size. """
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(data)
+
+
+class Snapshot:
+    """ A snapshot file mapped into memory, sections are unpickled on access. """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.sections = self.verify()
+        except Exception:
+            self.close()
+            raise
+
+    def verify(self) -> Dict[str, tuple]:
+        mm = self.mm
+        if len(mm) < HEADER.size:
+            raise SnapshotError("file is too short")
+        magic, version, count, self.written_at, checksum = HEADER.unpack_from(mm)
+        if magic != MAGIC:
+            raise SnapshotError("not a cache snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"version {version} is not supported, expected {VERSION}")
+        with memoryview(mm) as view:
+            if hashlib.blake2b(view[HEADER.size:], digest_size=32).digest() != checksum:
+                raise SnapshotError("checksum mismatch")
+
+        sections = {}
+        for i in range(count):
+            name, offset, length = ENTRY.unpack_from(mm, HEADER.size + i * ENTRY.size)
+            if offset + length > len(mm):
+                raise SnapshotError(f"section {name!r} is out of bounds")
+            sections[name.rstrip(b'\0').decode()] = (offset, length)
+        return sections
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sections
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def section(self, name: str) -> Any:
+        offset, length = self.sections[name]
+        return pickle.loads(self.mm[offset:offset + length])
+
+    def close(self) -> None:
+        self.mm.close()
+
+
+class WarmStart:
+    """ Restores the caches from a snapshot at boot and keeps the snapshot fresh.
+
+    The snapshot is written on shutdown and every ``interval`` seconds once the
+    caches are loaded from the database, after a warm start that's once they
+    were reconciled. A snapshot older than ``max_age`` seconds, or one that
+    fails the checks, is ignored and the caches are loaded from the database. """
+
+    def __init__(self, bot, path: str, interval: float = 600.0, max_age: float = 86400.0):
+        self.bot = bot
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.loaded = False  # caches match the database, only then the snapshot may be overwritten
+        self._loaded = asyncio.Event()
+        self.restored_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def dump(self) -> Dict[str, Any]:
+        bot = self.bot
+        sections: Dict[str, Any] = {name: dict(getattr(bot, name)) for name in CACHES if hasattr(bot, name)}
+        sections['guild_settings'] = {guild_id: dict(record.items()) for guild_id, record in bot.guild_settings.guilds.items()}
+        return sections
+
+    def restore(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        started = perf_counter()
+        try:
+            with Snapshot(self.path) as snapshot:
+                age = time() - snapshot.written_at
+                if age > self.max_age:
+                    dredd_logger.info(f"[SNAPSHOT] Ignoring a snapshot from {age / 3600:.1f} hours ago.")
+                    return False
+                sections = {name: snapshot.section(name) for name in snapshot.sections}
+        except Exception as e:
+            dredd_logger.error(f"[SNAPSHOT] Failed to read {self.path}: {e}")
+            return False
+
+        bot = self.bot
+        for name in CACHES:
+            if name in sections and hasattr(bot, name):
+                cache = getattr(bot, name)
+                cache.clear()
+                cache.update(sections[name])
+        store = bot.guild_settings
+        for guild_id, fields in sections.get('guild_settings', {}).items():
+            store.update(guild_id, fields, notify=False)  # nothing is compiled from the settings yet
+
+        self.restored_at = snapshot.written_at
+        dredd_logger.info(f"[SNAPSHOT] Restored {len(store)} guilds in {(perf_counter() - started) * 1000:.1f}ms.")
+        return True
+
+    async def reconcile(self, load) -> None:
+        """ Reloads the caches from the database in the background after a warm start. """
+        try:
+            await load(self.bot)
+        except Exception as e:
+            # the caches may be half reloaded, so they aren't written over the snapshot either
+            dredd_logger.error(f"[SNAPSHOT] Reconciling failed, running on the snapshot: {e}")
+            self._loaded.set()
+            return
+        dredd_logger.info("[SNAPSHOT] Caches reconciled with the database.")
+        self.mark_loaded()
+
+    def mark_loaded(self) -> None:
+        self.loaded = True
+        self._loaded.set()
+
+    async def wait_loaded(self) -> None:
+        """ Waits until the caches were loaded from the database, or reconciling gave up. """
+        await self._loaded.wait()
+
+    async def save(self) -> None:
+        if not self.loaded:
+            return
+        started = perf_counter()
+        try:
+            data = encode(self.dump())  # pickled on the loop, so nothing changes underneath it
+            size = await self.bot.loop.run_in_executor(None, write, self.path, data)
+        except Exception as e:
+            dredd_logger.error(f"[SNAPSHOT] Failed to write {self.path}: {e}")
+            return
+        dredd_logger.info(f"[SNAPSHOT] Wrote {size / 1024:.1f} KiB in {(perf_counter() - started) * 1000:.1f}ms.")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = self.bot.loop.create_task(self.run())
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        await self.save()